@@ -0,0 +1,137 @@
+import zlib
+from typing import Dict, Hashable, List, Sequence, Set, Tuple
+
+import numpy as np
+
+from scripts.codes.hcl_tokenizer import tokenize
+
+# Universal hashing of the shingle hashes (32-bit) modulo a Mersenne prime: a * x + b < 2^63
+_PRIME = (1 << 31) - 1
+
+# Largest share of the pairs at exactly the threshold the LSH bands may miss
+MAX_MISS_RATE = 0.01
+
+# Below this many (removed, added) pairs, all of them are compared without LSH
+EXACT_PAIRS = 1024
+
+
+def lsh_bands(threshold: float, num_perm: int, max_miss_rate: float = MAX_MISS_RATE) -> Tuple[int, int]:
+    """
+    Number of bands and of rows per band of `num_perm` MinHash values for a Jaccard
+    threshold: the most rows per band (fewest candidate pairs) such that a pair at the
+    threshold shares no band bucket with probability `(1 - threshold^rows)^bands` at most
+    `max_miss_rate`. The S-curve of the bands then rises well below the threshold.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if (1 - threshold ** rows) ** bands <= max_miss_rate:
+            return bands, rows
+    return num_perm, 1
+
+
+def block_shingles(text: str, size: int = 3) -> Set[int]:
+    """
+    Hashes of the `size`-token shingles of a block text (comments and whitespace ignored).
+    Blocks shorter than `size` tokens give a single shingle of all their tokens.
+    """
+    tokens = [token.value for token in tokenize(text or "") if token.kind != "NEWLINE"]
+    if not tokens:
+        return set()
+    size = min(size, len(tokens))
+    return {zlib.crc32("\x1f".join(tokens[i:i + size]).encode("utf-8"))
+            for i in range(len(tokens) - size + 1)}
+
+
+def jaccard(a: Set[int], b: Set[int]) -> float:
+    if not a or not b:
+        return 0.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+
+class BlockMatcher:
+    """
+    Pairs blocks that disappeared from a commit (renamed, or moved to another file)
+    with the new blocks of the same commit, by similarity of their token shingles.
+
+    The removed blocks are indexed with MinHash signatures split into LSH bands, so a
+    new block is only compared with the removed blocks sharing one of its band buckets
+    instead of with all of them; the bands are sized from the threshold (see `lsh_bands`).
+    Commits with few pairs compare all of them. Candidate pairs are confirmed on the exact
+    Jaccard similarity of their shingles and paired greedily, most similar first.
+    """
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 64, seed: int = 1):
+        self.threshold = threshold
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, _PRIME, size=num_perm).astype(np.uint64)
+        self._b = generator.randint(0, _PRIME, size=num_perm).astype(np.uint64)
+
+    def signature(self, shingles: Set[int]) -> np.ndarray:
+        """
+        MinHash signature of a non-empty shingle set.
+        """
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        hashes = (np.outer(values, self._a) + self._b) % _PRIME
+        return hashes.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(band, signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def match(self, removed: Sequence[Tuple[Hashable, str, str]],
+              added: Sequence[Tuple[Hashable, str, str]]) -> Dict[Hashable, Tuple[Hashable, float]]:
+        """
+        Pairs new blocks with removed blocks of the same kind.
+
+        Args:
+            removed: (key, block kind, block text) of the blocks without a successor.
+            added: (key, block kind, block text) of the blocks without a predecessor.
+
+        Returns:
+            Dict[Hashable, Tuple[Hashable, float]]: Key of an added block -> (key of its
+            removed block, Jaccard similarity), for the pairs at or above the threshold.
+        """
+        exact = len(removed) * len(added) <= EXACT_PAIRS
+        removed_shingles = {}
+        buckets = {}
+        for key, kind, text in removed:
+            shingles = block_shingles(text)
+            if not shingles:
+                continue
+            removed_shingles[key] = (kind, shingles)
+            if exact:
+                buckets.setdefault(kind, []).append(key)
+                continue
+            for band_key in self._band_keys(self.signature(shingles)):
+                buckets.setdefault((kind,) + band_key, []).append(key)
+
+        candidates = []
+        for key, kind, text in added:
+            shingles = block_shingles(text)
+            if not shingles:
+                continue
+            if exact:
+                bucket_lists = [buckets.get(kind, ())]
+            else:
+                bucket_lists = [buckets.get((kind,) + band_key, ())
+                                for band_key in self._band_keys(self.signature(shingles))]
+            seen = set()
+            for bucket in bucket_lists:
+                for removed_key in bucket:
+                    if removed_key in seen:
+                        continue
+                    seen.add(removed_key)
+                    similarity = jaccard(shingles, removed_shingles[removed_key][1])
+                    if similarity >= self.threshold:
+                        candidates.append((similarity, key, removed_key))
+
+        # Most similar pairs first; each block is paired at most once
+        matches = {}
+        paired = set()
+        for similarity, key, removed_key in sorted(candidates, key=lambda c: -c[0]):
+            if key in matches or removed_key in paired:
+                continue
+            matches[key] = (removed_key, similarity)
+            paired.add(removed_key)
+        return matches
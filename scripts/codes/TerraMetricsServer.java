@@ -0,0 +1,91 @@
+import java.io.BufferedReader;
+import java.io.FileDescriptor;
+import java.io.FileOutputStream;
+import java.io.InputStreamReader;
+import java.io.PrintStream;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.nio.charset.StandardCharsets;
+import java.util.jar.JarFile;
+
+/**
+ * Long-lived TerraMetrics worker.
+ *
+ * Launched once per run with the TerraMetrics JAR on the classpath
+ * (java -cp terraform_metrics-1.0.jar TerraMetricsServer.java terraform_metrics-1.0.jar).
+ * Each line read on stdin is a tab-separated list of TerraMetrics CLI arguments;
+ * the JAR entry point is invoked in-process and a single status line
+ * ("OK" or "ERR <message>") is written back on stdout.
+ *
+ * The first line written is "READY", or "READY NOEXITTRAP" when System.exit cannot be
+ * trapped (JDK 24+, where the Security Manager is gone): an entry point calling it then
+ * ends the worker, and the Python side falls back to one `java -jar` per file.
+ */
+public class TerraMetricsServer {
+
+    private static final class ExitTrappedException extends SecurityException {
+        ExitTrappedException(int status) {
+            super("System.exit(" + status + ")");
+        }
+    }
+
+    public static void main(String[] args) throws Exception {
+        String mainClassName;
+        try (JarFile jar = new JarFile(args[0])) {
+            mainClassName = jar.getManifest().getMainAttributes().getValue("Main-Class");
+        }
+        Method entryPoint = Class.forName(mainClassName).getMethod("main", String[].class);
+
+        // The protocol owns stdout; anything TerraMetrics prints goes to stderr.
+        PrintStream protocol = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        System.setOut(System.err);
+        boolean exitTrapped = trapExit();
+
+        BufferedReader requests = new BufferedReader(new InputStreamReader(System.in, StandardCharsets.UTF_8));
+        protocol.println(exitTrapped ? "READY" : "READY NOEXITTRAP");
+
+        String line;
+        while ((line = requests.readLine()) != null) {
+            if (line.isEmpty()) {
+                continue;
+            }
+            try {
+                entryPoint.invoke(null, (Object) line.split("\t"));
+                protocol.println("OK");
+            } catch (InvocationTargetException e) {
+                Throwable cause = e.getCause();
+                if (cause instanceof ExitTrappedException && "System.exit(0)".equals(cause.getMessage())) {
+                    protocol.println("OK");
+                } else {
+                    protocol.println("ERR " + String.valueOf(cause).replace('\n', ' '));
+                }
+            }
+        }
+    }
+
+    @SuppressWarnings("removal")
+    private static boolean trapExit() {
+        // A CLI entry point may call System.exit; turn it into an exception so the JVM stays warm.
+        // Needs -Djava.security.manager=allow on JDK 18-23 and is impossible from JDK 24 on.
+        try {
+            System.setSecurityManager(new SecurityManager() {
+                @Override
+                public void checkExit(int status) {
+                    throw new ExitTrappedException(status);
+                }
+
+                @Override
+                public void checkPermission(java.security.Permission perm) {
+                }
+
+                @Override
+                public void checkPermission(java.security.Permission perm, Object context) {
+                }
+            });
+            return true;
+        } catch (UnsupportedOperationException | SecurityException e) {
+            System.err.println("[TerraMetricsServer] System.exit cannot be trapped: " + e);
+            return false;
+        }
+    }
+}
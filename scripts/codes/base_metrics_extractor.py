@@ -1,5 +1,10 @@
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Dict, List
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+# File versions whose derived (incremental) blocks are kept in memory
+DERIVED_ENTRIES = 256
 
 
 class BaseMetricsExtractor(ABC):
@@ -7,6 +12,8 @@ class BaseMetricsExtractor(ABC):
     Abstract class for Terraform metrics extractors.
     """
 
+    parser_version = "unknown"
+
     @abstractmethod
     def extract_metrics(self, modified_blocks: Dict[str, List[str]]) -> Dict[str, dict]:
         """
@@ -19,3 +26,84 @@ class BaseMetricsExtractor(ABC):
             Dict[str, dict]: Dictionary containing the extracted metrics.
         """
         pass
+
+    @abstractmethod
+    def parse_source(self, source_code: str) -> dict:
+        """
+        Abstract method to locate and measure the blocks of a Terraform file.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            dict: {"head": file metrics, "data": list of block records}.
+        """
+        pass
+
+    def prefetch(self, sources: Iterable[str]):
+        """
+        Hook to parse a batch of file contents ahead of time. No-op by default.
+
+        Args:
+            sources (Iterable[str]): File contents expected to be parsed soon.
+        """
+        pass
+
+    def peek(self, source_code: str) -> Optional[dict]:
+        """
+        Hook returning the output already known for a file content without parsing it.
+        None by default (nothing is kept between calls).
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            Optional[dict]: Parser output, or None if it is not known.
+        """
+        return None
+
+    def remember(self, source_code: str, data: dict):
+        """
+        Hook to keep an output derived without calling `parse_source`. No-op by default.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+            data (dict): Parser output for that content.
+        """
+        pass
+
+    def peek_derived(self, source_code: str) -> Optional[List[dict]]:
+        """
+        Blocks derived from a diff for a file content by `remember_derived`, if still kept.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            Optional[List[dict]]: Derived block records, or None.
+        """
+        derived = self.__dict__.get("_derived")
+        if derived is None:
+            return None
+        return derived.get(hashlib.sha1(source_code.encode("utf-8")).hexdigest())
+
+    def remember_derived(self, source_code: str, blocks: List[dict]):
+        """
+        Keeps blocks derived from a diff (shifted, only partly re-parsed) for the next
+        version of the file. They stay in memory, apart from the parser outputs: `peek`,
+        `parse_source` and the on-disk cache never return them.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+            blocks (List[dict]): Derived block records for that content.
+        """
+        derived = self.__dict__.setdefault("_derived", OrderedDict())
+        derived[hashlib.sha1(source_code.encode("utf-8")).hexdigest()] = blocks
+        while len(derived) > DERIVED_ENTRIES:
+            derived.popitem(last=False)
+
+    def close(self):
+        """
+        Hook to release the resources held by the extractor. No-op by default.
+        """
+        pass
@@ -0,0 +1,112 @@
+import json
+import logging
+import os
+import tempfile
+from typing import Optional
+
+logger = logging.getLogger("BlockCache")
+
+
+class BlockCache:
+    """
+    On-disk, content-addressed cache of parsed Terraform file versions.
+
+    Entries are keyed by the git blob SHA of the file content plus the version of the
+    parser that produced them, so the "after" version of a file in one commit is reused
+    as the "before" version in its child commit, across runs. The directory is bounded
+    in size: least recently used entries (by file modification time, refreshed on every
+    hit) are evicted first.
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: float = 512):
+        """
+        Args:
+            cache_dir (str): Directory holding the cache; can persist between CI runs.
+            max_size_mb (float): Size limit of the directory in megabytes.
+        """
+        self.cache_dir = cache_dir
+        self.max_size = int(max_size_mb * 1024 * 1024)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.size = sum(entry.stat().st_size for _, entry in self._entries())
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, parser_version: str, digest: str) -> str:
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}-{parser_version}.json")
+
+    def _entries(self):
+        for shard in os.scandir(self.cache_dir):
+            if shard.is_dir():
+                for entry in os.scandir(shard.path):
+                    if entry.name.endswith(".json"):
+                        yield shard.name, entry
+
+    def get(self, parser_version: str, digest: str) -> Optional[dict]:
+        """
+        Args:
+            parser_version (str): Identifier of the parser (e.g. JAR checksum).
+            digest (str): Git blob SHA of the file content.
+
+        Returns:
+            Optional[dict]: The cached parser output, or None on a miss.
+        """
+        path = self._path(parser_version, digest)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, parser_version: str, digest: str, data: dict):
+        """
+        Stores a parser output, then evicts old entries if the directory grew past its limit.
+
+        Args:
+            parser_version (str): Identifier of the parser (e.g. JAR checksum).
+            digest (str): Git blob SHA of the file content.
+            data (dict): Parser output to store.
+        """
+        path = self._path(parser_version, digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+        try:
+            # Write-then-rename so concurrent runs never read a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, path)
+            self.size += os.path.getsize(path) - previous_size
+        except OSError as e:
+            logger.warning(f"Impossible d'écrire dans le cache {path} : {e}")
+            return
+
+        if self.size > self.max_size:
+            self.evict()
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache is back under 90% of its limit.
+        """
+        entries = []
+        for _, entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        entries.sort()
+
+        self.size = sum(size for _, size, _ in entries)
+        target = int(self.max_size * 0.9)
+        for _, size, path in entries:
+            if self.size <= target:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self.size -= size
@@ -1,8 +1,11 @@
+import atexit
+import hashlib
 import json
 import os
+import shutil
 import subprocess
 import tempfile
-from typing import Dict, List
+from typing import Dict, Hashable, Iterable, List, Optional
 
 from typing import Dict, List
 import sys
@@ -22,27 +25,108 @@ except ImportError:
         class BaseMetricsExtractor:
             pass
 
+try:
+    from scripts.codes.terrametrics_worker import TerraMetricsWorker, WorkerUnavailableError
+    from scripts.codes.block_cache import BlockCache
+except ImportError:
+    from terrametrics_worker import TerraMetricsWorker, WorkerUnavailableError
+    from block_cache import BlockCache
+
 # Mock logger since utils might be missing
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("CodeMetricsExtractor")
 
 
+def source_digest(source_code: str) -> str:
+    """
+    Git blob SHA-1 of a file content, used to recognise identical file versions.
+
+    Args:
+        source_code (str): Content of the Terraform file.
+
+    Returns:
+        str: Hex digest, equal to `git hash-object` of the same content.
+    """
+    data = source_code.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
 class CodeMetricsExtractor(BaseMetricsExtractor):
     """
     Class for running TerraMetrics and extracting metrics from modified Terraform blocks.
     """
 
-    def __init__(self, jar_path: str = "libs/terraform_metrics-1.0.jar"):
+    _shared_instances: Dict[str, "CodeMetricsExtractor"] = {}
+
+    def __init__(self, jar_path: str = "libs/terraform_metrics-1.0.jar", persistent: bool = True,
+                 cache: Optional[BlockCache] = None):
         """
         Initializes the metrics extractor.
 
         Args:
             jar_path (str): Path to the TerraMetrics JAR file.
+            persistent (bool): Keep one warm TerraMetrics JVM for all runs instead of
+                starting `java -jar` for every file.
+            cache (Optional[BlockCache]): On-disk cache of parsed file versions.
         """
         self.jar_path = jar_path
         if not os.path.exists(self.jar_path):
             raise FileNotFoundError(f"TerraMetrics JAR introuvable : {self.jar_path}")
+        self.persistent = persistent
+        self.cache = cache
+        self._parser_version = None
+        self._worker = None
+        # Outputs of the last prefetch() batch, keyed by source digest
+        self._prefetched: Dict[str, dict] = {}
+        self._batch_supported = True
+        # Layout of the `--directory` output (see BATCH_LAYOUTS), read from the first batch
+        self._batch_layout: Optional[str] = None
+
+    @classmethod
+    def shared(cls, jar_path: str) -> "CodeMetricsExtractor":
+        """
+        Returns the process-wide extractor for a JAR, so its worker stays warm for the whole run.
+
+        Args:
+            jar_path (str): Path to the TerraMetrics JAR file.
+
+        Returns:
+            CodeMetricsExtractor: The shared extractor.
+        """
+        key = os.path.abspath(jar_path)
+        if key not in cls._shared_instances:
+            extractor = cls(jar_path=jar_path)
+            atexit.register(extractor.close)
+            cls._shared_instances[key] = extractor
+        return cls._shared_instances[key]
+
+    @property
+    def parser_version(self) -> str:
+        """
+        Checksum of the JAR, so cached outputs are invalidated when TerraMetrics changes.
+        """
+        if self._parser_version is None:
+            digest = hashlib.sha1()
+            with open(self.jar_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            self._parser_version = "jar-" + digest.hexdigest()[:12]
+        return self._parser_version
+
+    def close(self):
+        """
+        Stops the persistent TerraMetrics worker, if any.
+        """
+        if self._worker is not None:
+            self._worker.stop()
+            self._worker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def extract_metrics(self, modified_blocks: Dict[str, List[str]]) -> Dict[str, dict]:
         """
@@ -84,6 +168,191 @@ class CodeMetricsExtractor(BaseMetricsExtractor):
 
         return metrics_results
 
+    def parse_source(self, source_code: str) -> dict:
+        """
+        Runs TerraMetrics on the content of a Terraform file.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            dict: TerraMetrics output ("head" for the file, "data" for its blocks).
+        """
+        known = self.peek(source_code)
+        if known is not None:
+            return known
+
+        tf_path, json_path = self._create_temp_files([source_code])
+        try:
+            self._run_terrametrics(tf_path, json_path)
+            with open(json_path, "r") as f:
+                data = json.load(f)
+        finally:
+            self._cleanup_temp_files([tf_path, json_path])
+
+        self.remember(source_code, data)
+        return data
+
+    def peek(self, source_code: str) -> Optional[dict]:
+        """
+        Returns the output already known for a file content (prefetched or cached)
+        without running TerraMetrics.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            Optional[dict]: TerraMetrics output, or None if the content was never parsed.
+        """
+        digest = source_digest(source_code)
+        prefetched = self._prefetched.get(digest)
+        if prefetched is not None:
+            return prefetched
+        if self.cache is not None:
+            return self.cache.get(self.parser_version, digest)
+        return None
+
+    def remember(self, source_code: str, data: dict):
+        """
+        Stores the output for a file content in the on-disk cache, if any.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+            data (dict): TerraMetrics output for that content.
+        """
+        if self.cache is not None:
+            self.cache.put(self.parser_version, source_digest(source_code), data)
+
+    def parse_sources(self, sources: Dict[Hashable, str]) -> Dict[Hashable, dict]:
+        """
+        Runs TerraMetrics once on many Terraform file contents.
+
+        The sources are written to one input directory and parsed with a single
+        `--directory` invocation. Inputs that cannot be matched in the output are
+        parsed one by one, so the result always covers every key. The layout of the
+        output is identified on the first batch; if no input can be matched, batching
+        is turned off for the rest of the run.
+
+        Args:
+            sources (Dict[Hashable, str]): Contents to parse, by caller-defined key.
+
+        Returns:
+            Dict[Hashable, dict]: TerraMetrics output for each key ({"error": ...} when
+            TerraMetrics failed on that input).
+        """
+        if not sources:
+            return {}
+
+        results = {}
+        if self._batch_supported and len(sources) > 1:
+            input_dir = tempfile.mkdtemp(prefix="terrametrics_")
+            json_path = input_dir + ".json"
+            keys_by_file = {}
+            try:
+                for index, (key, source_code) in enumerate(sources.items()):
+                    file_name = f"{index:06d}.tf"
+                    with open(os.path.join(input_dir, file_name), "w", encoding="utf-8") as f:
+                        f.write(source_code)
+                    keys_by_file[file_name] = key
+
+                self._run_terrametrics_directory(input_dir, json_path)
+                with open(json_path, "r") as f:
+                    output = json.load(f)
+                if self._batch_layout is None:
+                    self._batch_layout = self._batch_layout_of(output, keys_by_file)
+                if self._batch_layout is not None:
+                    results = self._split_batch_output(output, keys_by_file, self._batch_layout)
+                if not results:
+                    logger.warning("Sortie batch TerraMetrics non reconnue, analyse fichier par fichier")
+                    self._batch_supported = False
+
+            except (subprocess.CalledProcessError, OSError, ValueError) as e:
+                logger.warning(f"Batch TerraMetrics indisponible, analyse fichier par fichier : {e}")
+                self._batch_supported = False
+
+            finally:
+                shutil.rmtree(input_dir, ignore_errors=True)
+                self._cleanup_temp_files([json_path])
+
+        for key, source_code in sources.items():
+            if key not in results:
+                try:
+                    results[key] = self.parse_source(source_code)
+                except subprocess.CalledProcessError as e:
+                    logger.error(f"TerraMetrics error ({key}): {e}")
+                    results[key] = {"error": "TerraMetrics execution failed"}
+        return results
+
+    def prefetch(self, sources: Iterable[str]):
+        """
+        Parses a batch of file contents ahead of time; parse_source() then serves
+        them without running TerraMetrics. Replaces the previous batch.
+
+        Args:
+            sources (Iterable[str]): File contents expected to be parsed soon
+                (e.g. every before/after version of a window of commits).
+        """
+        unique_sources = {source_digest(source): source for source in sources if source}
+        self._prefetched = {}
+        if self.cache is not None:
+            for digest in list(unique_sources):
+                cached = self.cache.get(self.parser_version, digest)
+                if cached is not None:
+                    self._prefetched[digest] = cached
+                    del unique_sources[digest]
+
+        results = self.parse_sources(unique_sources)
+        for digest, output in results.items():
+            # Failed inputs are left to parse_source(), which reports the error to its caller
+            if "error" in output:
+                continue
+            self._prefetched[digest] = output
+            if self.cache is not None:
+                self.cache.put(self.parser_version, digest, output)
+
+    # Layouts of a directory-mode output: a list of per-file results, a dict of results keyed by
+    # file path, or a single result whose blocks carry their file path
+    BATCH_LAYOUTS = ("list", "by_path", "blocks")
+
+    @classmethod
+    def _batch_layout_of(cls, output, keys_by_file: Dict[str, Hashable]) -> Optional[str]:
+        """
+        Identifies the layout of a directory-mode TerraMetrics output: the one under which
+        it maps back to the input files (None when no input matches under any).
+        """
+        for layout in cls.BATCH_LAYOUTS:
+            if cls._split_batch_output(output, keys_by_file, layout):
+                return layout
+        return None
+
+    @staticmethod
+    def _split_batch_output(output, keys_by_file: Dict[str, Hashable], layout: str) -> Dict[Hashable, dict]:
+        """
+        Maps a directory-mode TerraMetrics output of a given layout back to the input files.
+        """
+        def key_of(path):
+            return keys_by_file.get(os.path.basename(str(path))) if path else None
+
+        def path_of(entry):
+            head = entry.get("head") if isinstance(entry.get("head"), dict) else {}
+            return entry.get("file") or entry.get("path") or head.get("file") or head.get("path")
+
+        results = {}
+        if layout == "list" and isinstance(output, list):
+            for entry in output:
+                if isinstance(entry, dict) and key_of(path_of(entry)) is not None:
+                    results[key_of(path_of(entry))] = entry
+        elif layout == "blocks" and isinstance(output, dict) and isinstance(output.get("data"), list):
+            for block in output["data"]:
+                key = key_of(path_of(block)) if isinstance(block, dict) else None
+                if key is not None:
+                    results.setdefault(key, {"head": {}, "data": []})["data"].append(block)
+        elif layout == "by_path" and isinstance(output, dict):
+            for path, entry in output.items():
+                if isinstance(entry, dict) and key_of(path) is not None:
+                    results[key_of(path)] = entry
+        return results
+
     def _create_temp_files(self, blocks: List[str]) -> tuple:
         """
         Creates temporary Terraform (.tf) and output (.json) files.
@@ -94,11 +363,12 @@ class CodeMetricsExtractor(BaseMetricsExtractor):
         Returns:
             Tuple[str, str]: Paths of the .tf and .json files.
         """
-        tf_file = tempfile.NamedTemporaryFile(suffix=".tf", delete=False, mode="w")
+        tf_file = tempfile.NamedTemporaryFile(suffix=".tf", delete=False, mode="w", encoding="utf-8")
         json_file = tempfile.NamedTemporaryFile(suffix=".json", delete=False)
 
         tf_file.write("\n\n".join(blocks))
         tf_file.close()
+        json_file.close()
 
         return tf_file.name, json_file.name
 
@@ -110,10 +380,7 @@ class CodeMetricsExtractor(BaseMetricsExtractor):
             tf_path (str): Path of the Terraform file.
             output_path (str): Path of the JSON output file.
         """
-        command = [
-            "java",
-            "-jar",
-            self.jar_path,
+        args = [
             "--file",
             tf_path,
             "-b",
@@ -122,7 +389,50 @@ class CodeMetricsExtractor(BaseMetricsExtractor):
         ]
 
         logger.info(f"[CODE] Exécution de TerraMetrics pour {tf_path}...")
-        subprocess.run(command, check=True)
+        self._invoke_terrametrics(args)
+
+    def _run_terrametrics_directory(self, input_dir: str, output_path: str):
+        """
+        Runs TerraMetrics for every Terraform file of a directory.
+
+        Args:
+            input_dir (str): Directory holding the .tf files.
+            output_path (str): Path of the JSON output file.
+        """
+        args = [
+            "--directory",
+            input_dir,
+            "-b",
+            "--target",
+            output_path,
+        ]
+
+        logger.info(f"[CODE] Exécution de TerraMetrics pour le lot {input_dir}...")
+        self._invoke_terrametrics(args)
+
+    def _invoke_terrametrics(self, args: List[str]):
+        """
+        Runs TerraMetrics with the given arguments, in the warm worker when persistent.
+        A worker that cannot be used turns the extractor to one `java -jar` per call for
+        the rest of the run.
+
+        Args:
+            args (List[str]): TerraMetrics CLI arguments.
+        """
+        if self.persistent:
+            if self._worker is None:
+                self._worker = TerraMetricsWorker(self.jar_path)
+            try:
+                self._worker.run(args)
+                return
+            except WorkerUnavailableError as e:
+                logger.warning(f"Worker TerraMetrics indisponible, exécution par java -jar : {e}")
+                self.close()
+                self.persistent = False
+        self._run_jar(args)
+
+    def _run_jar(self, args: List[str]):
+        subprocess.run(["java", "-jar", self.jar_path] + args, check=True)
 
     def _cleanup_temp_files(self, file_paths: List[str]):
         """
@@ -0,0 +1,97 @@
+"""
+Parity harness between the TerraMetrics JAR and the pure-Python block locator.
+
+Usage:
+    python scripts/codes/engine_parity.py path/to/file.tf path/to/dir ...
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from scripts.codes.code_metrics_measures import CodeMetricsExtractor
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+
+# Fields ImpactedBlocks and the feature extractors rely on
+STRUCTURAL_KEYS = [
+    "block_identifiers", "block_name", "start_block", "end_block",
+    "numAttrs", "depthOfBlock", "isResource", "isData",
+]
+
+
+def compare_engine_outputs(reference: dict, candidate: dict, keys: Optional[List[str]] = None) -> List[str]:
+    """
+    Compares the block records of two parser outputs for the same file.
+
+    Args:
+        reference (dict): Output of the reference engine (TerraMetrics JAR).
+        candidate (dict): Output of the engine under test.
+        keys (Optional[List[str]]): Fields to compare; by default the structural fields
+            plus every numeric field either engine emits (a field emitted by one engine
+            only is a mismatch).
+
+    Returns:
+        List[str]: Human-readable mismatches (empty when the outputs agree).
+    """
+    reference_blocks = reference.get("data", [])
+    candidate_blocks = candidate.get("data", [])
+    mismatches = []
+    if len(reference_blocks) != len(candidate_blocks):
+        mismatches.append(f"block count: {len(reference_blocks)} != {len(candidate_blocks)}")
+
+    for ref_block, cand_block in zip(reference_blocks, candidate_blocks):
+        compared = keys
+        if compared is None:
+            numeric = [key for block in (ref_block, cand_block) for key, value in block.items()
+                       if isinstance(value, (int, float)) and key not in STRUCTURAL_KEYS]
+            compared = STRUCTURAL_KEYS + list(dict.fromkeys(numeric))
+        for key in compared:
+            if (key in ref_block) != (key in cand_block):
+                side = "candidate" if key in ref_block else "reference"
+                mismatches.append(f"{ref_block.get('block_identifiers')} [{key}]: missing in the {side} output")
+                continue
+            if ref_block.get(key) != cand_block.get(key):
+                mismatches.append(f"{ref_block.get('block_identifiers')} [{key}]: "
+                                  f"{ref_block.get(key)!r} != {cand_block.get(key)!r}")
+    return mismatches
+
+
+def iter_tf_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith(".tf"):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the JAR and Python block locators.")
+    parser.add_argument("paths", nargs="+", help="Terraform files or directories")
+    parser.add_argument("--jar", default=os.path.join("libs", "terraform_metrics-1.0.jar"),
+                        help="Path to the TerraMetrics JAR")
+    args = parser.parse_args()
+
+    python_engine = HclMetricsExtractor()
+    failures = 0
+    with CodeMetricsExtractor(jar_path=args.jar) as jar_engine:
+        for path in iter_tf_files(args.paths):
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+            mismatches = compare_engine_outputs(jar_engine.parse_source(source), python_engine.parse_source(source))
+            status = "OK" if not mismatches else f"{len(mismatches)} mismatches"
+            print(f"{path}: {status}")
+            for mismatch in mismatches:
+                print(f"  - {mismatch}")
+            failures += bool(mismatches)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+import os
+import sys
+from typing import Dict, List, Optional
+
+# Add local directory to path for imports if needed
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+try:
+    from scripts.codes.base_metrics_extractor import BaseMetricsExtractor
+    from scripts.codes.block_cache import BlockCache
+    from scripts.codes.code_metrics_measures import source_digest
+    from scripts.codes.hcl_tokenizer import Token, tokenize
+except ImportError:
+    from base_metrics_extractor import BaseMetricsExtractor
+    from block_cache import BlockCache
+    from code_metrics_measures import source_digest
+    from hcl_tokenizer import Token, tokenize
+
+PARSER_VERSION = "python-hcl-1"
+
+META_ARGUMENTS = {"count", "for_each", "depends_on", "provider", "lifecycle", "provisioner", "connection"}
+BLOCK_KINDS = ["resource", "data", "module", "variable", "output", "provider", "locals", "terraform"]
+OPENING = {"{": "}", "[": "]", "(": ")"}
+
+# Numeric metrics emitted for every block, in output order
+METRICS = [
+    "numAttrs", "depthOfBlock", "loc", "numTokens", "numNestedBlocks", "numDynamicBlocks",
+    "numMetaArg", "numFunctionCall", "numConditions", "numLoops", "numHereDocs",
+    "numReferences", "numVarsRef", "numLocalsRef", "numStringValues", "numInterpolations",
+]
+
+
+class _BlockStats:
+
+    def __init__(self):
+        self.values = dict.fromkeys(METRICS, 0)
+        self.values["depthOfBlock"] = 1
+
+    def add(self, metric, count=1):
+        self.values[metric] += count
+
+
+class HclMetricsExtractor(BaseMetricsExtractor):
+    """
+    In-process Terraform block locator, an alternative to the TerraMetrics JAR.
+
+    Tokenizes HCL in Python and emits the same block records as TerraMetrics'
+    `data` list (identifiers, line range, attribute count, nesting depth, block
+    kind flags and numeric metrics), without starting a JVM.
+    """
+
+    parser_version = PARSER_VERSION
+
+    def __init__(self, cache: Optional[BlockCache] = None):
+        """
+        Args:
+            cache (Optional[BlockCache]): On-disk cache of parsed file versions.
+        """
+        self.cache = cache
+
+    def extract_metrics(self, modified_blocks: Dict[str, List[str]]) -> Dict[str, dict]:
+        """
+        Extracts metrics from modified Terraform blocks.
+
+        Args:
+            modified_blocks (Dict[str, List[str]]): Files and their modified blocks.
+
+        Returns:
+            Dict[str, dict]: Extracted metrics for each file.
+        """
+        return {file_name: self.parse_source("\n\n".join(blocks))
+                for file_name, blocks in modified_blocks.items()}
+
+    def parse_source(self, source_code: str) -> dict:
+        """
+        Locates the top-level blocks of a Terraform file and measures them.
+
+        Args:
+            source_code (str): Content of the Terraform file.
+
+        Returns:
+            dict: {"head": file metrics, "data": block records}.
+        """
+        known = self.peek(source_code) if source_code else None
+        if known is not None:
+            return known
+        data = self._parse(source_code)
+        if source_code:
+            self.remember(source_code, data)
+        return data
+
+    def peek(self, source_code: str) -> Optional[dict]:
+        """
+        Returns the output cached for a file content, if any, without parsing it.
+        """
+        if self.cache is not None:
+            return self.cache.get(self.parser_version, source_digest(source_code))
+        return None
+
+    def remember(self, source_code: str, data: dict):
+        """
+        Stores the output for a file content in the on-disk cache, if any.
+        """
+        if self.cache is not None:
+            self.cache.put(self.parser_version, source_digest(source_code), data)
+
+    def _parse(self, source_code: str) -> dict:
+        tokens = tokenize(source_code or "")
+        blocks = []
+        i = 0
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            if token.kind == "IDENT":
+                header_end = self._find_block_header_end(tokens, i)
+                if header_end is not None:
+                    block, i = self._parse_block(tokens, i, header_end)
+                    blocks.append(block)
+                    continue
+                if i + 1 < n and tokens[i + 1].value == "=":
+                    # Top-level attribute (e.g. in .tfvars-like files): skip its expression
+                    i = self._skip_expression(tokens, i + 2, _BlockStats())
+                    continue
+            i += 1
+
+        head = {
+            "num_blocks": len(blocks),
+            "loc": source_code.count("\n") + 1 if source_code else 0,
+        }
+        return {"head": head, "data": blocks}
+
+    @staticmethod
+    def _find_block_header_end(tokens: List[Token], i: int) -> Optional[int]:
+        """
+        Returns the index of the `{` opening the block whose header starts at `i`
+        (`keyword "label" ... {`), or None if the tokens are not a block header.
+        """
+        j = i + 1
+        while j < len(tokens) and tokens[j].kind in ("STRING", "IDENT"):
+            j += 1
+        if j < len(tokens) and tokens[j].value == "{":
+            return j
+        return None
+
+    def _parse_block(self, tokens: List[Token], start: int, brace: int):
+        keyword = tokens[start].value
+        labels = [self._label(token) for token in tokens[start + 1:brace]]
+        stats = _BlockStats()
+        end = self._parse_body(tokens, brace + 1, 1, stats)
+        end_line = tokens[end - 1].end_line if end > brace + 1 else tokens[brace].line
+
+        start_line = tokens[start].line
+        stats.values["loc"] = end_line - start_line + 1
+        stats.values["numTokens"] = sum(1 for token in tokens[start:end] if token.kind != "NEWLINE")
+
+        block = {
+            "block": keyword,
+            "block_id": labels[0] if labels else keyword,
+            "block_name": labels[-1] if labels else keyword,
+            "block_identifiers": " ".join([keyword] + labels),
+            "start_block": start_line,
+            "end_block": end_line,
+        }
+        block.update(stats.values)
+        for kind in BLOCK_KINDS:
+            block["is" + kind.capitalize()] = 1 if keyword == kind else 0
+        return block, end
+
+    @staticmethod
+    def _label(token: Token) -> str:
+        if token.kind == "STRING":
+            return token.value[1:-1] if token.value.endswith('"') and len(token.value) > 1 else token.value[1:]
+        return token.value
+
+    def _parse_body(self, tokens: List[Token], i: int, depth: int, stats: _BlockStats) -> int:
+        """
+        Walks a block body starting after its `{`.
+
+        Returns:
+            int: Index after the `}` closing the body (or the end of the tokens).
+        """
+        stats.values["depthOfBlock"] = max(stats.values["depthOfBlock"], depth)
+        n = len(tokens)
+        while i < n:
+            token = tokens[i]
+            if token.value == "}" and token.kind == "PUNCT":
+                return i + 1
+            if token.kind == "IDENT":
+                if i + 1 < n and tokens[i + 1].value == "=":
+                    stats.add("numAttrs")
+                    if depth == 1 and token.value in META_ARGUMENTS:
+                        stats.add("numMetaArg")
+                    i = self._skip_expression(tokens, i + 2, stats)
+                    continue
+                header_end = self._find_block_header_end(tokens, i)
+                if header_end is not None:
+                    stats.add("numNestedBlocks")
+                    if token.value == "dynamic":
+                        stats.add("numDynamicBlocks")
+                    if depth == 1 and token.value in META_ARGUMENTS:
+                        stats.add("numMetaArg")
+                    i = self._parse_body(tokens, header_end + 1, depth + 1, stats)
+                    continue
+            i += 1
+        return n
+
+    @staticmethod
+    def _skip_expression(tokens: List[Token], i: int, stats: _BlockStats) -> int:
+        """
+        Walks an attribute expression, up to the newline (or closing brace of the
+        enclosing body) that ends it outside any bracket.
+
+        Returns:
+            int: Index of the token ending the expression (not consumed).
+        """
+        stack = []
+        n = len(tokens)
+        previous = None
+        while i < n:
+            token = tokens[i]
+            if not stack and (token.kind == "NEWLINE" or (token.kind == "PUNCT" and token.value == "}")):
+                return i
+
+            if token.kind == "PUNCT":
+                if token.value in OPENING:
+                    stack.append(OPENING[token.value])
+                elif stack and token.value == stack[-1]:
+                    stack.pop()
+                elif token.value == "?":
+                    stats.add("numConditions")
+            elif token.kind == "IDENT":
+                following = tokens[i + 1].value if i + 1 < n else None
+                if following == "(":
+                    stats.add("numFunctionCall")
+                elif token.value == "for" and previous is not None and previous.value in ("[", "{"):
+                    stats.add("numLoops")
+                elif following == "." and (previous is None or previous.value != "."):
+                    stats.add("numReferences")
+                    if token.value == "var":
+                        stats.add("numVarsRef")
+                    elif token.value == "local":
+                        stats.add("numLocalsRef")
+            elif token.kind == "STRING":
+                stats.add("numStringValues")
+                stats.add("numInterpolations", token.value.count("${"))
+            elif token.kind == "HEREDOC":
+                stats.add("numHereDocs")
+                stats.add("numInterpolations", token.value.count("${"))
+
+            if token.kind != "NEWLINE":
+                previous = token
+            i += 1
+        return n
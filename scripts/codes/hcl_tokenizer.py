@@ -0,0 +1,215 @@
+import re
+from typing import List, NamedTuple, Tuple
+
+
+class Token(NamedTuple):
+    kind: str  # IDENT, NUMBER, STRING, HEREDOC, PUNCT, NEWLINE, COMMENT
+    value: str
+    line: int  # 1-based line of the first character
+    end_line: int  # 1-based line of the last character
+
+
+_SPACE = re.compile(r"[ \t\r\f\v]+")
+_COMMENT = re.compile(r"#[^\n]*|//[^\n]*|/\*.*?(?:\*/|\Z)", re.DOTALL)
+_IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_\-]*")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?(?:[eE][+\-]?\d+)?")
+_HEREDOC_START = re.compile(r"<<(-?)([A-Za-z_][A-Za-z0-9_\-]*)[ \t]*\r?\n")
+# Openings of the tokens that can span lines: heredocs and /* comments
+_MULTILINE_START = re.compile(r"<<-?([A-Za-z_][A-Za-z0-9_\-]*)[ \t]*\r?\n|/\*")
+_PUNCT = re.compile(r"==|!=|<=|>=|&&|\|\||=>|\.\.\.|[{}\[\]()=:,.?!+\-*/%<>]")
+
+
+def _scan_template(source: str, i: int) -> int:
+    """
+    Returns the index after the `}` closing a `${`/`%{` sequence opened just before `i`.
+    """
+    n = len(source)
+    depth = 1
+    while i < n:
+        c = source[i]
+        if c == '"':
+            i = _scan_quoted(source, i)
+            continue
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return n
+
+
+def _scan_quoted(source: str, i: int) -> int:
+    """
+    Returns the index after the quote closing the string opened at `i`
+    (or the end of the line for an unterminated string).
+    """
+    n = len(source)
+    i += 1
+    while i < n:
+        c = source[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == '"':
+            return i + 1
+        if c == "\n":
+            return i
+        if c in "$%" and source.startswith("{", i + 1):
+            i = _scan_template(source, i + 2)
+            continue
+        if c in "$%" and source.startswith(c + "{", i + 1):
+            # Escaped template sequence ($${ or %%{)
+            i += 3
+            continue
+        i += 1
+    return n
+
+
+def _scan_heredoc(source: str, i: int, marker: str) -> int:
+    """
+    Returns the index after the line closing a heredoc whose body starts at `i`.
+    """
+    n = len(source)
+    while i < n:
+        end = source.find("\n", i)
+        line_end = n if end == -1 else end
+        if source[i:line_end].strip() == marker:
+            return line_end
+        if end == -1:
+            return n
+        i = end + 1
+    return n
+
+
+def _in_line_string_or_comment(source: str, start: int, position: int) -> bool:
+    """
+    Whether `position` is inside a quoted string or a line comment of the code starting at `start`
+    (the beginning of its line, or the end of the previous multi-line token on that line).
+    """
+    i = start
+    while i < position:
+        c = source[i]
+        if c == '"':
+            i = _scan_quoted(source, i)
+            if i > position:
+                return True
+            continue
+        if c == "#" or source.startswith("//", i):
+            return True
+        i += 1
+    return False
+
+
+def multiline_token_lines(source: str) -> List[Tuple[int, int]]:
+    """
+    (first line, last line) of the heredocs and /* comments of a text, found by a search for
+    their openings rather than by tokenizing the whole text.
+    """
+    spans = []
+    source = source or ""
+    end = 0
+    for match in _MULTILINE_START.finditer(source):
+        position = match.start()
+        if position < end:
+            continue
+        line_start = max(source.rfind("\n", 0, position) + 1, end)
+        if _in_line_string_or_comment(source, line_start, position):
+            continue
+        if match.group(1) is not None:
+            end = _scan_heredoc(source, match.end(), match.group(1))
+        else:
+            close = source.find("*/", position + 2)
+            end = len(source) if close == -1 else close + 2
+        first_line = source.count("\n", 0, position) + 1
+        spans.append((first_line, first_line + source.count("\n", position, end)))
+    return spans
+
+
+def tokenize(source: str, keep_comments: bool = False) -> List[Token]:
+    """
+    Splits HCL (Terraform native syntax) into tokens.
+
+    Whitespace is dropped, newlines are kept as NEWLINE tokens since they terminate
+    attributes, and quoted strings (with their `${...}` interpolations) and heredocs
+    are single tokens.
+
+    Args:
+        source (str): Terraform source.
+        keep_comments (bool): Emit COMMENT tokens instead of dropping comments.
+
+    Returns:
+        List[Token]: Tokens in source order.
+    """
+    tokens = []
+    line = 1
+    i = 0
+    n = len(source)
+
+    while i < n:
+        c = source[i]
+
+        if c == "\n":
+            tokens.append(Token("NEWLINE", "\n", line, line))
+            line += 1
+            i += 1
+            continue
+
+        match = _SPACE.match(source, i)
+        if match:
+            i = match.end()
+            continue
+
+        match = _COMMENT.match(source, i)
+        if match:
+            text = match.group()
+            end_line = line + text.count("\n")
+            if keep_comments:
+                tokens.append(Token("COMMENT", text, line, end_line))
+            line = end_line
+            i = match.end()
+            continue
+
+        if c == '"':
+            end = _scan_quoted(source, i)
+            text = source[i:end]
+            end_line = line + text.count("\n")
+            tokens.append(Token("STRING", text, line, end_line))
+            line = end_line
+            i = end
+            continue
+
+        match = _HEREDOC_START.match(source, i)
+        if match:
+            end = _scan_heredoc(source, match.end(), match.group(2))
+            text = source[i:end]
+            end_line = line + text.count("\n")
+            tokens.append(Token("HEREDOC", text, line, end_line))
+            line = end_line
+            i = end
+            continue
+
+        match = _IDENT.match(source, i)
+        if match:
+            tokens.append(Token("IDENT", match.group(), line, line))
+            i = match.end()
+            continue
+
+        match = _NUMBER.match(source, i)
+        if match:
+            tokens.append(Token("NUMBER", match.group(), line, line))
+            i = match.end()
+            continue
+
+        match = _PUNCT.match(source, i)
+        if match:
+            tokens.append(Token("PUNCT", match.group(), line, line))
+            i = match.end()
+            continue
+
+        # Unknown character: keep it so nothing is silently lost
+        tokens.append(Token("PUNCT", c, line, line))
+        i += 1
+
+    return tokens
@@ -0,0 +1,129 @@
+from bisect import bisect_left, bisect_right
+from typing import List, Optional
+
+try:
+    from scripts.codes.hcl_tokenizer import tokenize
+except ImportError:
+    from hcl_tokenizer import tokenize
+
+OPENING = {"{": "}", "[": "]", "(": ")"}
+
+
+def count_between(sorted_values: List[int], start: int, end: int) -> int:
+    """
+    Number of values v with start <= v <= end in a sorted list.
+    """
+    if end < start:
+        return 0
+    return bisect_right(sorted_values, end) - bisect_left(sorted_values, start)
+
+
+def map_line(line: int, removed: List[int], inserted: List[int]) -> int:
+    """
+    Maps an unchanged line of the known version to its number in the target version.
+
+    Args:
+        line (int): Line of the known version (must not be in `removed`).
+        removed (List[int]): Sorted lines of the known version absent from the target.
+        inserted (List[int]): Sorted lines of the target version absent from the known one.
+
+    Returns:
+        int: Line number in the target version.
+    """
+    # `line` is the rank-th unchanged line; find the target line with the same rank
+    rank = line - bisect_left(removed, line)
+    target = rank
+    while True:
+        shifted = rank + bisect_right(inserted, target)
+        if shifted == target:
+            return target
+        target = shifted
+
+
+def is_self_contained(text: str) -> bool:
+    """
+    Whether a source fragment can be parsed on its own: balanced brackets and no
+    comment, string or heredoc left open (which would swallow the following blocks).
+    """
+    stack = []
+    for token in tokenize(text, keep_comments=True):
+        if token.kind == "PUNCT":
+            if token.value in OPENING:
+                stack.append(OPENING[token.value])
+            elif token.value in OPENING.values():
+                if not stack or stack.pop() != token.value:
+                    return False
+        elif token.kind == "COMMENT" and token.value.startswith("/*") and not token.value.endswith("*/"):
+            return False
+        elif token.kind == "STRING" and (len(token.value) < 2 or not token.value.endswith('"')):
+            return False
+        elif token.kind == "HEREDOC":
+            marker = token.value.split("\n", 1)[0].lstrip("<-").strip()
+            if token.value.rsplit("\n", 1)[-1].strip() != marker:
+                return False
+    return not stack
+
+
+def derive_blocks(block_locator, known_blocks: List[dict], target_source: str,
+                  removed: List[int], inserted: List[int]) -> Optional[List[dict]]:
+    """
+    Derives the blocks of a file version from the parsed blocks of another version
+    of the same file and the diff between them.
+
+    Blocks untouched by the diff are kept and shifted by the hunk offsets; only the
+    regions between them that contain changed lines are re-parsed.
+
+    Args:
+        block_locator: Extractor used to parse the changed regions.
+        known_blocks (List[dict]): Blocks of the known version.
+        target_source (str): Content of the version to derive.
+        removed (List[int]): Sorted lines of the known version absent from the target.
+        inserted (List[int]): Sorted lines of the target version absent from the known one.
+
+    Returns:
+        Optional[List[dict]]: Blocks of the target version, or None if a changed region
+        cannot be parsed on its own (the caller should then parse the whole file).
+    """
+    target_lines = target_source.split("\n")
+    blocks = []
+    previous_known_end = 0
+    previous_target_end = 0
+
+    clean_blocks = []
+    for block in sorted(known_blocks, key=lambda b: b["start_block"]):
+        start, end = block["start_block"], block["end_block"]
+        if start <= previous_known_end or count_between(removed, start, end):
+            continue
+        target_start = map_line(start, removed, inserted)
+        target_end = map_line(end, removed, inserted)
+        if target_end - target_start != end - start or count_between(inserted, target_start, target_end):
+            continue
+        clean_blocks.append((block, target_start, target_end))
+        previous_known_end = end
+
+    previous_known_end = 0
+    for block, target_start, target_end in clean_blocks + [(None, len(target_lines) + 1, None)]:
+        known_start = block["start_block"] if block is not None else float("inf")
+        gap_changed = (count_between(removed, previous_known_end + 1, known_start - 1) or
+                       count_between(inserted, previous_target_end + 1, target_start - 1))
+        if gap_changed and target_start - 1 >= previous_target_end + 1:
+            fragment = "\n".join(target_lines[previous_target_end:target_start - 1])
+            if not is_self_contained(fragment):
+                return None
+            offset = previous_target_end
+            for parsed in block_locator.parse_source(fragment).get("data", []):
+                shifted = dict(parsed)
+                shifted["start_block"] = parsed["start_block"] + offset
+                shifted["end_block"] = parsed["end_block"] + offset
+                blocks.append(shifted)
+
+        if block is None:
+            break
+        shifted = dict(block)
+        shifted["start_block"] = target_start
+        shifted["end_block"] = target_end
+        blocks.append(shifted)
+        previous_known_end = block["end_block"]
+        previous_target_end = target_end
+
+    return blocks
@@ -0,0 +1,169 @@
+import os
+import re
+from bisect import bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from scripts.codes.hcl_tokenizer import tokenize
+from scripts.utility.pickle_file import load_pickle, save_pickle
+
+# var.x, module.x, data.type.name and type.name (resource types always contain "_"), on
+# expressions whose attribute chains are written without spaces (see ATTRIBUTE_DOT), so that
+# a chain such as local.map.key is never read from its middle
+REFERENCE_PATTERN = re.compile(
+    r"(?<![\w.-])(?:(data)\.([A-Za-z_][\w-]*)\.([A-Za-z_][\w-]*)"
+    r"|(module|var)\.([A-Za-z_][\w-]*)"
+    r"|([A-Za-z][\w-]*_[\w-]*)\.([A-Za-z_][\w-]*))"
+)
+INTERPOLATION_PATTERN = re.compile(r"\$\{(.*?)\}", re.DOTALL)
+ATTRIBUTE_DOT = re.compile(r"\s*\.\s*")
+
+
+def reference_target(match) -> str:
+    """
+    `block_identifiers` of the block a reference points to.
+    """
+    data, data_type, data_name, keyword, name, resource_type, resource_name = match.groups()
+    if data:
+        return f"data {data_type} {data_name}"
+    if keyword == "module":
+        return f"module {name}"
+    if keyword == "var":
+        return f"variable {name}"
+    return f"resource {resource_type} {resource_name}"
+
+
+def block_references(source: str, blocks: List[dict]) -> Dict[str, Set[str]]:
+    """
+    Blocks referenced by each block of a file version.
+
+    Args:
+        source (str): File content.
+        blocks (List[dict]): Top-level blocks of the file, as parsed by the block locator.
+
+    Returns:
+        Dict[str, Set[str]]: block_identifiers -> block_identifiers of the referenced blocks.
+    """
+    blocks = sorted(blocks, key=lambda b: b["start_block"])
+    starts = [block["start_block"] for block in blocks]
+    expressions = {block.get("block_identifiers"): [] for block in blocks}
+    for token in tokenize(source or ""):
+        i = bisect_right(starts, token.line) - 1
+        if i < 0 or token.line > blocks[i]["end_block"] or token.kind == "NEWLINE":
+            continue
+        pieces = expressions[blocks[i].get("block_identifiers")]
+        if token.kind in ("STRING", "HEREDOC"):
+            pieces.extend(INTERPOLATION_PATTERN.findall(token.value))
+        else:
+            pieces.append(token.value)
+    return {identifiers: {reference_target(match)
+                          for match in REFERENCE_PATTERN.finditer(ATTRIBUTE_DOT.sub(".", " ".join(pieces)))}
+            - {identifiers}
+            for identifiers, pieces in expressions.items()}
+
+
+class ReferenceIndex:
+    """
+    Repository-wide inverted index of the references between blocks: referenced block ->
+    referencing blocks, within each module directory.
+
+    The index follows the traversal: `sync` moves it to the tree of a commit by re-parsing
+    only the Terraform files that differ from the tree it was at, so consecutive commits
+    cost their changed files, not the repository size (only the first sync of an empty
+    index parses the whole tree).
+    """
+
+    def __init__(self, repo_path: str, block_locator):
+        self.repo_path = repo_path
+        self.block_locator = block_locator
+        self.commit: Optional[str] = None
+        # path -> block_identifiers -> referenced block_identifiers
+        self.files: Dict[str, Dict[str, Set[str]]] = {}
+        # (directory, block_identifiers) -> referencing (path, block_identifiers)
+        self.referrers: Dict[Tuple[str, str], Set[Tuple[str, str]]] = {}
+        # (directory, block_identifiers) -> number of files defining it
+        self.defined = Counter()
+        self._repo = None
+
+    @property
+    def repo(self):
+        if self._repo is None:
+            import git
+            self._repo = git.Repo(self.repo_path)
+        return self._repo
+
+    def remove_file(self, path: str):
+        directory = os.path.dirname(path)
+        for identifiers, targets in self.files.pop(path, {}).items():
+            self.defined[(directory, identifiers)] -= 1
+            if not self.defined[(directory, identifiers)]:
+                del self.defined[(directory, identifiers)]
+            for target in targets:
+                referrers = self.referrers.get((directory, target))
+                if referrers is not None:
+                    referrers.discard((path, identifiers))
+                    if not referrers:
+                        del self.referrers[(directory, target)]
+
+    def set_file(self, path: str, source: str):
+        """
+        Replaces the references of a file by those of a new version of it.
+        """
+        self.remove_file(path)
+        try:
+            blocks = self.block_locator.parse_source(source).get("data", []) if source else []
+        except Exception as e:
+            print(f"Error extracting blocks: {e}")
+            blocks = []
+        references = block_references(source, blocks)
+        directory = os.path.dirname(path)
+        self.files[path] = references
+        for identifiers, targets in references.items():
+            self.defined[(directory, identifiers)] += 1
+            for target in targets:
+                self.referrers.setdefault((directory, target), set()).add((path, identifiers))
+
+    def sync(self, commit_hash: str):
+        """
+        Moves the index to the tree of a commit.
+        """
+        if self.commit == commit_hash:
+            return
+        tree = self.repo.commit(commit_hash).tree
+        if self.commit is None:
+            for item in tree.traverse():
+                if item.type == "blob" and item.path.endswith(".tf"):
+                    self.set_file(item.path, item.data_stream.read().decode("utf-8", errors="replace"))
+        else:
+            # a: tree the index is at, b: tree of the commit
+            for diff in self.repo.commit(self.commit).tree.diff(tree):
+                if diff.a_blob is not None and diff.a_path.endswith(".tf"):
+                    self.remove_file(diff.a_path)
+                if diff.b_blob is not None and diff.b_path.endswith(".tf"):
+                    self.set_file(diff.b_path, diff.b_blob.data_stream.read().decode("utf-8", errors="replace"))
+        self.commit = commit_hash
+
+    def resume_references(self, path: str, identifiers: str) -> dict:
+        directory = os.path.dirname(path)
+        referrers = self.referrers.get((directory, identifiers), ())
+        targets = self.files.get(path, {}).get(identifiers, ())
+        return {
+            # Number of blocks of the module referencing the block
+            "reference_fan_in": sum(1 for referrer in referrers if referrer != (path, identifiers)),
+            # Number of blocks of the module the block references
+            "reference_fan_out": sum(1 for target in targets if (directory, target) in self.defined)
+        }
+
+    @staticmethod
+    def get_headers():
+        return ["reference_fan_in", "reference_fan_out"]
+
+    def save(self, path: str):
+        save_pickle({key: getattr(self, key) for key in ("commit", "files", "referrers", "defined")}, path)
+
+    @classmethod
+    def load(cls, path: str, repo_path: str, block_locator) -> "ReferenceIndex":
+        index = cls(repo_path, block_locator)
+        for key, value in load_pickle(path).items():
+            setattr(index, key, value)
+        return index
@@ -0,0 +1,134 @@
+import logging
+import os
+import subprocess
+import threading
+from typing import List, Optional
+
+logger = logging.getLogger("TerraMetricsWorker")
+
+SERVER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TerraMetricsServer.java")
+
+
+class WorkerUnavailableError(subprocess.CalledProcessError):
+    """
+    The worker cannot serve requests: the JVM does not start, or it cannot survive the
+    System.exit of the TerraMetrics entry point (JDK 24+).
+    """
+
+
+class TerraMetricsWorker:
+    """
+    Long-lived JVM running TerraMetrics in-process (see TerraMetricsServer.java).
+
+    Each request is a list of TerraMetrics CLI arguments sent as one tab-separated
+    line on the worker's stdin; the worker answers with "OK" or "ERR <message>".
+    A worker that dies is restarted transparently on the next request, unless it
+    cannot be started or announced that exits are not trapped (see WorkerUnavailableError).
+    """
+
+    def __init__(self, jar_path: str, max_restarts: int = 3):
+        """
+        Args:
+            jar_path (str): Path to the TerraMetrics JAR file.
+            max_restarts (int): Consecutive restarts allowed for a single request.
+        """
+        self.jar_path = jar_path
+        self.max_restarts = max_restarts
+        self.command = [
+            "java",
+            "-Djava.security.manager=allow",
+            "-cp",
+            self.jar_path,
+            SERVER_SOURCE,
+            self.jar_path,
+        ]
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        # Whether the running JVM survives a System.exit of TerraMetrics
+        self.exits_trapped = True
+
+    def is_alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self):
+        """
+        Starts the JVM and waits until the TerraMetrics entry point is loaded.
+        """
+        self.stop()
+        logger.info(f"[CODE] Démarrage du worker TerraMetrics ({self.jar_path})...")
+        self._process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        status = self._process.stdout.readline().strip()
+        if not status.startswith("READY"):
+            returncode = self._process.poll()
+            self.stop()
+            raise subprocess.CalledProcessError(returncode if returncode is not None else -1, self.command)
+        self.exits_trapped = status == "READY"
+
+    def stop(self):
+        """
+        Shuts the JVM down (closing stdin lets the server loop end on its own).
+        """
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            if process.stdin:
+                process.stdin.close()
+            process.wait(timeout=5)
+        except Exception:
+            process.kill()
+            process.wait()
+        finally:
+            if process.stdout:
+                process.stdout.close()
+
+    def run(self, args: List[str]):
+        """
+        Runs TerraMetrics with the given CLI arguments inside the warm JVM.
+
+        Args:
+            args (List[str]): TerraMetrics arguments (e.g. ["--file", path, "-b", "--target", out]).
+
+        Raises:
+            WorkerUnavailableError: If the worker cannot start, or died without trapping exits.
+            subprocess.CalledProcessError: If TerraMetrics reports an error or the
+                worker keeps crashing on this request.
+        """
+        request = "\t".join(args) + "\n"
+        with self._lock:
+            for attempt in range(self.max_restarts + 1):
+                if not self.is_alive():
+                    try:
+                        self.start()
+                    except subprocess.CalledProcessError as e:
+                        if attempt == self.max_restarts:
+                            raise WorkerUnavailableError(e.returncode, e.cmd)
+                        continue
+                try:
+                    self._process.stdin.write(request)
+                    self._process.stdin.flush()
+                    status = self._process.stdout.readline()
+                except (BrokenPipeError, OSError):
+                    status = ""
+
+                if status.startswith("OK"):
+                    return
+                if status.startswith("ERR"):
+                    logger.error(f"TerraMetrics error: {status[3:].strip()}")
+                    raise subprocess.CalledProcessError(1, args)
+
+                # Empty status: the JVM died while handling the request.
+                self.stop()
+                if not self.exits_trapped:
+                    # Every request calling System.exit would end the JVM again
+                    raise WorkerUnavailableError(-1, args)
+                logger.warning("[CODE] Worker TerraMetrics arrêté, redémarrage...")
+
+        raise subprocess.CalledProcessError(-1, args)
@@ -1,6 +1,5 @@
 import os
 import sys
-import tempfile
 import argparse
 import csv
 import subprocess
@@ -15,12 +14,14 @@ try:
 except Exception as e:
     print(f"Warning: Failed to set safe.directory: {e}")
 
-from scripts.impacted_block_detection import ImpactedBlocks
-from scripts.process.process_metrics import ProcessMetrics
-from scripts.edits.similarity_change import SimilarityChange
-from scripts.process.lines_change.ImpactedLines import ImpactedLines
-from scripts.process.attr_terraform_change.attr_change import AttrChange
-from scripts.process.delta_metrics import DeltaMetrics
+from scripts.impacted_block_detection import ImpactedBlocks, get_default_block_locator
+from scripts.block_matching import BlockMatcher
+from scripts.codes.block_cache import BlockCache
+from scripts.feature_families import FEATURE_FAMILIES, OPTIONAL_FEATURE_FAMILIES, CommitFeatures, parse_features
+from scripts.utility.source_lines import SourceLines
+from scripts.process.history_aggregates import HistoryAggregates
+from scripts.process.history_store import HistoryStore
+from scripts.process.trivial_change import TRIVIAL_MODES, TrivialChange, is_trivial_row
 from scripts.utility.commit_filters import is_undesired_commit, beSafeFromSpecialCommit
 
 # Global context for history (can be passed around or kept global for full run)
@@ -33,6 +34,11 @@ def get_author_experience(author_commits_count, author_name):
 def update_author_experience(author_commits_count, author_name):
     author_commits_count[author_name] = author_commits_count.get(author_name, 0) + 1
 
+
+# Feature families replaying the history rows, not covered by the history aggregates
+HISTORY_ROW_FAMILIES = ("defect_neighbors", "co_change", "process_windows")
+
+
 def load_history_from_csv(csv_path):
     """
     Load previous contributions and author experience from existing metrics.csv.
@@ -41,9 +47,9 @@ def load_history_from_csv(csv_path):
         csv_path: Path to the historical metrics CSV file
         
     Returns:
-        tuple: (previous_contributions list, author_commits_count dict)
+        tuple: (previous_contributions HistoryStore of compact records, author_commits_count dict)
     """
-    previous_contributions = []
+    previous_contributions = HistoryStore(compact=True)
     author_commits_count = {}
     
     try:
@@ -59,7 +65,9 @@ def load_history_from_csv(csv_path):
                     except:
                         pass  # Keep as string if conversion fails
                 
-                previous_contributions.append(row)
+                # Short trivial-change rows count for author experience, not in the block history
+                if not is_trivial_row(row):
+                    previous_contributions.append(row)
                 
                 # Track author experience (count unique commits per author)
                 author = row.get('author')
@@ -74,12 +82,200 @@ def load_history_from_csv(csv_path):
         
     except Exception as e:
         print(f"Warning: Could not load history from {csv_path}: {e}")
-        return [], {}
+        return HistoryStore(compact=True), {}
     
     return previous_contributions, author_commits_count
 
 
-def process_commit(commit, previous_contributions, author_commits_count):
+def build_block_locator(batch_window=0, cache_dir=None, cache_size_mb=512, engine="jar"):
+    """
+    Configure the block locator for this run.
+
+    With the JAR engine, returns None when neither batching nor caching is requested,
+    leaving ImpactedBlocks to pick the default extractor itself. The parse cache is
+    attached the same way to both engines (their entries are told apart by parser version).
+    """
+    if engine == "jar" and not batch_window and not cache_dir:
+        return None
+    block_locator = get_default_block_locator(engine)
+    if cache_dir:
+        block_locator.cache = BlockCache(cache_dir, max_size_mb=cache_size_mb)
+    return block_locator
+
+
+def load_change_index(features, index_path=None, previous_contributions=()):
+    """
+    Index of past block changes for the defect_neighbors feature family (None when it is disabled).
+
+    The index is loaded from `index_path` when it exists, with its defect labels refreshed
+    from the labelled history rows; otherwise it starts empty.
+    """
+    if "defect_neighbors" not in features:
+        return None
+    from scripts.process.defect_neighbors import ChangeIndex
+    if index_path and os.path.exists(index_path):
+        change_index = ChangeIndex.load(index_path)
+        change_index.update_labels(previous_contributions)
+        print(f"Loaded {len(change_index)} past changes from {index_path}")
+        return change_index
+    return ChangeIndex()
+
+
+def load_co_change_graph(features, graph_path=None, previous_contributions=()):
+    """
+    Co-change graph of the past commits for the co_change feature family (None when it is disabled).
+
+    The graph is loaded from `graph_path` when it exists, completed with the history commits
+    it misses and its defect counts refreshed from the labelled history rows; otherwise it
+    is built from the history rows.
+    """
+    if "co_change" not in features:
+        return None
+    from scripts.process.co_change import CoChangeGraph
+    if graph_path and os.path.exists(graph_path):
+        co_change_graph = CoChangeGraph.load(graph_path)
+        print(f"Loaded {len(co_change_graph)} blocks of the co-change graph from {graph_path}")
+    else:
+        co_change_graph = CoChangeGraph()
+    co_change_graph.add_rows(previous_contributions)
+    co_change_graph.update_labels(previous_contributions)
+    return co_change_graph
+
+
+def load_reference_index(features, repo_path, block_locator=None, index_path=None, engine="jar"):
+    """
+    Index of the references between the blocks of the repository for the references feature
+    family (None when it is disabled).
+
+    The index is loaded from `index_path` when it exists and moved from its saved commit to the
+    commits processed by re-parsing the files that differ; otherwise the first commit parses
+    the whole tree.
+    """
+    if "references" not in features:
+        return None
+    from scripts.codes.reference_index import ReferenceIndex
+    block_locator = block_locator if block_locator is not None else get_default_block_locator(engine)
+    if index_path and os.path.exists(index_path):
+        reference_index = ReferenceIndex.load(index_path, repo_path, block_locator)
+        print(f"Loaded the references of {len(reference_index.files)} files from {index_path}")
+        return reference_index
+    return ReferenceIndex(repo_path, block_locator)
+
+
+def load_process_windows(features, windows=None, previous_contributions=()):
+    """
+    Sliding windows of the recent history for the process_windows feature family (None when
+    it is disabled), replayed from the history rows.
+    """
+    if "process_windows" not in features:
+        return None
+    from scripts.process.window_metrics import ProcessWindows
+    return ProcessWindows.from_rows(previous_contributions, windows)
+
+
+def iterate_commit_windows(commits, window_size):
+    """
+    Group traversed commits into consecutive windows of `window_size` commits (1 when 0).
+    """
+    window = []
+    for commit in commits:
+        window.append(commit)
+        if len(window) >= max(window_size, 1):
+            yield window
+            window = []
+    if window:
+        yield window
+
+
+def prefetch_blocks(block_locator, commits):
+    """
+    Parse every before/after version of the Terraform files of `commits` in one
+    TerraMetrics batch, so ImpactedBlocks finds them already parsed.
+    """
+    sources = []
+    for commit in commits:
+        if not beSafeFromSpecialCommit(commit.msg):
+            continue
+        for mod in commit.modified_files:
+            if mod.filename.endswith('.tf'):
+                sources.extend([mod.source_code, mod.source_code_before])
+    try:
+        block_locator.prefetch(sources)
+    except Exception as e:
+        print(f"Warning: Batch parsing failed, falling back to per-file parsing: {e}", file=sys.stderr)
+
+
+# Columns of the short rows emitted for trivial blocks (flag mode)
+TRIVIAL_ROW_KEYS = ["file", "author", "commit", "exp", "date", "msg",
+                    "block_identifiers", "block_name", "start_block", "end_block"]
+
+
+def get_contribution_headers(contributions, complete_only=False):
+    """
+    CSV headers: keys of the first complete row (short trivial-change rows only carry the
+    commit and block identification). Falls back to the first row unless complete_only.
+    """
+    for contribution in contributions:
+        if not is_trivial_row(contribution):
+            return list(contribution.keys())
+    if complete_only or not contributions:
+        return None
+    return list(contributions[0].keys())
+
+
+def write_contributions(output_file, headers, contributions, file_exists):
+    """
+    Appends contributions to the CSV, writing the header first if the file is new.
+
+    Returns:
+        bool: True once the file (and its header) exists.
+    """
+    with open(output_file, mode='a', newline='', encoding='utf-8') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=headers, extrasaction='ignore')
+        if not file_exists:
+            writer.writeheader()
+            file_exists = True
+        for contribution in contributions:
+            writer.writerow(contribution)
+    return file_exists
+
+
+def match_moved_blocks(file_changes, block_matcher):
+    """
+    Pairs the impacted blocks without a before version with the blocks removed from the
+    files of the same commit (renamed in place, or moved to another file).
+
+    Args:
+        file_changes: (mod, ImpactedBlocks, impacted blocks, BlockFeatures) of the modified files.
+        block_matcher: BlockMatcher pairing the blocks by similarity.
+
+    Returns:
+        dict: (file index, block index) of an impacted block -> (block before change,
+        BlockFeatures of the file it comes from).
+    """
+    removed = []
+    removedBlocks = {}
+    added = []
+    for fileIndex, (mod, impactedBlockInstance, impactedBlocks, blockFeatures) in enumerate(file_changes):
+        if impactedBlockInstance is None:
+            continue
+        for blockIndex, block in enumerate(impactedBlockInstance.get_removed_blocks()):
+            removedBlocks[(fileIndex, blockIndex)] = (block, blockFeatures)
+            removed.append(((fileIndex, blockIndex), block.get("block"),
+                            blockFeatures.lines_before.slice(block["start_block"], block["end_block"])))
+        for blockIndex, block in enumerate(impactedBlocks or []):
+            if impactedBlockInstance.get_block(block, impactedBlockInstance.blocks_before_change) is None:
+                added.append(((fileIndex, blockIndex), block.get("block"),
+                              blockFeatures.lines_after.slice(block["start_block"], block["end_block"])))
+    if not removed or not added:
+        return {}
+    return {key: removedBlocks[removedKey] for key, (removedKey, _) in block_matcher.match(removed, added).items()}
+
+
+def process_commit(commit, previous_contributions, author_commits_count, block_locator=None, incremental=False,
+                   max_distance=None, distance_unit="char", trivial_mode="keep", features=None,
+                   block_matcher=None, change_index=None, co_change_graph=None, reference_index=None,
+                   process_windows=None):
     """
     Process a single commit to calculate defect metrics for all modified Terraform files.
     
@@ -87,6 +283,23 @@ def process_commit(commit, previous_contributions, author_commits_count):
         commit: pydriller.Commit object.
         previous_contributions: List of prior contribution dicts (for context-aware metrics).
         author_commits_count: Dict of author experience stats.
+        block_locator: Extractor used to parse file versions into blocks (shared TerraMetrics JAR by default).
+        incremental: Derive one version of each file from the other and the diff, re-parsing only changed regions.
+        max_distance: Cap of the block edit distance (None for the exact distance).
+        distance_unit: Unit of the block edit distance, "char", "line" or "token".
+        trivial_mode: Formatting/comment/description-only changes are computed as usual ("keep"),
+            dropped ("skip") or reported as short rows with trivial_change = 1 ("flag").
+        features: Feature families to compute (see scripts.feature_families); None for all of them.
+        block_matcher: BlockMatcher pairing new blocks with the blocks renamed or moved in the commit
+            (None: a block without a homonym in the before version of its file is a new block).
+        change_index: ChangeIndex of the past block changes, searched and updated by the
+            defect_neighbors feature family.
+        co_change_graph: CoChangeGraph of the past commits, read and updated by the co_change
+            feature family.
+        reference_index: ReferenceIndex of the repository, moved to the commit by the references
+            feature family (None: a new index, parsing the whole tree of the commit).
+        process_windows: ProcessWindows of the recent history, read and updated by the
+            process_windows feature family.
         
     Returns:
         List[dict]: A list of contribution dictionaries (one per impacted block) calculated for this commit.
@@ -110,34 +323,64 @@ def process_commit(commit, previous_contributions, author_commits_count):
     update_author_experience(author_commits_count, author)
 
     cleanCommitMessage = commit.msg.strip()
-
+    if reference_index is None and "references" in parse_features(features):
+        reference_index = load_reference_index(parse_features(features), commit.project_path, block_locator)
+    commitFeatures = CommitFeatures(features, previous_contributions, max_distance, distance_unit, change_index,
+                                    co_change_graph, reference_index, process_windows)
+
+    # Modified Terraform files of the commit: (mod, impactedBlockInstance, impactedBlocks, blockFeatures),
+    # with only the mod for the trivial files to flag
+    fileChanges = []
     for mod in commit.modified_files:
         if not mod.filename.endswith('.tf'):
             continue
 
-        # Create temp files for BlockIdentificator (used by SimilarityChange)
-        pathAfterChange = None
-        pathBeforeChange = None
-
         try:
-            # Write temp file for After content
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.tf', delete=False, encoding='utf-8') as f_after:
-                f_after.write(mod.source_code if mod.source_code else "")
-                pathAfterChange = f_after.name
+            # Trivial files are recognized from token fingerprints, before any parsing
+            if trivial_mode != "keep" and TrivialChange(mod).is_trivial_file():
+                if trivial_mode == "flag":
+                    fileChanges.append((mod, None, None, None))
+                continue
+
+            # Line index of each version, to slice block texts in memory (used by SimilarityChange)
+            linesAfterChange = SourceLines(mod.source_code)
+            linesBeforeChange = SourceLines(mod.source_code_before)
+
+            impactedBlockInstance = ImpactedBlocks(mod, file_ext_to_parse=['tf'], block_locator=block_locator,
+                                                   incremental=incremental)
+            impactedBlocks = impactedBlockInstance.identify_impacted_blocks_in_a_file(mod.filename)
+            blockFeatures = commitFeatures.for_file(mod, impactedBlockInstance.parsed_diff, linesAfterChange,
+                                                    linesBeforeChange)
+            fileChanges.append((mod, impactedBlockInstance, impactedBlocks, blockFeatures))
 
-            # Write temp file for Before content
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.tf', delete=False, encoding='utf-8') as f_before:
-                f_before.write(mod.source_code_before if mod.source_code_before else "")
-                pathBeforeChange = f_before.name
+        except Exception as e:
+            print(f"Error processing {mod.filename}: {e}", file=sys.stderr)
+            import traceback
+            traceback.print_exc()
+            pass
 
-            impactedBlockInstance = ImpactedBlocks(mod, file_ext_to_parse=['tf'])
-            impactedBlocks = impactedBlockInstance.identify_impacted_blocks_in_a_file(mod.filename)
+    # Renamed blocks and blocks moved between files of the commit, paired by similarity
+    movedBlocks = match_moved_blocks(fileChanges, block_matcher) if block_matcher is not None else {}
+
+    for fileIndex, (mod, impactedBlockInstance, impactedBlocks, blockFeatures) in enumerate(fileChanges):
+        try:
+            if impactedBlockInstance is None:
+                contributions.append({
+                    "file": mod.filename,
+                    "author": author,
+                    "commit": commit.hash,
+                    "exp": exp,
+                    "date": commit.committer_date,
+                    "msg": cleanCommitMessage,
+                    "trivial_change": 1
+                })
+                continue
 
             if impactedBlocks:
                 print(f"Impacted blocks found for {mod.filename}: {len(impactedBlocks)} blocks")
                 for b in impactedBlocks:
                     print(f" - Block: {b.get('block_name')} ({b.get('start_block')}-{b.get('end_block')})")
-                for block in impactedBlocks:
+                for blockIndex, block in enumerate(impactedBlocks):
                     # 0. Contribution
                     contribution = {
                         "file": mod.filename,
@@ -151,29 +394,30 @@ def process_commit(commit, previous_contributions, author_commits_count):
                     # Add block details (contains the huge list of features)
                     contribution.update(block)
 
-                    # Get block before change
+                    # Get block before change (from the same file, or the block it was renamed/moved from)
                     blockBeforeChange = impactedBlockInstance.get_block(block,
                                                                         impactedBlockInstance.blocks_before_change)
-
-                    # 4. Process Metrics
-                    process = ProcessMetrics(contribution, previous_contributions)
-                    contribution.update(process.resume_process_metrics())
-
-                    # 3. Similarity Change
-                    similarityChange = SimilarityChange(block, pathAfterChange, blockBeforeChange, pathBeforeChange)
-                    contribution.update(similarityChange.resume_similarity_change())
-
-                    # 1. Impacted Lines
-                    impactedLines = ImpactedLines(mod, block, blockBeforeChange)
-                    contribution.update(impactedLines.resume_changed_lines())
-
-                    # 2. Attr Change
-                    attrChange = AttrChange(block, impactedLines.additions, impactedLines.deletions)
-                    contribution.update(attrChange.resume_changed_attr())
-
-                    # 5. Delta Metrics
-                    delta = DeltaMetrics(block, blockBeforeChange)
-                    contribution.update(delta.compute_delta_metrics())
+                    sourceFeatures = blockFeatures
+                    if blockBeforeChange is None and (fileIndex, blockIndex) in movedBlocks:
+                        blockBeforeChange, sourceFeatures = movedBlocks[(fileIndex, blockIndex)]
+
+                    # Formatting/comment/description-only change of this block
+                    if trivial_mode != "keep" and blockBeforeChange is not None and TrivialChange.is_trivial_block(
+                            sourceFeatures.lines_before.slice(blockBeforeChange["start_block"],
+                                                              blockBeforeChange["end_block"]),
+                            blockFeatures.lines_after.slice(block["start_block"], block["end_block"])):
+                        if trivial_mode == "flag":
+                            shortContribution = {key: contribution[key] for key in TRIVIAL_ROW_KEYS
+                                                 if key in contribution}
+                            shortContribution["trivial_change"] = 1
+                            contributions.append(shortContribution)
+                        continue
+
+                    # Enabled feature families: process, similarity, impacted lines, attr change, delta
+                    contribution.update(blockFeatures.compute(contribution, block, blockBeforeChange, sourceFeatures))
+
+                    if trivial_mode == "flag":
+                        contribution["trivial_change"] = 0
                     
                     contributions.append(contribution)
 
@@ -182,17 +426,19 @@ def process_commit(commit, previous_contributions, author_commits_count):
             import traceback
             traceback.print_exc()
             pass
-        finally:
-            if pathAfterChange and os.path.exists(pathAfterChange):
-                os.remove(pathAfterChange)
-            if pathBeforeChange and os.path.exists(pathBeforeChange):
-                os.remove(pathBeforeChange)
+
+    # Features computed once for all the blocks of the commit (e.g. batched cosine similarity)
+    commitFeatures.finish()
     
     return contributions
 
     return contributions
 
-def collect_metrics_jit(repo_path, target_commit, history_file=None, output_file="metrics.csv"):
+def collect_metrics_jit(repo_path, target_commit, history_file=None, output_file="metrics.csv", batch_window=0,
+                        cache_dir=None, cache_size_mb=512, engine="jar", incremental=False,
+                        max_distance=None, distance_unit="char", trivial_mode="keep", features=None,
+                        move_threshold=None, neighbors_index=None, cochange_graph=None, references_index=None,
+                        windows=None, history_state=None):
     """
     Collect metrics for a specific commit (Just-In-Time).
     
@@ -201,8 +447,32 @@ def collect_metrics_jit(repo_path, target_commit, history_file=None, output_file
         target_commit: Commit hash to analyze
         history_file: Optional path to previous metrics.csv for historical context
         output_file: Path to output current metrics CSV
+        batch_window: If > 0, parse all modified Terraform files of the commit in one TerraMetrics batch
+        cache_dir: Optional directory of the on-disk parse cache (kept between runs)
+        cache_size_mb: Size limit of the parse cache
+        engine: Block parsing engine, "jar" (TerraMetrics) or "python" (in-process, no JVM)
+        incremental: Re-parse only the regions touched by each diff (see ImpactedBlocks)
+        max_distance: Cap of the block edit distance (None for the exact distance)
+        distance_unit: Unit of the block edit distance, "char", "line" or "token"
+        trivial_mode: "keep", "skip" or "flag" formatting/comment/description-only changes
+        features: Feature families to compute (None for all of them)
+        move_threshold: Pair new blocks with the blocks renamed or moved in the same commit when
+            their token shingles are at least this similar (None disables the matching)
+        neighbors_index: Optional path of the index of past block changes used by the defect_neighbors
+            family; loaded if it exists, its defect labels refreshed from the history, and saved back
+        cochange_graph: Optional path of the co-change graph used by the co_change family; loaded if
+            it exists (otherwise built from the history), completed with the history, and saved back
+        references_index: Optional path of the block reference index used by the references family;
+            loaded if it exists (otherwise the whole tree of the commit is parsed), and saved back
+        windows: Window sizes of the process_windows family ("90d": last 90 days, "50c": last
+            50 commits); None for the defaults
+        history_state: Optional path of the aggregates of the history (see HistoryAggregates);
+            loaded instead of history_file for the process metrics if it exists, and saved back
+            with the rows of the commit
     """
     print(f"Starting JIT metrics collection on: {repo_path} for commit {target_commit}")
+    features = parse_features(features)
+    block_matcher = BlockMatcher(move_threshold) if move_threshold is not None else None
     
     # File naming convention:
     # - metrics.csv: Current run metrics only (or custom name)
@@ -211,31 +481,80 @@ def collect_metrics_jit(repo_path, target_commit, history_file=None, output_file
     history_metrics_file = "metrics_history.csv"
     
     # JIT context - can be hydrated from history file
-    previous_contributions = []
+    previous_contributions = HistoryStore(compact=True)
     author_commits_count = {}
+    state_loaded = bool(history_state) and os.path.exists(history_state)
     
-    # Load historical context if provided
-    if history_file and os.path.exists(history_file):
+    # Load historical context if provided, from the saved aggregates rather than the rows if possible
+    if state_loaded:
+        print(f"Loading history aggregates from: {history_state}")
+        aggregates = HistoryAggregates.load(history_state)
+        previous_contributions = HistoryStore(aggregates=aggregates)
+        author_commits_count = dict(aggregates.author_commits)
+        print(f"Loaded {len(aggregates.commits)} previous commits")
+        print(f"Loaded {len(author_commits_count)} authors")
+    elif history_file and os.path.exists(history_file):
         print(f"Loading historical context from: {history_file}")
         previous_contributions, author_commits_count = load_history_from_csv(history_file)
         print(f"Loaded {len(previous_contributions)} previous contributions")
         print(f"Loaded {len(author_commits_count)} authors")
 
+    # The aggregates stand for the rows in the process metrics only: the families replaying
+    # the history rows still read them from the history file
+    history_rows = previous_contributions
+    row_families = [family for family in HISTORY_ROW_FAMILIES if family in features]
+    if state_loaded and row_families:
+        if not (history_file and os.path.exists(history_file)):
+            raise ValueError(f"The {', '.join(row_families)} feature families read the history rows: "
+                             f"--history-state needs --history with them")
+        print(f"Loading the history rows of {', '.join(row_families)} from: {history_file}")
+        history_rows, _ = load_history_from_csv(history_file)
+
+    change_index = load_change_index(features, neighbors_index, history_rows)
+    co_change_graph = load_co_change_graph(features, cochange_graph, history_rows)
+    process_windows = load_process_windows(features, windows, history_rows)
+
     # Process specific commit
     repo_mining = Repository(repo_path, single=target_commit)
     
     headers = None
     new_contributions_list = []
     
+    block_locator = build_block_locator(batch_window, cache_dir, cache_size_mb, engine)
+    reference_index = load_reference_index(features, repo_path, block_locator, references_index, engine)
+
     for commit in repo_mining.traverse_commits():
-        new_contributions = process_commit(commit, previous_contributions, author_commits_count)
+        if batch_window:
+            prefetch_blocks(block_locator, [commit])
+        new_contributions = process_commit(commit, previous_contributions, author_commits_count, block_locator,
+                                           incremental, max_distance, distance_unit, trivial_mode, features,
+                                           block_matcher, change_index, co_change_graph, reference_index,
+                                           process_windows)
         
         if new_contributions:
-            if headers is None:
-                headers = list(new_contributions[0].keys())
-                print(f"Dynamic Headers determined ({len(headers)} columns)")
             new_contributions_list.extend(new_contributions)
+            if headers is None:
+                headers = get_contribution_headers(new_contributions_list, complete_only=True)
+                if headers is not None:
+                    print(f"Dynamic Headers determined ({len(headers)} columns)")
     
+    if change_index is not None and neighbors_index:
+        change_index.save(neighbors_index)
+    if co_change_graph is not None and cochange_graph:
+        co_change_graph.save(cochange_graph)
+    if reference_index is not None and references_index:
+        reference_index.save(references_index)
+    if history_state:
+        aggregates = previous_contributions.aggregates
+        new_rows = [c for c in new_contributions_list if not is_trivial_row(c)]
+        # A commit already in the aggregates (re-run) is not added twice
+        if not any(c["commit"] in aggregates.commits for c in new_rows):
+            aggregates.add_rows(new_rows)
+        aggregates.save(history_state)
+
+    if new_contributions_list and headers is None:
+        headers = get_contribution_headers(new_contributions_list)
+
     # Write current metrics to metrics.csv
     if new_contributions_list:
         with open(current_metrics_file, mode='w', newline='', encoding='utf-8') as csvfile:
@@ -295,48 +614,130 @@ def merge_metrics_files(history_file, new_file, output_file):
     print(f"Merged: {len(df_history)} history + {len(df_new)} new = {len(df_combined)} total rows")
 
 
-def collect_metrics_full(repo_path, output_file="metrics.csv"):
+def collect_metrics_full(repo_path, output_file="metrics.csv", batch_window=0, cache_dir=None, cache_size_mb=512,
+                         engine="jar", incremental=False, max_distance=None, distance_unit="char",
+                         trivial_mode="keep", features=None, move_threshold=None, neighbors_index=None,
+                         cochange_graph=None, references_index=None, windows=None, history_state=None,
+                         memory_limit_mb=None, spill_dir=None):
     """
     Collect metrics for the entire repository history.
+
+    Args:
+        repo_path: Path to the repository
+        output_file: Path to output CSV
+        batch_window: If > 0, parse the Terraform files of this many consecutive commits
+            in one TerraMetrics batch
+        cache_dir: Optional directory of the on-disk parse cache (kept between runs)
+        cache_size_mb: Size limit of the parse cache
+        engine: Block parsing engine, "jar" (TerraMetrics) or "python" (in-process, no JVM)
+        incremental: Re-parse only the regions touched by each diff (see ImpactedBlocks)
+        max_distance: Cap of the block edit distance (None for the exact distance)
+        distance_unit: Unit of the block edit distance, "char", "line" or "token"
+        trivial_mode: "keep", "skip" or "flag" formatting/comment/description-only changes
+        features: Feature families to compute (None for all of them)
+        move_threshold: Pair new blocks with the blocks renamed or moved in the same commit when
+            their token shingles are at least this similar (None disables the matching)
+        neighbors_index: Optional path where the index of past block changes built by the
+            defect_neighbors family is saved (for later JIT runs)
+        cochange_graph: Optional path where the co-change graph built by the co_change family
+            is saved (for later JIT runs)
+        references_index: Optional path where the block reference index of the references family
+            is saved, at the tree of the last commit processed
+        windows: Window sizes of the process_windows family ("90d": last 90 days, "50c": last
+            50 commits); None for the defaults
+        history_state: Optional path where the aggregates of the history are saved (for later
+            JIT runs)
+        memory_limit_mb: Optional memory ceiling of the history in MB; above it, the state of the
+            history growing with its rows is spilled to an on-disk SQLite store
+        spill_dir: Directory of the spill file (default: the system temporary directory)
     """
     print(f"Starting FULL metrics collection on: {repo_path}")
+    features = parse_features(features)
+    block_matcher = BlockMatcher(move_threshold) if move_threshold is not None else None
     
     # Remove existing file for full run
     if os.path.exists(output_file):
         os.remove(output_file)
     
-    previous_contributions = []
+    # Aggregates of the history for the process metrics; the rows are not kept, as the optional
+    # families keep their own state (index, graph, windows) across the commits of the run
+    previous_contributions = HistoryStore(keep_rows=False, memory_limit_mb=memory_limit_mb, spill_dir=spill_dir)
     author_commits_count = {}
     headers = None
     file_exists = False
+    pending_contributions = []
 
     repo_mining = Repository(repo_path, order='reverse')
+    # Full runs rebuild the index of past changes and the co-change graph from scratch
+    change_index = load_change_index(features)
+    co_change_graph = load_co_change_graph(features)
+    process_windows = load_process_windows(features, windows)
+    block_locator = build_block_locator(batch_window, cache_dir, cache_size_mb, engine)
+    reference_index = load_reference_index(features, repo_path, block_locator, engine=engine)
     
-    for commit in repo_mining.traverse_commits():
-        new_contributions = process_commit(commit, previous_contributions, author_commits_count)
-        
-        if new_contributions:
-            if headers is None:
-                headers = list(new_contributions[0].keys())
-                print(f"Dynamic Headers determined ({len(headers)} columns)")
-            
-            with open(output_file, mode='a', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=headers, extrasaction='ignore')
-                if not file_exists:
-                    writer.writeheader()
-                    file_exists = True
-                for contribution in new_contributions:
-                    writer.writerow(contribution)
-            
-            previous_contributions.extend(new_contributions)
+    # The spill file of the history is deleted whatever happens
+    try:
+        for commits in iterate_commit_windows(repo_mining.traverse_commits(), batch_window):
+            if batch_window:
+                prefetch_blocks(block_locator, commits)
+
+            for commit in commits:
+                new_contributions = process_commit(commit, previous_contributions, author_commits_count, block_locator,
+                                                   incremental, max_distance, distance_unit, trivial_mode, features,
+                                                   block_matcher, change_index, co_change_graph, reference_index,
+                                                   process_windows)
+
+                if new_contributions:
+                    # Short trivial rows wait for the first complete row, which determines the headers
+                    pending_contributions.extend(new_contributions)
+                    if headers is None:
+                        headers = get_contribution_headers(pending_contributions, complete_only=True)
+                        if headers is not None:
+                            print(f"Dynamic Headers determined ({len(headers)} columns)")
+
+                    if headers is not None:
+                        file_exists = write_contributions(output_file, headers, pending_contributions, file_exists)
+                        pending_contributions = []
+
+                    previous_contributions.extend(c for c in new_contributions if not is_trivial_row(c))
+
+        if pending_contributions:
+            headers = get_contribution_headers(pending_contributions)
+            write_contributions(output_file, headers, pending_contributions, file_exists)
+
+        if change_index is not None and neighbors_index:
+            change_index.save(neighbors_index)
+        if co_change_graph is not None and cochange_graph:
+            co_change_graph.save(cochange_graph)
+        if reference_index is not None and references_index:
+            reference_index.save(references_index)
+        if history_state:
+            previous_contributions.aggregates.save(history_state)
+    finally:
+        previous_contributions.close()
             
     print(f"Full Metrics collection complete. Output saved to {output_file}")
 
-def collect_metrics(repo_path, target_commit=None, history_file=None, output_file="metrics.csv"):
+def collect_metrics(repo_path, target_commit=None, history_file=None, output_file="metrics.csv", batch_window=0,
+                    cache_dir=None, cache_size_mb=512, engine="jar", incremental=False,
+                    max_distance=None, distance_unit="char", trivial_mode="keep", features=None,
+                    move_threshold=None, neighbors_index=None, cochange_graph=None, references_index=None,
+                    windows=None, history_state=None, memory_limit_mb=None, spill_dir=None):
     if target_commit:
-        collect_metrics_jit(repo_path, target_commit, history_file, output_file)
+        collect_metrics_jit(repo_path, target_commit, history_file, output_file, batch_window=batch_window,
+                            cache_dir=cache_dir, cache_size_mb=cache_size_mb, engine=engine, incremental=incremental,
+                            max_distance=max_distance, distance_unit=distance_unit, trivial_mode=trivial_mode,
+                            features=features, move_threshold=move_threshold,
+                            neighbors_index=neighbors_index, cochange_graph=cochange_graph,
+                            references_index=references_index, windows=windows, history_state=history_state)
     else:
-        collect_metrics_full(repo_path, output_file)
+        collect_metrics_full(repo_path, output_file, batch_window=batch_window,
+                             cache_dir=cache_dir, cache_size_mb=cache_size_mb, engine=engine, incremental=incremental,
+                             max_distance=max_distance, distance_unit=distance_unit, trivial_mode=trivial_mode,
+                             features=features, move_threshold=move_threshold,
+                             neighbors_index=neighbors_index, cochange_graph=cochange_graph,
+                             references_index=references_index, windows=windows, history_state=history_state,
+                             memory_limit_mb=memory_limit_mb, spill_dir=spill_dir)
 
 def main():
     """Entry point for console script."""
@@ -345,9 +746,65 @@ def main():
     parser.add_argument("--commit", type=str, help="Specific commit hash to process (JIT mode)")
     parser.add_argument("--history", type=str, help="Path to previous metrics.csv for historical context (JIT mode only)")
     parser.add_argument("--output", type=str, default="metrics.csv", help="Path to output CSV file")
+    parser.add_argument("--batch-window", type=int, default=0,
+                        help="Parse the Terraform files of N consecutive commits in one TerraMetrics batch (0 disables batching)")
+    parser.add_argument("--cache-dir", type=str, default=os.environ.get("TF_METRICS_CACHE_DIR"),
+                        help="Directory of the on-disk parse cache, reusable between runs (default: $TF_METRICS_CACHE_DIR)")
+    parser.add_argument("--cache-size-mb", type=float, default=512, help="Size limit of the parse cache in MB")
+    parser.add_argument("--engine", choices=["jar", "python"], default="jar",
+                        help="Block parsing engine: TerraMetrics JAR or in-process Python locator (no Java needed)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Re-parse only the regions touched by each diff, shifting the other blocks")
+    parser.add_argument("--max-edit-distance", type=int, default=None,
+                        help="Cap of the block edit distance; larger distances are reported as the cap")
+    parser.add_argument("--distance-unit", choices=["char", "line", "token"], default="char",
+                        help="Unit of the block edit distance (line/token add their own column name)")
+    parser.add_argument("--trivial-changes", choices=TRIVIAL_MODES, default="keep",
+                        help="Formatting/comment/description-only changes: compute them (keep), drop them (skip) "
+                             "or emit short rows with trivial_change=1 (flag). With skip and flag, trivial changes "
+                             "stay out of the history, so the history-based metrics of later rows (process, "
+                             f"{', '.join(HISTORY_ROW_FAMILIES)}) differ from keep")
+    parser.add_argument("--features", type=str, default="all",
+                        help=f"Comma-separated feature families to compute ({', '.join(FEATURE_FAMILIES)}, "
+                             f"optional: {', '.join(OPTIONAL_FEATURE_FAMILIES)}); default: all")
+    parser.add_argument("--match-moved-blocks", type=float, nargs="?", const=0.5, default=None, metavar="THRESHOLD",
+                        help="Pair new blocks with the blocks renamed or moved between files in the same commit "
+                             "(MinHash LSH over token shingles, Jaccard similarity >= THRESHOLD, default 0.5)")
+    parser.add_argument("--neighbors-index", type=str, default=None,
+                        help="File of the index of past block changes used by the defect_neighbors family "
+                             "(saved by full runs, loaded and updated by JIT runs)")
+    parser.add_argument("--cochange-graph", type=str, default=None,
+                        help="File of the block co-change graph used by the co_change family "
+                             "(saved by full runs, loaded and updated by JIT runs instead of rebuilt from --history)")
+    parser.add_argument("--references-index", type=str, default=None,
+                        help="File of the block reference index used by the references family "
+                             "(saved at the last commit processed; JIT runs load it instead of parsing the whole tree)")
+    parser.add_argument("--process-windows", type=str, default=None,
+                        help="Comma-separated windows of the process_windows family: Nd for the last N days, "
+                             "Kc for the last K commits (default: 30d,90d)")
+    parser.add_argument("--history-state", type=str, default=None,
+                        help="File of the per-block and per-author aggregates of the history (saved by full runs, "
+                             "loaded by JIT runs instead of --history for the process metrics, and updated); "
+                             f"{', '.join(HISTORY_ROW_FAMILIES)} still read the --history rows")
+    parser.add_argument("--memory-limit-mb", type=float, default=None,
+                        help="Memory ceiling of the history state growing with its rows in full runs (which do "
+                             "not keep the rows themselves); above it, the state spills to an on-disk SQLite store "
+                             "read transparently, with slower lookups. Per-block and per-author counts and interned "
+                             "names stay in memory and still grow with the distinct blocks and authors "
+                             "(default: no ceiling)")
+    parser.add_argument("--spill-dir", type=str, default=None,
+                        help="Directory of the history spill file (default: the system temporary directory)")
     
     args = parser.parse_args()
-    collect_metrics(args.repo_path, args.commit, args.history, args.output)
+    collect_metrics(args.repo_path, args.commit, args.history, args.output, batch_window=args.batch_window,
+                    cache_dir=args.cache_dir, cache_size_mb=args.cache_size_mb, engine=args.engine,
+                    incremental=args.incremental, max_distance=args.max_edit_distance,
+                    distance_unit=args.distance_unit, trivial_mode=args.trivial_changes,
+                    features=args.features, move_threshold=args.match_moved_blocks,
+                    neighbors_index=args.neighbors_index, cochange_graph=args.cochange_graph,
+                    references_index=args.references_index, windows=args.process_windows,
+                    history_state=args.history_state, memory_limit_mb=args.memory_limit_mb,
+                    spill_dir=args.spill_dir)
 
 if __name__ == "__main__":
     main()
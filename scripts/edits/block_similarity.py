@@ -0,0 +1,93 @@
+from difflib import SequenceMatcher
+from typing import List, Optional
+
+import jellyfish
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from scripts.codes.hcl_tokenizer import tokenize
+
+SIMILARITY_MEASURES = ["cosine", "jaro", "jaro_winkler", "ratcliff_obershelp"]
+
+
+def normalize_block(text: str) -> str:
+    """
+    Block text without comments and whitespace: its HCL tokens separated by single spaces.
+    """
+    return " ".join(token.value for token in tokenize(text or "") if token.kind != "NEWLINE")
+
+
+class BlockSimilarity:
+    """
+    Similarity measures between the before/after texts of the impacted blocks of a commit.
+
+    Each block text is normalized once. The pairwise measures are computed when a block
+    is added; cosine similarity is computed for all the blocks of the commit at once in
+    `finish`, with a single TF-IDF fit and a row-wise product of the sparse matrices,
+    instead of a vectorizer fit per pair as in Distance.measure_cosine_similarity.
+    """
+
+    def __init__(self, measures: Optional[List[str]] = None):
+        self.measures = list(SIMILARITY_MEASURES) if measures is None else measures
+        unknown = [measure for measure in self.measures if measure not in SIMILARITY_MEASURES]
+        if unknown:
+            raise ValueError(f"Unknown similarity measures: {', '.join(unknown)}")
+        # (row, normalized text before, normalized text after) waiting for the cosine similarity
+        self._pending = []
+
+    def add(self, row: dict, text_before: str, text_after: str) -> dict:
+        """
+        Measures the similarity of a block before and after the change.
+
+        Args:
+            row (dict): Row of the block; its cosine column is filled in by `finish`.
+            text_before (str): Block before the change ("" for a new block).
+            text_after (str): Block after the change.
+
+        Returns:
+            dict: Similarity columns of the block (cosine is None until `finish`).
+        """
+        before, after = normalize_block(text_before), normalize_block(text_after)
+        values = {}
+        for measure in self.measures:
+            if measure == "cosine":
+                values[self.get_header(measure)] = None
+                self._pending.append((row, before, after))
+            elif before == after:
+                values[self.get_header(measure)] = 1.0
+            elif measure == "jaro":
+                values[self.get_header(measure)] = jellyfish.jaro_similarity(before, after)
+            elif measure == "jaro_winkler":
+                values[self.get_header(measure)] = jellyfish.jaro_winkler_similarity(before, after)
+            else:
+                values[self.get_header(measure)] = SequenceMatcher(None, before, after).ratio()
+        return values
+
+    def finish(self):
+        """
+        Fills in the cosine similarity of all the rows added since the last call.
+        """
+        if not self._pending:
+            return
+        rows, before, after = zip(*self._pending)
+        self._pending = []
+        header = self.get_header("cosine")
+        try:
+            matrix = TfidfVectorizer().fit_transform(list(before) + list(after))
+        except ValueError:
+            # No word in any block of the commit
+            similarities = [1.0 if b == a else 0.0 for b, a in zip(before, after)]
+        else:
+            # TF-IDF rows are L2-normalized: the cosine is the dot product of the two rows
+            n = len(rows)
+            similarities = np.asarray(matrix[:n].multiply(matrix[n:]).sum(axis=1)).ravel().tolist()
+        for row, similarity in zip(rows, similarities):
+            row[header] = similarity
+
+    @staticmethod
+    def get_header(measure: str) -> str:
+        return f"{measure}_code_change_similarity"
+
+    @staticmethod
+    def get_headers(measures: Optional[List[str]] = None) -> List[str]:
+        return [BlockSimilarity.get_header(measure) for measure in (measures or SIMILARITY_MEASURES)]
@@ -3,6 +3,8 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
 import jellyfish
 
+from scripts.edits.edit_distance import damerau_levenshtein_distance
+
 
 class Distance:
 
@@ -25,8 +27,8 @@ class Distance:
     def measure_jaro_winkler_similarity(self):
         return jellyfish.jaro_winkler_similarity(self.change1, self.change2)
 
-    def measure_damerau_levenshtein_distance(self):
-        return jellyfish.damerau_levenshtein_distance(self.change1, self.change2)
+    def measure_damerau_levenshtein_distance(self, max_distance=None, unit="char"):
+        return damerau_levenshtein_distance(self.change1, self.change2, max_distance, unit)
 
     def measure_hamming_distance(self):
         return jellyfish.hamming_distance(self.change1, self.change2)
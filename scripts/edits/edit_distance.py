@@ -0,0 +1,106 @@
+from collections import Counter
+from typing import List, Optional, Sequence
+
+import jellyfish
+
+from scripts.codes.hcl_tokenizer import tokenize
+
+DISTANCE_UNITS = ["char", "line", "token"]
+
+# Lines/tokens are encoded as characters from U+0100 on, skipping the surrogate range
+_FIRST_CODE_POINT = 0x100
+_SURROGATES = range(0xD800, 0xE000)
+
+
+def trim_common_affixes(a: Sequence, b: Sequence):
+    """
+    Removes the common prefix and suffix of two sequences (the edit distance
+    between them is the distance between the remaining middles).
+    """
+    n = min(len(a), len(b))
+    start = 0
+    while start < n and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < n - start and a[len(a) - 1 - end] == b[len(b) - 1 - end]:
+        end += 1
+    return a[start:len(a) - end], b[start:len(b) - end]
+
+
+def distance_lower_bound(a: Sequence, b: Sequence) -> int:
+    """
+    Cheap lower bound of the Damerau-Levenshtein distance: the length difference
+    and the bag distance (transpositions keep the multiset of units).
+    """
+    bound = abs(len(a) - len(b))
+    counts_a, counts_b = Counter(a), Counter(b)
+    return max(bound, sum((counts_a - counts_b).values()), sum((counts_b - counts_a).values()))
+
+
+def split_units(text: str, unit: str) -> List[str]:
+    """
+    Splits a block text into the units the distance is counted in.
+    """
+    if unit == "line":
+        return text.splitlines()
+    if unit == "token":
+        return [token.value for token in tokenize(text) if token.kind != "NEWLINE"]
+    raise ValueError(f"Unknown distance unit: {unit}")
+
+
+def encode_units(a: List[str], b: List[str]):
+    """
+    Maps each distinct line/token to one character so jellyfish can compare the sequences.
+    """
+    codes = {}
+
+    def encode(units):
+        chars = []
+        for unit in units:
+            code = codes.get(unit)
+            if code is None:
+                code_point = _FIRST_CODE_POINT + len(codes)
+                if code_point >= _SURROGATES.start:
+                    code_point += len(_SURROGATES)
+                code = codes[unit] = chr(code_point)
+            chars.append(code)
+        return "".join(chars)
+
+    return encode(a), encode(b)
+
+
+def damerau_levenshtein_distance(a: str, b: str, max_distance: Optional[int] = None, unit: str = "char") -> int:
+    """
+    Damerau-Levenshtein distance between two block texts.
+
+    Identical texts and common prefixes/suffixes are handled before the dynamic
+    programming, which then only runs on the differing middle. `max_distance` does not
+    bound the cost of that programming: it is skipped only when the length difference or
+    the bag distance of the middles (see `distance_lower_bound`) already reaches the cap,
+    and otherwise runs in full, in O(n * m), before its result is capped.
+
+    Args:
+        a (str): Text of the block before the change.
+        b (str): Text of the block after the change.
+        max_distance (Optional[int]): Cap of the distance; larger distances are reported
+            as `max_distance`, smaller ones are exact. None for no cap.
+        unit (str): "char", "line" or "token".
+
+    Returns:
+        int: Number of insertions, deletions, substitutions and transpositions of units.
+    """
+    if a == b:
+        return 0
+    if unit != "char":
+        a, b = encode_units(split_units(a, unit), split_units(b, unit))
+
+    a, b = trim_common_affixes(a, b)
+    if not a or not b:
+        distance = len(a) + len(b)
+        return distance if max_distance is None else min(distance, max_distance)
+
+    if max_distance is not None and distance_lower_bound(a, b) >= max_distance:
+        return max_distance
+
+    distance = jellyfish.damerau_levenshtein_distance(a, b)
+    return distance if max_distance is None else min(distance, max_distance)
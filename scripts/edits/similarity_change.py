@@ -1,43 +1,43 @@
 # from scripts.block_locator.block_identificator import BlockIdentificator
 from scripts.edits.distance import Distance
+from scripts.utility.source_lines import SourceLines
 
 
 class SimilarityChange():
 
-    def __init__(self, currentBlock, pathAfterChange, OldestBlock, pathBeforeChange):
+    def __init__(self, currentBlock, linesAfterChange: SourceLines, OldestBlock, linesBeforeChange: SourceLines,
+                 max_distance=None, distance_unit="char"):
         # self.blockIdentificator = BlockIdentificator()
         self.currentBlock = currentBlock
         self.OldestBlock = OldestBlock
-        self.pathAfterChange = pathAfterChange
-        self.pathBeforeChange = pathBeforeChange
+        # Line index of each version of the file, shared by all its blocks
+        self.linesAfterChange = linesAfterChange
+        self.linesBeforeChange = linesBeforeChange
+        # Distances above max_distance are reported as max_distance (None: exact)
+        self.max_distance = max_distance
+        # "char", "line" or "token"
+        self.distance_unit = distance_unit
 
-    def _read_block_from_file(self, file_path, start_line, end_line):
-        if not file_path or start_line is None or end_line is None:
-            return ""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                # Adjust for 1-based indexing, careful with bounds
-                start_idx = max(0, start_line - 1)
-                end_idx = min(len(lines), end_line)
-                return "".join(lines[start_idx:end_idx])
-        except Exception:
+    @staticmethod
+    def _read_block(lines: SourceLines, start_line, end_line):
+        if lines is None:
             return ""
+        return lines.slice(start_line, end_line)
 
     def identify_blocks_before_after_change_as_str(self):
         # Get the content of block that changed before
         strBeforeChange: str = ""
         strAfterChange: str = ""
         if self.OldestBlock is not None:
-            strBeforeChange = self._read_block_from_file(
-                self.pathBeforeChange,
+            strBeforeChange = self._read_block(
+                self.linesBeforeChange,
                 self.OldestBlock.get("start_block"),
                 self.OldestBlock.get("end_block")
             )
 
         # Get the content of block that recently changed
-        strAfterChange = self._read_block_from_file(
-            self.pathAfterChange,
+        strAfterChange = self._read_block(
+            self.linesAfterChange,
             self.currentBlock.get("start_block"),
             self.currentBlock.get("end_block")
         )
@@ -49,7 +49,11 @@ class SimilarityChange():
         # and Comment before comparing that
         distance_for_code_change = Distance(strBeforeChange, strAfterChange)
         return {
-            "damerau_levenshtein_code_change_distance": distance_for_code_change.measure_damerau_levenshtein_distance()}
+            self.get_headers(self.distance_unit)[0]: distance_for_code_change.measure_damerau_levenshtein_distance(
+                self.max_distance, self.distance_unit)}
+
     @staticmethod
-    def get_headers():
-        return ["damerau_levenshtein_code_change_distance"]
+    def get_headers(distance_unit="char"):
+        if distance_unit == "char":
+            return ["damerau_levenshtein_code_change_distance"]
+        return [f"damerau_levenshtein_{distance_unit}_change_distance"]
@@ -1,12 +1,13 @@
 from pydriller import ModifiedFile
 
 from scripts.process.lines_change.ImpactedLines import ImpactedLines
+from scripts.process.lines_change.parsed_diff import ParsedDiff
 
 
 class TokensChange(ImpactedLines):
 
-    def __init__(self, mod: ModifiedFile, block, blockBefore):
-        super().__init__(mod, block, blockBefore)
+    def __init__(self, mod: ModifiedFile, block, blockBefore, parsed_diff: ParsedDiff = None):
+        super().__init__(mod, block, blockBefore, parsed_diff)
 
     def resume_token_change(self):
 
@@ -26,3 +27,13 @@ class TokensChange(ImpactedLines):
                         "text_entropy_for_added_lines": 0 if self.additions is None else self.additions.text_entropy_for_added_lines()
         }
 
+    @staticmethod
+    def get_headers():
+        return [
+            "sum_removed_line_token", "avg_removed_line_token", "max_removed_line_token",
+            "sum_removed_line_length", "avg_removed_line_length", "max_removed_line_length",
+            "text_entropy_for_removed_lines",
+            "sum_added_line_token", "avg_added_line_token", "max_added_line_token",
+            "sum_added_line_length", "avg_added_line_length", "max_added_line_length",
+            "text_entropy_for_added_lines"
+        ]
@@ -0,0 +1,266 @@
+"""
+Per-block feature families computed by process_commit.
+
+Each family wraps one extractor class and declares its columns through the class'
+get_headers. Extractor modules are imported the first time their family is used,
+so a disabled family costs nothing, not even its imports (e.g. jellyfish/sklearn
+for similarity). Families that batch work over the whole commit keep their state
+in CommitFeatures.
+"""
+
+import copy
+from typing import Iterable, List, Optional
+
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+
+# Families in the order their columns appear in the CSV
+FEATURE_FAMILIES = ["process", "similarity", "impacted_lines", "attr_change", "delta"]
+# Families computed only when named explicitly (their columns come after the default ones)
+OPTIONAL_FEATURE_FAMILIES = ["tokens", "block_similarity", "defect_neighbors", "co_change", "references",
+                             "process_windows"]
+
+
+def parse_features(features: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Normalizes a selection of feature families.
+
+    Args:
+        features: Family names (or a comma-separated string); None or "all" for every default
+            family, plus the optional families listed next to "all".
+
+    Returns:
+        List[str]: Selected families, in CSV order.
+    """
+    if features is None:
+        return list(FEATURE_FAMILIES)
+    if isinstance(features, str):
+        features = [name.strip() for name in features.split(",") if name.strip()]
+    features = list(features)
+    if "all" in features:
+        features = FEATURE_FAMILIES + [name for name in features if name != "all"]
+    available = FEATURE_FAMILIES + OPTIONAL_FEATURE_FAMILIES
+    unknown = [name for name in features if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown feature families: {', '.join(unknown)} (available: {', '.join(available)})")
+    return [name for name in available if name in features]
+
+
+class BlockFeatures:
+    """
+    Computes the enabled feature families for the impacted blocks of one modified file.
+    """
+
+    def __init__(self, features, mod, parsed_diff, lines_after, lines_before, previous_contributions,
+                 max_distance=None, distance_unit="char", block_similarity=None, change_index=None,
+                 co_change_graph=None, reference_index=None, process_windows=None):
+        self.features = parse_features(features)
+        self.mod = mod
+        self.parsed_diff = parsed_diff
+        self.lines_after = lines_after
+        self.lines_before = lines_before
+        self.previous_contributions = previous_contributions
+        self.max_distance = max_distance
+        self.distance_unit = distance_unit
+        # Commit-level BlockSimilarity, required by the block_similarity family
+        self.block_similarity = block_similarity
+        # ChangeIndex of the past block changes, required by the defect_neighbors family
+        self.change_index = change_index
+        # CoChangeGraph of the past commits, required by the co_change family
+        self.co_change_graph = co_change_graph
+        # ReferenceIndex of the repository tree, required by the references family
+        self.reference_index = reference_index
+        # ProcessWindows of the recent history, required by the process_windows family
+        self.process_windows = process_windows
+        self._moved_views = {}
+
+    def get_headers(self, family: str, block) -> List[str]:
+        """
+        Columns produced by a family for a block.
+        """
+        if family == "process":
+            from scripts.process.process_metrics import ProcessMetrics
+            return ProcessMetrics.get_headers()
+        if family == "similarity":
+            from scripts.edits.similarity_change import SimilarityChange
+            return SimilarityChange.get_headers(self.distance_unit)
+        if family == "impacted_lines":
+            from scripts.process.lines_change.ImpactedLines import ImpactedLines
+            return ImpactedLines.get_headers()
+        if family == "attr_change":
+            from scripts.process.attr_terraform_change.attr_change import AttrChange
+            return AttrChange.get_headers()
+        if family == "delta":
+            from scripts.process.delta_metrics import DeltaMetrics
+            return DeltaMetrics.get_headers(block)
+        if family == "tokens":
+            from scripts.edits.tokens_change import TokensChange
+            return TokensChange.get_headers()
+        if family == "block_similarity":
+            from scripts.edits.block_similarity import BlockSimilarity
+            return BlockSimilarity.get_headers(self.block_similarity.measures if self.block_similarity else None)
+        if family == "defect_neighbors":
+            from scripts.process.defect_neighbors import DefectNeighbors
+            return DefectNeighbors.get_headers()
+        if family == "co_change":
+            from scripts.process.co_change import CoChangeGraph
+            return CoChangeGraph.get_headers()
+        if family == "references":
+            from scripts.codes.reference_index import ReferenceIndex
+            return ReferenceIndex.get_headers()
+        if family == "process_windows":
+            from scripts.process.window_metrics import ProcessWindows
+            return ProcessWindows.get_headers(self.process_windows.windows if self.process_windows else None)
+        raise ValueError(f"Unknown feature family: {family}")
+
+    def compute(self, contribution: dict, block, block_before, source: "BlockFeatures" = None) -> dict:
+        """
+        Features of one impacted block, restricted to the declared columns of each enabled family.
+
+        Args:
+            contribution (dict): Commit and block fields of the row (read by the process metrics).
+            block (dict): Block after change.
+            block_before (dict): Same block before change, or None for a new block.
+            source (BlockFeatures): Features of the file `block_before` comes from, when the
+                block was moved from another file of the commit.
+
+        Returns:
+            dict: Feature columns, family by family.
+        """
+        if source is not None and source is not self:
+            return self._moved_from(source).compute(contribution, block, block_before)
+        features = {}
+        changed_lines = None
+        for family in self.features:
+            if family == "process":
+                from scripts.process.process_metrics import ProcessMetrics
+                values = ProcessMetrics(contribution, self.previous_contributions).resume_process_metrics()
+            elif family == "similarity":
+                from scripts.edits.similarity_change import SimilarityChange
+                values = SimilarityChange(block, self.lines_after, block_before, self.lines_before,
+                                          self.max_distance, self.distance_unit).resume_similarity_change()
+            elif family == "impacted_lines":
+                changed_lines = self._changed_lines(block, block_before)
+                values = changed_lines.resume_changed_lines()
+            elif family == "attr_change":
+                from scripts.process.attr_terraform_change.attr_change import AttrChange
+                additions, deletions = self._additions_deletions(changed_lines, block, block_before)
+                values = AttrChange(block, additions, deletions).resume_changed_attr()
+            elif family == "delta":
+                from scripts.process.delta_metrics import DeltaMetrics
+                values = DeltaMetrics(block, block_before).compute_delta_metrics()
+            elif family == "tokens":
+                from scripts.edits.tokens_change import TokensChange
+                values = TokensChange(self.mod, block, block_before, self.parsed_diff).resume_token_change()
+            elif family == "defect_neighbors":
+                from scripts.process.defect_neighbors import DefectNeighbors
+                additions, deletions = self._additions_deletions(changed_lines, block, block_before)
+                values = DefectNeighbors(contribution, block, additions, deletions,
+                                         self.change_index).resume_defect_neighbors()
+            elif family == "co_change":
+                values = self.co_change_graph.resume_co_change(contribution)
+                # The commit is added to the graph once all its blocks are measured
+                self.co_change_graph.stage(contribution)
+            elif family == "references":
+                # Index of the tree after the commit, updated with the files it changed
+                self.reference_index.sync(contribution["commit"])
+                values = self.reference_index.resume_references(self.mod.new_path, block["block_identifiers"])
+            elif family == "process_windows":
+                values = self.process_windows.resume_process_windows(contribution)
+                # The commit enters the windows once all its blocks are measured
+                self.process_windows.stage(contribution)
+            elif family == "block_similarity":
+                # Cosine is filled in the row by CommitFeatures.finish, once per commit
+                text_before = "" if block_before is None else self.lines_before.slice(block_before["start_block"],
+                                                                                     block_before["end_block"])
+                values = self.block_similarity.add(contribution, text_before,
+                                                   self.lines_after.slice(block["start_block"], block["end_block"]))
+            else:
+                raise ValueError(f"Unknown feature family: {family}")
+            features.update((column, values.get(column)) for column in self.get_headers(family, block))
+        return features
+
+    def _moved_from(self, source):
+        # Same features with the before side (deleted lines, before version) of the source file
+        view = self._moved_views.get(id(source))
+        if view is None:
+            view = copy.copy(self)
+            view.parsed_diff = ParsedDiff.combine(self.parsed_diff, source.parsed_diff)
+            view.lines_before = source.lines_before
+            view._moved_views = {}
+            self._moved_views[id(source)] = view
+        return view
+
+    def _changed_lines(self, block, block_before):
+        from scripts.process.lines_change.ImpactedLines import ImpactedLines
+        return ImpactedLines(self.mod, block, block_before, self.parsed_diff)
+
+    def _additions_deletions(self, changed_lines, block, block_before):
+        # Reuse the line counts of the impacted_lines family when it ran
+        if changed_lines is not None:
+            return changed_lines.additions, changed_lines.deletions
+        from scripts.process.lines_change.additions import Additions
+        from scripts.process.lines_change.deletions import Deletions
+        additions = Additions(self.mod, block["start_block"], block["end_block"], self.parsed_diff)
+        deletions = None
+        if block_before is not None:
+            deletions = Deletions(self.mod, block_before["start_block"], block_before["end_block"], self.parsed_diff)
+        return additions, deletions
+
+
+class CommitFeatures:
+    """
+    Enabled feature families for one commit: creates the BlockFeatures of its modified
+    files and holds the state shared by them (the batched block similarity, the index
+    of past changes, the co-change graph, the reference index, the process windows).
+    """
+
+    def __init__(self, features, previous_contributions, max_distance=None, distance_unit="char",
+                 change_index=None, co_change_graph=None, reference_index=None, process_windows=None):
+        self.features = parse_features(features)
+        self.previous_contributions = previous_contributions
+        self.max_distance = max_distance
+        self.distance_unit = distance_unit
+        self.block_similarity = None
+        if "block_similarity" in self.features:
+            from scripts.edits.block_similarity import BlockSimilarity
+            self.block_similarity = BlockSimilarity()
+        self.change_index = None
+        if "defect_neighbors" in self.features:
+            from scripts.process.defect_neighbors import ChangeIndex
+            # Without an index shared between commits, there is no history to search
+            self.change_index = change_index if change_index is not None else ChangeIndex()
+        self.co_change_graph = None
+        if "co_change" in self.features:
+            from scripts.process.co_change import CoChangeGraph
+            # Without a graph shared between commits, it is rebuilt from the history rows
+            self.co_change_graph = co_change_graph if co_change_graph is not None else CoChangeGraph.from_rows(
+                previous_contributions)
+        self.reference_index = None
+        if "references" in self.features:
+            if reference_index is None:
+                raise ValueError("The references family requires a reference index of the repository")
+            self.reference_index = reference_index
+        self.process_windows = None
+        if "process_windows" in self.features:
+            from scripts.process.window_metrics import ProcessWindows
+            # Without windows shared between commits, they are replayed from the history rows
+            self.process_windows = process_windows if process_windows is not None else ProcessWindows.from_rows(
+                previous_contributions)
+
+    def for_file(self, mod, parsed_diff, lines_after, lines_before) -> BlockFeatures:
+        return BlockFeatures(self.features, mod, parsed_diff, lines_after, lines_before, self.previous_contributions,
+                             self.max_distance, self.distance_unit, self.block_similarity, self.change_index,
+                             self.co_change_graph, self.reference_index, self.process_windows)
+
+    def finish(self):
+        """
+        Completes the commit-level features of the rows computed so far.
+        """
+        if self.block_similarity is not None:
+            self.block_similarity.finish()
+        if self.change_index is not None:
+            self.change_index.commit()
+        if self.co_change_graph is not None:
+            self.co_change_graph.commit()
+        if self.process_windows is not None:
+            self.process_windows.commit()
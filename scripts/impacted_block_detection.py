@@ -5,114 +5,176 @@ from pydriller import ModificationType
 # Fix import - CodeMetricsExtractor is in scripts.codes.code_metrics_measures
 # but we need to ensure python path is correct or use relative imports if run as module
 import sys
+from bisect import bisect_left
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.codes.code_metrics_measures import CodeMetricsExtractor
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+from scripts.codes.incremental_parse import derive_blocks
 from scripts.process.lines_change.additions import Additions
 from scripts.process.lines_change.deletions import Deletions
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.filter_values import count_sorted_values_between_start_end
+
+def get_default_block_locator(engine="jar"):
+    """
+    Block locator for a parsing engine: "jar" is the shared TerraMetrics extractor for
+    libs/terraform_metrics-1.0.jar, "python" the in-process HCL locator (no JVM).
+    """
+    if engine == "python":
+        return HclMetricsExtractor()
+    if engine != "jar":
+        raise ValueError(f"Unknown parsing engine: {engine}")
+    jar_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "terraform_metrics-1.0.jar")
+    return CodeMetricsExtractor.shared(jar_path)
+
+
+class BlockIndex:
+    """
+    Blocks of a file version grouped by `block_identifiers` and sorted by `start_block`,
+    so the closest homonym of a block is found by bisection instead of a full scan.
+    """
+
+    def __init__(self, blocks):
+        grouped = {}
+        for position, block in enumerate(blocks):
+            # Blocks sharing a start line: the last one wins, as in the linear scan
+            grouped.setdefault(block.get("block_identifiers"), {})[block.get("start_block", 0)] = (position, block)
+        self._groups = {identifiers: (sorted(by_start), by_start) for identifiers, by_start in grouped.items()}
+
+    def __contains__(self, block):
+        return block.get("block_identifiers") in self._groups
+
+    def closest(self, block):
+        """
+        Returns the block with the same identifiers whose start line is the nearest,
+        the latest in the original list on equal distance (None if there is none).
+        """
+        group = self._groups.get(block.get("block_identifiers"))
+        if group is None:
+            return None
+        starts, by_start = group
+        target = block.get("start_block", 0)
+        i = bisect_left(starts, target)
+        candidates = [by_start[start] for start in starts[max(i - 1, 0):i + 1]]
+        distance = min(abs(target - candidate[1].get("start_block", 0)) for candidate in candidates)
+        return max((candidate for candidate in candidates
+                    if abs(target - candidate[1].get("start_block", 0)) == distance), key=lambda c: c[0])[1]
+
 
 class ImpactedBlocks:
 
-    def __init__(self, mod, file_ext_to_parse=None):
+    def __init__(self, mod, file_ext_to_parse=None, block_locator=None, incremental=False,
+                 parsed_diff=None):
         self.mod = mod
         self.file_ext_to_parse = file_ext_to_parse
-        # Use the correct class and jar path
-        jar_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "terraform_metrics-1.0.jar")
-        self.blockLocatorInstance = CodeMetricsExtractor(jar_path=jar_path)
-
-        # status, data after the block changed
-        # CodeMetricsExtractor.extract_metrics takes a dict {filename: [content]}? 
-        # No, let's check extract_metrics signature. 
-        # It takes modified_blocks: Dict[str, List[str]] where List[str] is list of BLOCKS?
-        # Wait, the user's CodeMetricsExtractor seems to expect "modified blocks" as input to run the JAR?
-        # The JAR usage says: --file <tf_path> -b --target <output_path>
-        # So it analyzes a FILE.
-        
-        # We need to adapt to what CodeMetricsExtractor expects or use it differently.
-        # The user's CodeMetricsExtractor.extract_metrics implementation writes content to temp file.
-        
-        # Let's try to pass the file content.
-        # But wait, the original code used call_service_locator(before=True/False)
-        # The NEW CodeMetricsExtractor doesn't have call_service_locator. 
-        
-        # I need to implement a compatibility layer or use the new one correctly.
-        # The new one has `extract_metrics` and `_run_terrametrics`.
-        
-        # If I want to analyze the whole file content (before/after), I should probably use the JAR directly or method that does that.
-        # _run_terrametrics runs on a file.
-        
-        # Let's implement a helper to extract metrics for a specific file content
-        self.blocks_after_change = self._get_blocks(self.mod.source_code)
-        self.blocks_before_change = self._get_blocks(self.mod.source_code_before)
+        # The block locator parses a whole file version; by default the TerraMetrics JAR,
+        # shared across files so its JVM stays warm for the whole run.
+        if block_locator is None:
+            block_locator = get_default_block_locator()
+        self.blockLocatorInstance = block_locator
+        self._block_indexes = {}
+
+        if incremental:
+            self.blocks_before_change, self.blocks_after_change = self._get_blocks_incremental()
+        else:
+            self.blocks_after_change = self._get_blocks(self.mod.source_code)
+            self.blocks_before_change = self._get_blocks(self.mod.source_code_before)
         
         # Set status/head for compatibility if needed, but we mostly need the blocks list
         self.status_after_change = 200 if self.blocks_after_change else 404
         self.status_before_change = 200 if self.blocks_before_change else 404
 
-        # Get added and removed lines_change
-        self.additions = Additions(self.mod)
+        # Get added and removed lines_change (diff filtered once, shared with the block features)
+        self.parsed_diff = parsed_diff if parsed_diff is not None else ParsedDiff(self.mod)
+        self.additions = Additions(self.mod, parsed_diff=self.parsed_diff)
         self.added_lines = self.additions.get_added_lines_in_a_file()
         self.added_lines_content = self.additions.get_added_lines_content_in_a_file()
-        self.deletions = Deletions(self.mod)
+        self.deletions = Deletions(self.mod, parsed_diff=self.parsed_diff)
         self.removed_lines = self.deletions.get_deleted_lines_in_a_file()
 
     def _get_blocks(self, source_code):
         if not source_code:
             return []
-        
-        # We can use the CodeMetricsExtractor to parse this source code
-        # But extract_metrics expects {filename: [blocks]}, and writes blocks to a file.
-        # If we just want to run the JAR on the content:
-        import tempfile
-        import json
-        
-        if not source_code:
-            return []
-            
-        with tempfile.NamedTemporaryFile(suffix=".tf", delete=False, mode="w", encoding='utf-8') as tf_file:
-            tf_file.write(source_code)
-            tf_path = tf_file.name
-            
-        json_path = tf_path + ".json"
-        
+
         try:
-            self.blockLocatorInstance._run_terrametrics(tf_path, json_path)
-            if os.path.exists(json_path):
-                with open(json_path, "r") as f:
-                    data = json.load(f)
-                    # The JAR output format seems to be what we need.
-                    # Based on old code: data["data"] is the blocks list
-                    return data.get("data", [])
+            # Based on old code: data["data"] is the blocks list
+            data = self.blockLocatorInstance.parse_source(source_code)
+            return data.get("data", [])
         except Exception as e:
             print(f"Error extracting blocks: {e}")
             return []
-        finally:
-            if os.path.exists(tf_path): os.remove(tf_path)
-            if os.path.exists(json_path): os.remove(json_path)
+
+    def _get_blocks_incremental(self):
+        """
+        Parses one version of the file in full (or takes it from the parse cache) and
+        derives the other one from the diff: blocks outside the hunks are shifted by the
+        hunk offsets, only the regions touched by the diff are re-parsed.
+        """
+        source_before = self.mod.source_code_before
+        source_after = self.mod.source_code
+        if not source_before or not source_after:
+            return self._get_blocks(source_before), self._get_blocks(source_after)
+
+        deleted = sorted(line for line, _ in self.mod.diff_parsed['deleted'])
+        added = sorted(line for line, _ in self.mod.diff_parsed['added'])
+        locator = self.blockLocatorInstance
+        try:
+            # Derived blocks are kept apart from real parses (never written to the parse cache)
+            known_after = locator.peek(source_after)
+            known_after = known_after.get("data", []) if known_after is not None else locator.peek_derived(source_after)
+            known_before = locator.peek(source_before)
+            if known_before is None and locator.peek_derived(source_before) is None and known_after is not None:
+                # Reverse traversal: the after version was the before version of the previous commit
+                blocks_before = derive_blocks(locator, known_after, source_before, added, deleted)
+                if blocks_before is None:
+                    return self._get_blocks(source_before), known_after
+                locator.remember_derived(source_before, blocks_before)
+                return blocks_before, known_after
+
+            blocks_before = locator.peek_derived(source_before) if known_before is None else None
+            if blocks_before is None:
+                blocks_before = self._get_blocks(source_before)
+            if known_after is not None:
+                return blocks_before, known_after
+            blocks_after = derive_blocks(locator, blocks_before, source_after, deleted, added)
+            if blocks_after is None:
+                return blocks_before, self._get_blocks(source_after)
+            locator.remember_derived(source_after, blocks_after)
+            return blocks_before, blocks_after
+        except Exception as e:
+            print(f"Error extracting blocks: {e}")
+            return self._get_blocks(source_before), self._get_blocks(source_after)
+
+    def _get_block_index(self, list_of_dicts):
+        """
+        Index of a block list, built once per list (the before/after versions of the
+        file are looked up once per impacted block) and rebuilt if the list grew.
+        """
+        cached = self._block_indexes.get(id(list_of_dicts))
+        if cached is not None and cached[0] is list_of_dicts and cached[1] == len(list_of_dicts):
+            return cached[2]
+        index = BlockIndex(list_of_dicts)
+        self._block_indexes[id(list_of_dicts)] = (list_of_dicts, len(list_of_dicts), index)
+        return index
 
     def is_dict_in_list(self, target_dict, list_of_dicts):
-        for d in list_of_dicts:
-            if d.get("block_identifiers") == target_dict.get("block_identifiers"):
-                return True
-        return False
+        return target_dict in self._get_block_index(list_of_dicts)
 
     def get_block(self, block, list_of_dicts):
-        minDistance = float('inf')
-        closestBlock = None
-
-        for d in list_of_dicts:
-            if block.get("block_identifiers") == d.get("block_identifiers"):
-                distance = abs(block.get("start_block", 0) - d.get("start_block", 0))
-                if distance <= minDistance:
-                    minDistance = distance
-                    closestBlock = d
-        return closestBlock
+        # Closest block with the same identifiers (nearest start_block, last one on ties)
+        return self._get_block_index(list_of_dicts).closest(block)
 
     def is_block_exist(self, block, list_of_dicts):
-        closestBlock = self.get_block(block, list_of_dicts)
-        if closestBlock is not None:
-            return True
-        return False
+        return block in self._get_block_index(list_of_dicts)
+
+    def get_removed_blocks(self):
+        """
+        Blocks of the before version whose identifiers are absent from the after version
+        (deleted, renamed or moved to another file).
+        """
+        after_index = self._get_block_index(self.blocks_after_change)
+        return [block for block in self.blocks_before_change if block not in after_index]
 
     def identify_impacted_blocks_in_a_file(self, file_path):
 
@@ -121,20 +183,24 @@ class ImpactedBlocks:
             impacted_blocks = []
             if self.status_before_change != 404 or self.status_after_change != 404:
 
+                # Changed lines are sorted: each block finds the lines strictly inside it by bisection
+                added_lines = sorted(self.added_lines)
+                removed_lines = sorted(self.removed_lines)
+                # Identifiers of the impacted blocks, for membership tests in O(1)
+                impacted_identifiers = set()
+
                 for obj in self.blocks_after_change:
-                    for line in self.added_lines:
-                        if not self.is_dict_in_list(obj, impacted_blocks):
-                            if obj["start_block"] < line < obj["end_block"]:
-                                impacted_blocks.append(obj)
+                    if count_sorted_values_between_start_end(added_lines, obj["start_block"], obj["end_block"]):
+                        if obj.get("block_identifiers") not in impacted_identifiers:
+                            impacted_blocks.append(obj)
+                            impacted_identifiers.add(obj.get("block_identifiers"))
 
                 # --- Completeness
                 if self.blocks_before_change is not None:
                     for obj in self.blocks_before_change:
-                        cpt = 0
-                        if not self.is_block_exist(obj, impacted_blocks):
-                            for line in self.removed_lines:
-                                if obj["start_block"] < line < obj["end_block"]:
-                                    cpt += 1
+                        if obj.get("block_identifiers") not in impacted_identifiers:
+                            cpt = count_sorted_values_between_start_end(removed_lines, obj["start_block"],
+                                                                        obj["end_block"])
 
                             if cpt == obj.get("numAttrs", 0): # Assuming numAttrs exists or 0
                                 pass
@@ -142,6 +208,7 @@ class ImpactedBlocks:
                                 target_block = self.get_block(obj, self.blocks_after_change)
                                 if target_block is not None:
                                     impacted_blocks.append(target_block)
+                                    impacted_identifiers.add(target_block.get("block_identifiers"))
 
                 return impacted_blocks
         return None
@@ -1,9 +1,4 @@
-from scripts.process.attr_terraform_change.description_attr_change import DescriptionAttrChange
-from scripts.process.attr_terraform_change.default_change import DefaultAttrChange
-from scripts.process.attr_terraform_change.meta_arg_change import MetaArgsChange
-from scripts.process.attr_terraform_change.type_change import TypeAttrChange
-from scripts.process.attr_terraform_change.value_change import ValueAttrChange
-from scripts.process.attr_terraform_change.version_change import VersionChange
+from scripts.process.attr_terraform_change.attr_classifier import classify_changed_lines
 from scripts.process.lines_change.additions import Additions
 from scripts.process.lines_change.deletions import Deletions
 
@@ -19,31 +14,30 @@ class AttrChange:
         # isVar = self.block["isVariable"]
         # isOutput = self.block["isOutput"]
 
-        defaultAttrChange = DefaultAttrChange(self.additions, self.deletions)
-        typeAttrChange = TypeAttrChange(self.additions, self.deletions)
-        valueChange = ValueAttrChange(self.additions, self.deletions)
-        versionChange = VersionChange(self.additions, self.deletions)
-        descriptionChange = DescriptionAttrChange(self.additions, self.deletions)
-        metaArgsChange = MetaArgsChange(self.additions, self.deletions)
+        # One pass over the block's added and deleted lines sets every flag
+        added = classify_changed_lines(self.additions.get_added_lines_content_in_a_block())
+        deleted = set()
+        if self.deletions is not None:
+            deleted = classify_changed_lines(self.deletions.get_deleted_lines_content_in_a_block())
 
         return {
-            "additions_contains_default_change": defaultAttrChange.additions_contains_default_change(),
-            "deletions_contains_default_change": defaultAttrChange.deletions_contains_default_change(),
+            "additions_contains_default_change": int("default" in added),
+            "deletions_contains_default_change": int("default" in deleted),
             # Type Change
-            "additions_contains_type_change": typeAttrChange.additions_contains_type_change(),
-            "deletions_contains_type_change": typeAttrChange.deletions_contains_type_change(),
+            "additions_contains_type_change": int("type" in added),
+            "deletions_contains_type_change": int("type" in deleted),
             # Value
-            "additions_contains_value_output_change": valueChange.additions_contains_value_output_change(),
-            "deletions_contains_value_output_change": valueChange.deletions_contains_value_output_change(),
+            "additions_contains_value_output_change": int("value_output" in added),
+            "deletions_contains_value_output_change": int("value_output" in deleted),
             # Versioning
-            "additions_contains_versioning_change": versionChange.additions_contains_versioning_change(),
-            "deletions_contains_versioning_change": versionChange.deletions_contains_versioning_change(),
+            "additions_contains_versioning_change": int("versioning" in added),
+            "deletions_contains_versioning_change": int("versioning" in deleted),
             # Description
-            "additions_contains_description_change": descriptionChange.additions_contains_description_change(),
-            "deletions_contains_description_change": descriptionChange.deletions_contains_description_change(),
+            "additions_contains_description_change": int("description" in added),
+            "deletions_contains_description_change": int("description" in deleted),
             # Meta Args
-            "additions_contains_meta_args_change": metaArgsChange.additions_contains_meta_arguments_change(),
-            "deletions_contains_meta_args_change": metaArgsChange.deletions_contains_meta_arguments_change(),
+            "additions_contains_meta_args_change": int("meta_args" in added),
+            "deletions_contains_meta_args_change": int("meta_args" in deleted),
         }
 
     @staticmethod
@@ -0,0 +1,39 @@
+import re
+
+# Kinds of attribute change, in the order of the AttrChange columns
+ATTR_CHANGE_KINDS = ["default", "type", "value_output", "versioning", "description", "meta_args"]
+
+# Pattern of each kind, searched anywhere in a line; each goes in an optional lookahead so a
+# single match on a line tells which of them occur in it.
+_KIND_PATTERNS = {
+    "default": r"\s*default\s*=\s*",
+    "type": r"\s*type\s*=\s*",
+    "value_output": r"\s*value\s*=\s*",
+    "versioning": r'\s*=\s*\"\s*(?:~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(?:\.\d+)?(?:\s*,'
+                  r'\s*(?:~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(?:\.\d+)?)?\s*\"',
+    "description": r'\s*description\s*=\s*"(?:[^"]*)"|\s*description\s*=\s*""',
+    "meta_args": r"\s*(?:depends_on|count|for_each|provider|lifecycle|provisioner|connection)\s*",
+}
+ATTR_CHANGE_PATTERN = re.compile(
+    "".join(f"(?:(?=(?P<{kind}>.*?(?:{_KIND_PATTERNS[kind]}))))?" for kind in ATTR_CHANGE_KINDS),
+    re.DOTALL
+)
+
+
+def classify_changed_lines(lines_content):
+    """
+    Kinds of attribute change found in a block's added or deleted lines.
+
+    Args:
+        lines_content: (line number, content) pairs of the block.
+
+    Returns:
+        set: Subset of ATTR_CHANGE_KINDS.
+    """
+    found = set()
+    for _, content in lines_content:
+        match = ATTR_CHANGE_PATTERN.match(content)
+        found.update(kind for kind, value in match.groupdict().items() if value is not None)
+        if len(found) == len(ATTR_CHANGE_KINDS):
+            break
+    return found
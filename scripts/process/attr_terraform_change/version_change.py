@@ -1,29 +0,0 @@
-import re
-
-
-class VersionChange:
-
-    def __init__(self, additions, deletions):
-        self.additions = additions
-        self.deletions = deletions
-
-    def additions_contains_versioning_change(self):
-        addedLinesInBlock = self.additions.get_added_lines_in_a_block()
-        for numLine, contentLine in self.additions.added_lines_content:
-            if numLine in addedLinesInBlock:
-                version_pattern = r'\s*=\s*\"\s*(~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(\.\d+)?(\s*,' \
-                                  r'\s*(~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(\.\d+)?)?\s*\"'
-                if re.search(version_pattern, contentLine):
-                    return 1
-        return 0
-
-    def deletions_contains_versioning_change(self):
-        if self.deletions is not None:
-            removedLinesInBlock = self.deletions.get_deleted_lines_in_a_block()
-            for numLine, contentLine in self.deletions.deleted_lines_content:
-                if numLine in removedLinesInBlock:
-                    version_pattern = r'\s*=\s*\"\s*(~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(\.\d+)?(\s*,' \
-                                      r'\s*(~>|>=|<=|>|<|!=|=)?\s*\d+\.\d+(\.\d+)?)?\s*\"'
-                    if re.search(version_pattern, contentLine):
-                        return 1
-        return 0
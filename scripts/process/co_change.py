@@ -0,0 +1,152 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+
+from scripts.process.defect_neighbors import is_defective
+from scripts.utility.pickle_file import load_pickle, save_pickle
+
+# Commits touching more blocks are counted as changes but add no co-change edges
+# (bulk refactorings); this also keeps each update linear in the commit size.
+MAX_COMMIT_BLOCKS = 50
+
+
+def block_node(row: dict) -> Tuple:
+    return row.get("file"), row.get("block_identifiers")
+
+
+class CoChangeGraph:
+    """
+    Blocks that changed together, as a weighted sparse adjacency: one dict of neighbor ->
+    number of common commits per block.
+
+    The graph is updated once per commit with the rows of that commit, so a block is
+    always measured against the commits before its own.
+    """
+
+    def __init__(self, max_commit_blocks: int = MAX_COMMIT_BLOCKS):
+        self.max_commit_blocks = max_commit_blocks
+        self.nodes: Dict[Tuple, int] = {}
+        # Per block: number of commits changing it, of defective changes, and co-changes
+        self.changes: List[int] = []
+        self.defects: List[int] = []
+        self.adjacency: List[Dict[int, int]] = []
+        self.commits = set()
+        self._staged = []
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def _node(self, key: Tuple) -> int:
+        node = self.nodes.get(key)
+        if node is None:
+            node = self.nodes[key] = len(self.changes)
+            self.changes.append(0)
+            self.defects.append(0)
+            self.adjacency.append({})
+        return node
+
+    def add_commit(self, rows: Iterable[dict]):
+        """
+        Adds the block rows of one commit, unless the commit is already in the graph.
+        """
+        rows = list(rows)
+        if not rows or rows[0].get("commit") in self.commits:
+            return
+        self.commits.add(rows[0].get("commit"))
+        nodes = OrderedDict()
+        for row in rows:
+            node = self._node(block_node(row))
+            nodes[node] = nodes.get(node, False) or is_defective(row)
+        for node, defective in nodes.items():
+            self.changes[node] += 1
+            self.defects[node] += int(defective)
+        if len(nodes) > self.max_commit_blocks:
+            return
+        for node in nodes:
+            neighbors = self.adjacency[node]
+            for other in nodes:
+                if other != node:
+                    neighbors[other] = neighbors.get(other, 0) + 1
+
+    def stage(self, row: dict):
+        """
+        Keeps a row of the current commit, to be added by `commit`.
+        """
+        self._staged.append(row)
+
+    def commit(self):
+        """
+        Adds the rows staged since the last call as one commit.
+        """
+        self.add_commit(self._staged)
+        self._staged = []
+
+    def add_rows(self, rows: Iterable[dict]):
+        """
+        Adds contribution rows (e.g. the history CSV) grouped by commit; commits already in
+        the graph are skipped.
+        """
+        commits = OrderedDict()
+        for row in rows:
+            if row.get("commit") not in self.commits:
+                commits.setdefault(row.get("commit"), []).append(row)
+        for commit_rows in commits.values():
+            self.add_commit(commit_rows)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], max_commit_blocks: int = MAX_COMMIT_BLOCKS) -> "CoChangeGraph":
+        graph = cls(max_commit_blocks)
+        graph.add_rows(rows)
+        return graph
+
+    def update_labels(self, rows: Iterable[dict]):
+        """
+        Recounts the defective changes of the blocks from labelled rows (e.g. the history CSV).
+        Blocks without any row keep their count, so no rows leave the graph as it is.
+        """
+        labelled = set()
+        defective_changes = set()
+        for row in rows:
+            node = self.nodes.get(block_node(row))
+            if node is None:
+                continue
+            labelled.add(node)
+            if is_defective(row):
+                defective_changes.add((row.get("commit"), node))
+        for node in labelled:
+            self.defects[node] = 0
+        for _, node in defective_changes:
+            self.defects[node] += 1
+
+    def resume_co_change(self, row: dict) -> dict:
+        node = self.nodes.get(block_node(row))
+        if node is None:
+            return {"cochange_degree": 0, "cochange_blocks": 0, "cochange_defective_coupling": 0.0}
+        neighbors = self.adjacency[node]
+        changes = self.changes[node]
+        # Coupling strength: share of the changes of the block made together with the neighbor
+        defective_coupling = max((count / changes for other, count in neighbors.items() if self.defects[other]),
+                                 default=0.0)
+        return {
+            # Number of (commit, other block) co-changes of the block
+            "cochange_degree": sum(neighbors.values()),
+            # Number of distinct blocks changed together with the block
+            "cochange_blocks": len(neighbors),
+            # Strongest coupling with a block that had a defective change
+            "cochange_defective_coupling": defective_coupling
+        }
+
+    @staticmethod
+    def get_headers():
+        return ["cochange_degree", "cochange_blocks", "cochange_defective_coupling"]
+
+    def save(self, path: str):
+        save_pickle({key: getattr(self, key) for key in ("max_commit_blocks", "nodes", "changes", "defects",
+                                                         "adjacency", "commits")}, path)
+
+    @classmethod
+    def load(cls, path: str) -> "CoChangeGraph":
+        state = load_pickle(path)
+        graph = cls(state["max_commit_blocks"])
+        for key in ("nodes", "changes", "defects", "adjacency", "commits"):
+            setattr(graph, key, state[key])
+        return graph
@@ -0,0 +1,206 @@
+import math
+from array import array
+from collections import Counter
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scripts.process.lines_change.line_tokens import tokenize_line
+from scripts.utility.pickle_file import load_pickle, save_pickle
+
+KNN_NEIGHBORS = 5
+
+
+def change_tokens(block: dict, added_lines_content, deleted_lines_content) -> List[str]:
+    """
+    Terms describing a block change: its kind and type, and the tokens of its added (+)
+    and deleted (-) lines.
+    """
+    tokens = [f"block:{block.get('block')}", f"type:{block.get('block_id')}"]
+    for _, content in added_lines_content:
+        tokens.extend("+" + token for token in tokenize_line(content))
+    for _, content in deleted_lines_content:
+        tokens.extend("-" + token for token in tokenize_line(content))
+    return tokens
+
+
+def row_key(row: dict) -> Tuple:
+    # Same identity as the rows deduplicated by merge_metrics_files
+    return row.get("commit"), row.get("file"), row.get("block_identifiers")
+
+
+def is_defective(row: dict) -> bool:
+    """
+    Whether a row is labelled fault-prone (1 from a contribution, "1"/"1.0" from a CSV).
+    """
+    try:
+        return float(row.get("fault_prone") or 0) == 1
+    except (TypeError, ValueError):
+        return False
+
+
+class ChangeIndex:
+    """
+    Incremental TF-IDF index of the block changes of the history, to find the changes
+    most similar to a new one.
+
+    Each change is stored once, as an L2-normalized log-tf vector in per-term inverted
+    lists; IDF only weights the query terms, so adding changes never rewrites the index.
+    Queries use their `max_query_terms` rarest terms and the `max_postings` most recent
+    entries of each inverted list, which bounds their cost whatever the history size.
+    Changes are staged while a commit is processed and added by `commit`, so a commit
+    never finds its own changes.
+    """
+
+    def __init__(self, max_postings: int = 20000, max_query_terms: int = 32):
+        self.max_postings = max_postings
+        self.max_query_terms = max_query_terms
+        self.terms = {}
+        # Inverted list of each term: changes containing it and the term weight in them
+        self.postings_docs = []
+        self.postings_weights = []
+        self.keys = []
+        self.labels = bytearray()
+        self._docs_by_key = {}
+        self._docs_by_commit = {}
+        self._staged = []
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key: Tuple, tokens: Iterable[str], defective: bool = False):
+        """
+        Indexes a change, unless a change with the same key is already indexed.
+        """
+        if key in self._docs_by_key:
+            return
+        doc = len(self.keys)
+        counts = Counter(tokens)
+        norm = math.sqrt(sum((1 + math.log(count)) ** 2 for count in counts.values())) or 1.0
+        for term, count in counts.items():
+            term_id = self.terms.get(term)
+            if term_id is None:
+                term_id = self.terms[term] = len(self.postings_docs)
+                self.postings_docs.append(array("q"))
+                self.postings_weights.append(array("d"))
+            self.postings_docs[term_id].append(doc)
+            self.postings_weights[term_id].append((1 + math.log(count)) / norm)
+        self.keys.append(key)
+        self.labels.append(1 if defective else 0)
+        self._docs_by_key[key] = doc
+        self._docs_by_commit.setdefault(key[0], []).append(doc)
+
+    def stage(self, row: dict, tokens: List[str]):
+        """
+        Keeps a change of the current commit, to be indexed by `commit`.
+        """
+        self._staged.append((row, tokens))
+
+    def commit(self):
+        """
+        Indexes the changes staged since the last call, with the labels of their rows.
+        """
+        for row, tokens in self._staged:
+            self.add(row_key(row), tokens, is_defective(row))
+        self._staged = []
+
+    def update_labels(self, rows: Iterable[dict]):
+        """
+        Refreshes the defect labels of the indexed changes from labelled rows (e.g. the history CSV).
+        """
+        for row in rows:
+            doc = self._docs_by_key.get(row_key(row))
+            if doc is not None:
+                self.labels[doc] = 1 if is_defective(row) else 0
+
+    def query(self, tokens: Iterable[str], k: int = KNN_NEIGHBORS,
+              exclude_commit: Optional[str] = None) -> List[Tuple[int, float]]:
+        """
+        Most similar indexed changes.
+
+        Returns:
+            List[Tuple[int, float]]: (change, similarity) of at most `k` changes sharing terms
+            with the query, most similar first. The similarity, in [0, 1], is the cosine between
+            the IDF-weighted query and the log-tf vector of the change.
+        """
+        if not self.keys:
+            return []
+        n = len(self.keys)
+        weighted = []
+        norm = 0.0
+        for term, count in Counter(tokens).items():
+            term_id = self.terms.get(term)
+            df = 0 if term_id is None else len(self.postings_docs[term_id])
+            weight = (math.log((n + 1) / (df + 1)) + 1) * (1 + math.log(count))
+            norm += weight * weight
+            if term_id is not None:
+                weighted.append((weight, term_id))
+        if not weighted:
+            return []
+        norm = math.sqrt(norm)
+
+        scores = np.zeros(n)
+        # Rarest terms first: the most discriminant ones
+        for weight, term_id in sorted(weighted, reverse=True)[:self.max_query_terms]:
+            docs = np.frombuffer(self.postings_docs[term_id], dtype=np.int64)[-self.max_postings:]
+            weights = np.frombuffer(self.postings_weights[term_id], dtype=np.float64)[-self.max_postings:]
+            scores[docs] += weights * (weight / norm)
+        if exclude_commit is not None:
+            scores[self._docs_by_commit.get(exclude_commit, [])] = 0.0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(doc), float(scores[doc])) for doc in candidates]
+
+    def save(self, path: str):
+        save_pickle({key: getattr(self, key) for key in ("max_postings", "max_query_terms", "terms", "postings_docs",
+                                                         "postings_weights", "keys", "labels")}, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ChangeIndex":
+        state = load_pickle(path)
+        index = cls(state["max_postings"], state["max_query_terms"])
+        for key in ("terms", "postings_docs", "postings_weights", "keys", "labels"):
+            setattr(index, key, state[key])
+        for doc, key in enumerate(index.keys):
+            index._docs_by_key[key] = doc
+            index._docs_by_commit.setdefault(key[0], []).append(doc)
+        return index
+
+
+class DefectNeighbors:
+    """
+    Defect rate of, and distance to, the past block changes most similar to the current one.
+    """
+
+    def __init__(self, contribution: dict, block, additions, deletions, change_index: ChangeIndex,
+                 k: int = KNN_NEIGHBORS):
+        self.contribution = contribution
+        self.change_index = change_index
+        self.k = k
+        deleted_lines_content = [] if deletions is None else deletions.get_deleted_lines_content_in_a_block()
+        self.tokens = change_tokens(block, additions.get_added_lines_content_in_a_block(), deleted_lines_content)
+
+    def resume_defect_neighbors(self):
+        neighbors = self.change_index.query(self.tokens, self.k, exclude_commit=self.contribution.get("commit"))
+        # The change is indexed once its commit is done
+        self.change_index.stage(self.contribution, self.tokens)
+        if not neighbors:
+            return {"knn_defect_rate": 0.0, "knn_distance": 1.0, "knn_defective_distance": 1.0}
+        labels = [self.change_index.labels[doc] for doc, _ in neighbors]
+        distances = [1.0 - similarity for _, similarity in neighbors]
+        defective_distances = [distance for distance, label in zip(distances, labels) if label]
+        return {
+            # Share of defective changes among the k most similar past changes
+            "knn_defect_rate": sum(labels) / len(labels),
+            # Mean cosine distance to the k most similar past changes
+            "knn_distance": sum(distances) / len(distances),
+            # Cosine distance to the most similar defective one among them
+            "knn_defective_distance": min(defective_distances) if defective_distances else 1.0
+        }
+
+    @staticmethod
+    def get_headers():
+        return ["knn_defect_rate", "knn_distance", "knn_defective_distance"]
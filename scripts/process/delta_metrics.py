@@ -1,4 +1,8 @@
 
+# Block fields that are identifiers or positions, not metrics
+NON_METRIC_KEYS = ["block_identifiers", "block_name", "start_block", "end_block"]
+
+
 class DeltaMetrics:
     def __init__(self, block_after, block_before):
         """
@@ -32,7 +36,7 @@ class DeltaMetrics:
         
         for key, after_value in self.block_after.items():
             # filters
-            if key in ["block_identifiers", "block_name", "start_block", "end_block"]:
+            if key in NON_METRIC_KEYS:
                 continue
                 
             if isinstance(after_value, (int, float)):
@@ -42,3 +46,13 @@ class DeltaMetrics:
                     delta_results[f"{key}_delta"] = after_value - before_value
 
         return delta_results
+
+    @staticmethod
+    def get_headers(block_after) -> list:
+        """
+        Delta columns for a block: one per numeric metric of the block after change.
+        """
+        if not block_after:
+            return []
+        return [f"{key}_delta" for key, value in block_after.items()
+                if key not in NON_METRIC_KEYS and isinstance(value, (int, float))]
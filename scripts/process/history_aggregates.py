@@ -0,0 +1,248 @@
+from array import array
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, Tuple
+
+import numpy as np
+
+from scripts.process.history_record import HistoryRecord, date_to_us
+from scripts.process.history_spill import HistorySpill
+from scripts.utility.commit_filters import get_subs_dire_name
+from scripts.utility.pickle_file import load_pickle, save_pickle
+
+DAY_US = 86400 * 10 ** 6
+
+
+class HistoryAggregates:
+    """
+    Running aggregates of the contribution history, keyed by block and by author, from which
+    the process metrics of a block are read without going through the history rows.
+
+    Counts (changes, distinct authors and commits, defects, same-kind blocks, single-block
+    commits...) and the last change date are read in constant time. rexp and age add up a
+    function of each day age, floored and clipped at 0, which no running
+    sum can reproduce exactly: the aggregates keep the change dates of each author and block
+    for them, as int64 arrays reduced with NumPy.
+
+    The aggregates hold no row and can be saved, so JIT runs can load them instead of the
+    history CSV. Under a memory ceiling, the state growing with the changes and commits (dates,
+    same-commit changes, commits of each block, changes of each commit) moves to a HistorySpill
+    and is read back from it; only the per-block, per-kind and per-author counts stay in memory.
+    """
+
+    STATE = ("block_authors", "block_commits", "block_defects", "block_last_date", "block_dates",
+             "single_block_commits", "commit_rows", "kind_changes", "kind_authors", "author_dates",
+             "author_block_types", "author_subsystem_first", "author_commit_rows", "author_commits",
+             "author_changes", "block_ncommits")
+
+    def __init__(self):
+        # Per block (file, block_identifiers): changes per author, changes per commit, defective
+        # changes, date of the last change and dates of all the changes
+        self.block_authors: Dict[Tuple, Counter] = {}
+        self.block_commits: Dict[Tuple, Counter] = {}
+        self.block_ncommits = Counter()
+        self.block_defects = Counter()
+        self.block_last_date: Dict[Tuple, int] = {}
+        self.block_dates: Dict[Tuple, array] = {}
+        # Per block, number of commits whose only change is the block, and per commit its
+        # number of changes and first block
+        self.single_block_commits = Counter()
+        self.commit_rows: Dict[Hashable, list] = {}
+        # Per block kind (block, block_id): changes, and changes per author
+        self.kind_changes = Counter()
+        self.kind_authors = Counter()
+        # Per author: dates of the changes, changes per block type, rank of the first change in
+        # each subsystem, and (rank, block type) of the changes of each commit
+        self.author_dates: Dict[Hashable, array] = {}
+        self.author_block_types = Counter()
+        self.author_subsystem_first: Dict[Tuple, int] = {}
+        self.author_commit_rows: Dict[Tuple, list] = {}
+        # Number of commits of each author, the experience JIT runs count from the history rows
+        self.author_commits = Counter()
+        # Number of changes of each author
+        self.author_changes = Counter()
+        # Per-change arrays moved out of memory, if any
+        self.spill: HistorySpill = None
+        # rexp per (author, date) since the last change added, shared by the blocks of a commit
+        self._rexp: Dict[Tuple, float] = {}
+
+    @property
+    def commits(self):
+        # Commits not spilled (all of them in JIT runs)
+        return self.commit_rows.keys()
+
+    def add(self, row: dict):
+        """
+        Adds a contribution row, after the rows already added.
+        """
+        author, commit, block_type = row.get("author"), row.get("commit"), row.get("block")
+        file = row.get("file")
+        block = (file, row.get("block_identifiers"))
+        if isinstance(row, HistoryRecord):
+            date, subsystem = row.date_us or 0, row.subsystem
+        else:
+            date = date_to_us(row["date"]) if isinstance(row.get("date"), datetime) else 0
+            subsystem = get_subs_dire_name(file)[0] if file else None
+
+        self.block_authors.setdefault(block, Counter())[author] += 1
+        block_commits = self.block_commits.setdefault(block, Counter())
+        if not block_commits[commit] and not (self.spill is not None and self.spill.has_block_commit(block, commit)):
+            self.block_ncommits[block] += 1
+        block_commits[commit] += 1
+        self.block_defects[block] += int(row.get("fault_prone", 0) == 1)
+        self.block_last_date[block] = date
+        self.block_dates.setdefault(block, array("q")).append(date)
+
+        commit_rows = self.commit_rows.get(commit)
+        if commit_rows is None:
+            spilled = self.spill.commit_rows(commit) if self.spill is not None else None
+            commit_rows = self.commit_rows[commit] = spilled if spilled is not None else [0, block]
+        commit_rows[0] += 1
+        if commit_rows[0] == 1:
+            self.single_block_commits[block] += 1
+        elif commit_rows[0] == 2:
+            self.single_block_commits[commit_rows[1]] -= 1
+
+        kind = (block_type, row.get("block_id"))
+        self.kind_changes[kind] += 1
+        self.kind_authors[kind + (author,)] += 1
+
+        rank = self.author_changes[author]
+        self.author_changes[author] += 1
+        self.author_dates.setdefault(author, array("q")).append(date)
+        if self._rexp:
+            self._rexp.clear()
+        self.author_block_types[(author, block_type)] += 1
+        self.author_subsystem_first.setdefault((author, subsystem), rank)
+        commit_rows = self.author_commit_rows.setdefault((author, commit), [])
+        if not commit_rows and not (self.spill is not None and self.spill.author_commit_rows(author, commit)):
+            self.author_commits[author] += 1
+        commit_rows.append((rank, block_type))
+
+    def add_rows(self, rows: Iterable[dict]):
+        for row in rows:
+            self.add(row)
+
+    def spill_to(self, spill: HistorySpill):
+        """
+        Moves the per-change arrays to `spill`, leaving the counts in memory.
+        """
+        self.spill = spill
+        spill.add_author_dates((author, date) for author, dates in self.author_dates.items() for date in dates)
+        spill.add_block_dates(block + (date,) for block, dates in self.block_dates.items() for date in dates)
+        spill.add_author_commit_rows(key + row for key, rows in self.author_commit_rows.items() for row in rows)
+        spill.add_block_commits(block + (commit, changes) for block, commits in self.block_commits.items()
+                                for commit, changes in commits.items())
+        spill.set_commits((commit, changes) + block for commit, (changes, block) in self.commit_rows.items())
+        self.author_dates, self.block_dates, self.author_commit_rows, self.block_commits = {}, {}, {}, {}
+        self.commit_rows = {}
+
+    def _author_dates(self, author) -> np.ndarray:
+        dates = np.frombuffer(self.author_dates.get(author, array("q")), dtype=np.int64)
+        return np.concatenate((self.spill.author_dates(author), dates)) if self.spill is not None else dates
+
+    def _block_dates(self, block: Tuple) -> np.ndarray:
+        dates = np.frombuffer(self.block_dates.get(block, array("q")), dtype=np.int64)
+        return np.concatenate((self.spill.block_dates(*block), dates)) if self.spill is not None else dates
+
+    def _author_commit_rows(self, author, commit) -> list:
+        rows = self.author_commit_rows.get((author, commit), [])
+        return self.spill.author_commit_rows(author, commit) + rows if self.spill is not None else rows
+
+    def resume_process_metrics(self, contribution: dict) -> dict:
+        """
+        Process metrics of a block against the aggregated history, with the values and types
+        a scan of the history rows gives (see tests/process_metrics_reference.py).
+
+        Args:
+            contribution (dict): Row of the block.
+        """
+        author, commit, exp = contribution["author"], contribution["commit"], contribution["exp"]
+        block = (contribution["file"], contribution["block_identifiers"])
+        date = date_to_us(contribution["date"])
+        block_authors = self.block_authors.get(block, {})
+        is_instance = contribution["isResource"] == 1 or contribution["isData"] == 1
+        kind = (contribution["block"], contribution["block_id"])
+
+        rexp = sexp = bexp = 0
+        author_changes = self.author_changes.get(author, 0)
+        if author_changes:
+            # The blocks of a commit share the author and the date: one reduction per commit
+            rexp = self._rexp.get((author, date))
+            if rexp is None:
+                ages = np.maximum((date - self._author_dates(author)) // DAY_US, 0)
+                # Sequential sum, as a loop over the rows of the author
+                rexp = self._rexp[(author, date)] = float(np.cumsum(1 / (ages + 1))[-1])
+            # Changes of the current commit do not count (a commit already in the history)
+            same_commit = self._author_commit_rows(author, commit)
+            bexp = self.author_block_types[(author, contribution["block"])] - sum(
+                1 for _, block_type in same_commit if block_type == contribution["block"])
+            first = self.author_subsystem_first.get((author, get_subs_dire_name(contribution["file"])[0]))
+            if first is not None:
+                # Changes of the author from the first one in the subsystem on
+                sexp = author_changes - first - sum(1 for rank, _ in same_commit if rank >= first)
+
+        age, time_interval = 0.0, 0
+        if block in self.block_last_date:
+            age = np.mean(np.maximum((date - self._block_dates(block)) // DAY_US, 0))
+            time_interval = (date - self.block_last_date[block]) // DAY_US
+
+        return {
+            "ndevs": len(block_authors),
+            "ncommits": self.block_ncommits.get(block, 0),
+            "code_ownership": block_authors.get(author, 0) / exp if exp != 0 else 0,
+            "exp": exp,
+            "rexp": rexp,
+            "sexp": sexp,
+            "bexp": bexp,
+            "age": age,
+            "time_interval": time_interval,
+            "num_defects_before": self.block_defects.get(block, 0),
+            "num_same_instances_changed_before": self.kind_changes.get(kind, 0) if is_instance else 0,
+            "kexp": self.kind_authors.get(kind + (author,), 0) if is_instance else 0,
+            "num_unique_change": self.single_block_commits.get(block, 0)
+        }
+
+    def save(self, path: str):
+        state = {key: getattr(self, key) for key in self.STATE}
+        if self.spill is not None:
+            # The saved aggregates hold all the changes again
+            state.update(self._unspilled())
+        save_pickle(state, path)
+
+    def _unspilled(self) -> dict:
+        author_dates, block_dates, author_commit_rows, block_commits = {}, {}, {}, {}
+        commit_rows = {commit: [changes, (file, identifiers)]
+                       for commit, changes, file, identifiers in self.spill.all_commit_rows()}
+        commit_rows.update(self.commit_rows)
+        for author, date in self.spill.all_author_dates():
+            author_dates.setdefault(author, array("q")).append(date)
+        for file, identifiers, date in self.spill.all_block_dates():
+            block_dates.setdefault((file, identifiers), array("q")).append(date)
+        for author, commit, rank, block_type in self.spill.all_author_commit_rows():
+            author_commit_rows.setdefault((author, commit), []).append((rank, block_type))
+        for file, identifiers, commit, changes in self.spill.all_block_commits():
+            block_commits.setdefault((file, identifiers), Counter())[commit] += changes
+        for key, dates in self.author_dates.items():
+            author_dates.setdefault(key, array("q")).extend(dates)
+        for key, dates in self.block_dates.items():
+            block_dates.setdefault(key, array("q")).extend(dates)
+        for key, rows in self.author_commit_rows.items():
+            author_commit_rows.setdefault(key, []).extend(rows)
+        for key, commits in self.block_commits.items():
+            block_commits.setdefault(key, Counter()).update(commits)
+        return {"author_dates": author_dates, "block_dates": block_dates, "author_commit_rows": author_commit_rows,
+                "block_commits": block_commits, "commit_rows": commit_rows}
+
+    @classmethod
+    def load(cls, path: str) -> "HistoryAggregates":
+        aggregates = cls()
+        state = load_pickle(path)
+        for key, value in state.items():
+            setattr(aggregates, key, value)
+        # Aggregates saved before the counts below
+        if "author_changes" not in state:
+            aggregates.author_changes = Counter({author: len(dates) for author, dates in aggregates.author_dates.items()})
+        if "block_ncommits" not in state:
+            aggregates.block_ncommits = Counter({block: len(commits) for block, commits in aggregates.block_commits.items()})
+        return aggregates
@@ -0,0 +1,86 @@
+"""
+Memory of the history rows kept by the process metrics: contribution dicts as read from a
+metrics CSV versus the compact HistoryRecords of a HistoryStore.
+
+Usage:
+    python scripts/process/history_memory.py metrics.csv [--rows N]
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tracemalloc
+from datetime import datetime
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from scripts.process.history_record import HistoryInterner
+
+MILLION = 10 ** 6
+
+
+def read_rows(csv_path: str, limit: int = None) -> List[dict]:
+    rows = []
+    with open(csv_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if limit is not None and len(rows) >= limit:
+                break
+            try:
+                row["date"] = datetime.fromisoformat(row["date"])
+            except (KeyError, TypeError, ValueError):
+                pass
+            rows.append(row)
+    return rows
+
+
+def traced_size(build: Callable[[], object]) -> int:
+    """
+    Bytes still allocated by `build` once it returns (its result kept alive).
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    del result
+    return size
+
+
+def measure(csv_path: str, limit: int = None) -> dict:
+    """
+    Bytes per row of the history kept as dicts and as compact records.
+    """
+    rows_size = traced_size(lambda: read_rows(csv_path, limit))
+    rows = read_rows(csv_path, limit)
+
+    def compact():
+        interner = HistoryInterner()
+        return interner, [interner.record(row) for row in rows]
+
+    records_size = traced_size(compact)
+    count = max(len(rows), 1)
+    return {"rows": len(rows), "dict_bytes_per_row": rows_size / count, "record_bytes_per_row": records_size / count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory saved per million history rows by the compact records.")
+    parser.add_argument("csv_path", help="Metrics CSV of a full run")
+    parser.add_argument("--rows", type=int, default=None, help="Read at most this many rows")
+    args = parser.parse_args()
+
+    result = measure(args.csv_path, args.rows)
+    dict_mb = result["dict_bytes_per_row"] * MILLION / 2 ** 20
+    record_mb = result["record_bytes_per_row"] * MILLION / 2 ** 20
+    print(f"Rows measured: {result['rows']}")
+    print(f"Dict rows:       {result['dict_bytes_per_row']:.0f} B/row, {dict_mb:.0f} MB per million rows")
+    print(f"Compact records: {result['record_bytes_per_row']:.0f} B/row, {record_mb:.0f} MB per million rows")
+    print(f"Saving:          {dict_mb - record_mb:.0f} MB per million rows "
+          f"({result['dict_bytes_per_row'] / max(result['record_bytes_per_row'], 1):.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Hashable, List, Optional
+
+from scripts.utility.commit_filters import get_subs_dire_name
+
+_EPOCH_AWARE = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_NAIVE = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def date_to_us(date: datetime) -> int:
+    """
+    Microseconds since the epoch of a commit date, so that `(a - b) // DAY_US` is
+    `(date_a - date_b).days`.
+    """
+    return (date - (_EPOCH_AWARE if date.tzinfo is not None else _EPOCH_NAIVE)) // _MICROSECOND
+
+
+def us_to_date(date_us: int, tzinfo) -> datetime:
+    if tzinfo is None:
+        return _EPOCH_NAIVE + timedelta(microseconds=date_us)
+    return (_EPOCH_AWARE + timedelta(microseconds=date_us)).astimezone(tzinfo)
+
+
+class HistoryInterner:
+    """
+    Integer ids of the strings repeated across the history rows (authors, files, block
+    identifiers, subsystems), and compaction of the rows into HistoryRecords.
+    """
+
+    def __init__(self):
+        self.ids: Dict[Hashable, int] = {}
+        self.values: List[Hashable] = []
+        # Subsystem id of each file id
+        self._subsystems: Dict[int, int] = {}
+        # The rows of a commit share their date
+        self._last_date = None
+        self._last_date_us = None
+
+    def id(self, value: Hashable) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def intern(self, value: Hashable) -> Hashable:
+        return self.values[self.id(value)]
+
+    def subsystem_id(self, file_id: int) -> int:
+        subsystem_id = self._subsystems.get(file_id)
+        if subsystem_id is None:
+            file = self.values[file_id]
+            subsystem_id = self._subsystems[file_id] = self.id(get_subs_dire_name(file)[0] if file else None)
+        return subsystem_id
+
+    def record(self, row) -> "HistoryRecord":
+        """
+        Compact record of a contribution row, keeping the fields the history is read for.
+        """
+        if isinstance(row, HistoryRecord):
+            return row
+        date = row.get("date")
+        if date is not self._last_date:
+            self._last_date = date
+            self._last_date_us = date_to_us(date) if isinstance(date, datetime) else None
+        file_id = self.id(row.get("file"))
+        return HistoryRecord(self, row.get("commit"), self.id(row.get("author")), file_id,
+                             self.id(row.get("block_identifiers")), self.subsystem_id(file_id),
+                             self.intern(row.get("block")), self.intern(row.get("block_id")), self._last_date_us,
+                             self.intern(date.tzinfo) if self._last_date_us is not None else None,
+                             self.intern(row.get("fault_prone", 0)))
+
+
+class HistoryRecord:
+    """
+    History row reduced to the fields the process metrics, the co-change graph, the index of
+    past changes and the process windows read, with interned ids instead of strings and the
+    date as int64 microseconds. The commit hash, shared by the rows of a commit only, is kept
+    as is rather than interned for the whole run.
+
+    Records are read like the rows they replace (`record["file"]`, `record.get("date")`); the
+    other columns of the row are not kept. A date that was not a datetime reads as None.
+    """
+
+    __slots__ = ("interner", "commit", "author_id", "file_id", "identifiers_id", "subsystem_id", "block",
+                 "block_id", "date_us", "tzinfo", "fault_prone")
+
+    KEYS = frozenset({"commit", "author", "file", "block_identifiers", "subsystem", "block", "block_id", "date",
+                      "fault_prone"})
+
+    def __init__(self, interner: HistoryInterner, commit, author_id: int, file_id: int, identifiers_id: int,
+                 subsystem_id: int, block, block_id, date_us: Optional[int], tzinfo, fault_prone):
+        self.interner = interner
+        self.commit = commit
+        self.author_id = author_id
+        self.file_id = file_id
+        self.identifiers_id = identifiers_id
+        self.subsystem_id = subsystem_id
+        self.block = block
+        self.block_id = block_id
+        self.date_us = date_us
+        self.tzinfo = tzinfo
+        self.fault_prone = fault_prone
+
+    @property
+    def author(self):
+        return self.interner.values[self.author_id]
+
+    @property
+    def file(self):
+        return self.interner.values[self.file_id]
+
+    @property
+    def block_identifiers(self):
+        return self.interner.values[self.identifiers_id]
+
+    @property
+    def subsystem(self):
+        return self.interner.values[self.subsystem_id]
+
+    @property
+    def date(self) -> Optional[datetime]:
+        return us_to_date(self.date_us, self.tzinfo) if self.date_us is not None else None
+
+    def __getitem__(self, key: str):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.KEYS else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.KEYS
+
+    def __repr__(self):
+        return f"HistoryRecord({ {key: self[key] for key in sorted(self.KEYS)} })"
@@ -0,0 +1,113 @@
+import os
+import sqlite3
+import tempfile
+from typing import Hashable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Page cache of the SQLite connection, so the spill itself stays within a few MB of memory
+CACHE_SIZE_KB = 8 * 1024
+
+_SCHEMA = """
+CREATE TABLE author_dates (author, date_us INTEGER);
+CREATE INDEX author_dates_author ON author_dates (author);
+CREATE TABLE block_dates (file, identifiers, date_us INTEGER);
+CREATE INDEX block_dates_block ON block_dates (file, identifiers);
+CREATE TABLE author_commit_rows (author, commit_hash, rank INTEGER, block);
+CREATE INDEX author_commit_rows_key ON author_commit_rows (author, commit_hash);
+CREATE TABLE block_commits (file, identifiers, commit_hash, changes INTEGER);
+CREATE TABLE commits (commit_hash PRIMARY KEY, changes INTEGER, file, identifiers);
+CREATE INDEX block_commits_key ON block_commits (file, identifiers, commit_hash);
+"""
+
+class HistorySpill:
+    """
+    On-disk part of a history that outgrew its memory ceiling: the per-change arrays of the
+    HistoryAggregates, in a temporary SQLite file indexed on the keys they are read by.
+
+    Entries keep their insertion order (SQLite rowid order), so a spilled sequence followed by
+    the one still in memory is the sequence an unbounded history would hold.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """
+        Args:
+            directory (Optional[str]): Directory of the SQLite file (default: the system
+                temporary directory); the file is deleted by `close`.
+        """
+        fd, self.path = tempfile.mkstemp(prefix="tf-metrics-history-", suffix=".sqlite", dir=directory)
+        os.close(fd)
+        self.connection = sqlite3.connect(self.path)
+        # Scratch data: no journal, no fsync
+        self.connection.execute("PRAGMA journal_mode = OFF")
+        self.connection.execute("PRAGMA synchronous = OFF")
+        self.connection.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KB}")
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def add_author_dates(self, dates: Iterable[Tuple[Hashable, int]]):
+        with self.connection:
+            self.connection.executemany("INSERT INTO author_dates VALUES (?, ?)", dates)
+
+    def add_block_dates(self, dates: Iterable[Tuple[Hashable, Hashable, int]]):
+        with self.connection:
+            self.connection.executemany("INSERT INTO block_dates VALUES (?, ?, ?)", dates)
+
+    def add_author_commit_rows(self, rows: Iterable[Tuple[Hashable, Hashable, int, Hashable]]):
+        with self.connection:
+            self.connection.executemany("INSERT INTO author_commit_rows VALUES (?, ?, ?, ?)", rows)
+
+    def add_block_commits(self, commits: Iterable[Tuple[Hashable, Hashable, Hashable, int]]):
+        with self.connection:
+            self.connection.executemany("INSERT INTO block_commits VALUES (?, ?, ?, ?)", commits)
+
+    def set_commits(self, commits: Iterable[Tuple[Hashable, int, Hashable, Hashable]]):
+        with self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?)", commits)
+
+    def _dates(self, query: str, values: Tuple) -> np.ndarray:
+        return np.fromiter((date for date, in self.connection.execute(query, values)), dtype=np.int64)
+
+    def author_dates(self, author) -> np.ndarray:
+        return self._dates("SELECT date_us FROM author_dates WHERE author IS ? ORDER BY rowid", (author,))
+
+    def block_dates(self, file, identifiers) -> np.ndarray:
+        return self._dates("SELECT date_us FROM block_dates WHERE file IS ? AND identifiers IS ? ORDER BY rowid",
+                           (file, identifiers))
+
+    def author_commit_rows(self, author, commit) -> List[Tuple[int, Hashable]]:
+        return self.connection.execute(
+            "SELECT rank, block FROM author_commit_rows WHERE author IS ? AND commit_hash IS ? ORDER BY rowid",
+            (author, commit)).fetchall()
+
+    def commit_rows(self, commit) -> Optional[list]:
+        """
+        [number of changes, first block] of a spilled commit.
+        """
+        row = self.connection.execute("SELECT changes, file, identifiers FROM commits WHERE commit_hash IS ?",
+                                      (commit,)).fetchone()
+        return [row[0], row[1:]] if row is not None else None
+
+    def has_block_commit(self, block: Tuple, commit) -> bool:
+        return self.connection.execute(
+            "SELECT 1 FROM block_commits WHERE file IS ? AND identifiers IS ? AND commit_hash IS ? LIMIT 1",
+            block + (commit,)).fetchone() is not None
+
+    def all_commit_rows(self) -> Iterator[Tuple[Hashable, int, Hashable, Hashable]]:
+        return self.connection.execute("SELECT commit_hash, changes, file, identifiers FROM commits ORDER BY rowid")
+
+    def all_author_dates(self) -> Iterator[Tuple[Hashable, int]]:
+        return self.connection.execute("SELECT author, date_us FROM author_dates ORDER BY rowid")
+
+    def all_block_dates(self) -> Iterator[Tuple[Hashable, Hashable, int]]:
+        return self.connection.execute("SELECT file, identifiers, date_us FROM block_dates ORDER BY rowid")
+
+    def all_block_commits(self) -> Iterator[Tuple[Hashable, Hashable, Hashable, int]]:
+        return self.connection.execute("SELECT file, identifiers, commit_hash, changes FROM block_commits ORDER BY rowid")
+
+    def all_author_commit_rows(self) -> Iterator[Tuple[Hashable, Hashable, int, Hashable]]:
+        return self.connection.execute("SELECT author, commit_hash, rank, block FROM author_commit_rows ORDER BY rowid")
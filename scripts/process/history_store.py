@@ -0,0 +1,99 @@
+from typing import Iterable, Iterator, List, Optional
+
+from scripts.process.history_aggregates import HistoryAggregates
+from scripts.process.history_record import HistoryInterner
+from scripts.process.history_spill import HistorySpill
+
+# Memory freed per row when the aggregates spill (their per-change state), measured with
+# tracemalloc; sets the rows added between two spills under a ceiling
+ROW_BYTES = 272
+
+
+class HistoryStore:
+    """
+    Contribution rows of the history, in insertion order. The store is a drop-in for the
+    previous_contributions list (append, extend, iteration, len).
+
+    The store also maintains the HistoryAggregates of its rows, from which ProcessMetrics reads
+    the metrics. A store created from saved aggregates (e.g. in a JIT
+    run) measures blocks against them without holding the rows.
+
+    A compact store keeps each row as a HistoryRecord (interned ids, int64 date) instead of
+    the contribution dict with all its columns. A store that does not keep its rows (full runs,
+    whose other consumers of the history keep their own state) only counts them and adds them
+    to its aggregates. With a memory ceiling, such a store also moves the per-change arrays of
+    its aggregates to a HistorySpill on disk whenever those in memory would outgrow the ceiling.
+    """
+
+    def __init__(self, rows: Iterable[dict] = (), aggregates: HistoryAggregates = None, compact: bool = False,
+                 keep_rows: bool = True, memory_limit_mb: Optional[float] = None, spill_dir: Optional[str] = None):
+        """
+        Args:
+            rows (Iterable[dict]): Initial rows.
+            aggregates (HistoryAggregates): Aggregates of rows not in the store (e.g. loaded).
+            compact (bool): Keep the rows as HistoryRecords.
+            keep_rows (bool): Keep the rows; otherwise only their number and aggregates are kept
+                (their strings still interned, as they key the aggregates).
+            memory_limit_mb (Optional[float]): Memory ceiling of the aggregates in MB, for a store
+                that does not keep its rows; None keeps everything in memory.
+            spill_dir (Optional[str]): Directory of the spill file (default: temporary directory).
+        """
+        if memory_limit_mb is not None and keep_rows:
+            raise ValueError("A memory ceiling applies to a history that does not keep its rows")
+        self.rows: List[dict] = []
+        self.keep_rows = keep_rows
+        self.aggregates = aggregates if aggregates is not None else HistoryAggregates()
+        self.interner = HistoryInterner() if compact or not keep_rows else None
+        self.max_rows = max(int(memory_limit_mb * 1024 * 1024 / ROW_BYTES), 1) if memory_limit_mb is not None else None
+        self.spill_dir = spill_dir
+        self.spill: Optional[HistorySpill] = None
+        # Rows added, and rows added since the last spill
+        self._count = 0
+        self._unspilled = 0
+        self.extend(rows)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self) -> Iterator[dict]:
+        self._check_rows()
+        return iter(self.rows)
+
+    def __getitem__(self, index):
+        self._check_rows()
+        return self.rows[index]
+
+    def _check_rows(self):
+        if not self.keep_rows:
+            raise ValueError("The rows of this history are not kept")
+
+    def append(self, row: dict):
+        if self.interner is not None:
+            row = self.interner.record(row)
+        if self.keep_rows:
+            self.rows.append(row)
+        self._count += 1
+        self.aggregates.add(row)
+        self._unspilled += 1
+        if self.max_rows is not None and self._unspilled > self.max_rows:
+            self._spill()
+
+    def extend(self, rows: Iterable[dict]):
+        for row in rows:
+            self.append(row)
+
+    def _spill(self):
+        """
+        Moves the per-change arrays of the aggregates to the spill.
+        """
+        if self.spill is None:
+            self.spill = HistorySpill(self.spill_dir)
+        self.aggregates.spill_to(self.spill)
+        self._unspilled = 0
+
+    def close(self):
+        """
+        Deletes the spill, if any; the aggregates can no longer read the spilled arrays.
+        """
+        if self.spill is not None:
+            self.spill.close()
@@ -2,22 +2,26 @@ from pydriller import ModifiedFile
 from scripts.process.lines_change.additions import Additions
 from scripts.process.lines_change.code_churn import CodeChurn
 from scripts.process.lines_change.deletions import Deletions
+from scripts.process.lines_change.parsed_diff import ParsedDiff
 
 
 class ImpactedLines:
 
-    def __init__(self, mod: ModifiedFile, block, blockBefore):
+    def __init__(self, mod: ModifiedFile, block, blockBefore, parsed_diff: ParsedDiff = None):
         self.mod = mod
+        # filtered diff of the file, computed once for all its blocks
+        self.parsed_diff = parsed_diff if parsed_diff is not None else ParsedDiff(mod)
         # current block
         self.block = block
         # the same block that changed before
         self.blockBefore = blockBefore
         # churn of change
-        self.churn = CodeChurn(self.mod, self.blockBefore, self.block)
-        self.additions = Additions(self.mod, self.block["start_block"], self.block["end_block"])
+        self.churn = CodeChurn(self.mod, self.blockBefore, self.block, self.parsed_diff)
+        self.additions = Additions(self.mod, self.block["start_block"], self.block["end_block"], self.parsed_diff)
         self.deletions = None
         if blockBefore is not None:
-            self.deletions = Deletions(self.mod, self.blockBefore["start_block"], self.blockBefore["end_block"])
+            self.deletions = Deletions(self.mod, self.blockBefore["start_block"], self.blockBefore["end_block"],
+                                       self.parsed_diff)
 
     """
        Code Churn Features
@@ -1,22 +1,24 @@
+from bisect import bisect_left, bisect_right
 import shlex
 from collections import Counter
 import math
 from pydriller import ModifiedFile
 # Updated imports for new location
-from scripts.utility.utiliy import UtilityChange
-from scripts.utility.filter_values import filter_values_between_start_end
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.filter_values import (count_sorted_values_between_start_end,
+                                           filter_sorted_values_between_start_end)
 
 
 class Additions:
 
-    def __init__(self, mod: ModifiedFile, start=0, end=0):
+    def __init__(self, mod: ModifiedFile, start=0, end=0, parsed_diff: ParsedDiff = None):
         self.mod = mod
         self.start = start
         self.end = end
-        self.utility = UtilityChange()
-        # Exclude @@ empty-lines, @@ comments
-        self.added_lines_content = self.utility.exclude_special_lines(self.mod.diff_parsed['added'])
-        self.added_lines = [added[0] for added in self.added_lines_content]
+        # Filtered diff of the file, shared between the blocks of a same file
+        self.parsed_diff = parsed_diff if parsed_diff is not None else ParsedDiff(mod)
+        self.added_lines_content = self.parsed_diff.added_lines_content
+        self.added_lines = self.parsed_diff.added_lines
 
     def get_added_lines_in_a_file(self):
         return self.added_lines
@@ -25,7 +27,39 @@ class Additions:
         return self.added_lines_content
 
     def get_added_lines_in_a_block(self):
-        return filter_values_between_start_end(self.added_lines, self.start, self.end)
+        return filter_sorted_values_between_start_end(self.added_lines, self.start, self.end)
+
+    def get_added_lines_content_in_a_block(self):
+        # (line, content) pairs strictly inside the block, a slice of the sorted file diff
+        lines = self.added_lines
+        return self.added_lines_content[bisect_right(lines, self.start):bisect_left(lines, self.end)]
 
     def count_added_lines_in_a_block(self):
-        return len(self.get_added_lines_in_a_block())
+        return count_sorted_values_between_start_end(self.added_lines, self.start, self.end)
+
+    """
+        Token Features (statistics of the added lines inside the block)
+    """
+    def _token_summary(self):
+        return self.parsed_diff.added_stats.summary(self.start, self.end)
+
+    def sum_added_line_token(self):
+        return self._token_summary()["sum_token"]
+
+    def avg_added_line_token(self):
+        return self._token_summary()["avg_token"]
+
+    def max_added_line_token(self):
+        return self._token_summary()["max_token"]
+
+    def sum_added_line_length(self):
+        return self._token_summary()["sum_length"]
+
+    def avg_added_line_length(self):
+        return self._token_summary()["avg_length"]
+
+    def max_added_line_length(self):
+        return self._token_summary()["max_length"]
+
+    def text_entropy_for_added_lines(self):
+        return self._token_summary()["entropy"]
@@ -1,5 +1,6 @@
 from scripts.process.lines_change.additions import Additions
 from scripts.process.lines_change.deletions import Deletions
+from scripts.process.lines_change.parsed_diff import ParsedDiff
 
 
 class CodeChurn:
@@ -13,17 +14,20 @@ class CodeChurn:
     * average codes churn per commit.
     """
 
-    def __init__(self, mod, blockBeforeChange, blockAfterChange):
+    def __init__(self, mod, blockBeforeChange, blockAfterChange, parsed_diff: ParsedDiff = None):
         self.mod = mod
+        self.parsed_diff = parsed_diff if parsed_diff is not None else ParsedDiff(mod)
         self.blockBeforeChange = blockBeforeChange
         self.blockAfterChange = blockAfterChange
 
     def count_code_churn_block(self):
-        additions = Additions(self.mod, self.blockAfterChange["start_block"], self.blockAfterChange["end_block"])
+        additions = Additions(self.mod, self.blockAfterChange["start_block"], self.blockAfterChange["end_block"],
+                              self.parsed_diff)
         deletionsCpt = 0
 
         if self.blockBeforeChange is not None:
-            deletions = Deletions(self.mod, self.blockBeforeChange["start_block"], self.blockBeforeChange["end_block"])
+            deletions = Deletions(self.mod, self.blockBeforeChange["start_block"], self.blockBeforeChange["end_block"],
+                                  self.parsed_diff)
             deletionsCpt = deletions.count_deleted_lines_in_a_block()
 
         # if self.add_deleted_lines_to_churn:
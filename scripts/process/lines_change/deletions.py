@@ -1,19 +1,22 @@
+from bisect import bisect_left, bisect_right
 from typing import List
 from pydriller import ModifiedFile
 # Updated imports for new location
-from scripts.utility.utiliy import UtilityChange
-from scripts.utility.filter_values import filter_values_between_start_end
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.filter_values import (count_sorted_values_between_start_end,
+                                           filter_sorted_values_between_start_end)
 
 
 class Deletions:
 
-    def __init__(self, mod: ModifiedFile, start=0, end=0):
+    def __init__(self, mod: ModifiedFile, start=0, end=0, parsed_diff: ParsedDiff = None):
         self.mod = mod
         self.start = start
         self.end = end
-        self.utility = UtilityChange()
-        self.deleted_lines_content = self.utility.exclude_special_lines(self.mod.diff_parsed['deleted'])
-        self.deleted_lines = [deleted[0] for deleted in self.deleted_lines_content]
+        # Filtered diff of the file, shared between the blocks of a same file
+        self.parsed_diff = parsed_diff if parsed_diff is not None else ParsedDiff(mod)
+        self.deleted_lines_content = self.parsed_diff.deleted_lines_content
+        self.deleted_lines = self.parsed_diff.deleted_lines
 
     def get_deleted_lines_in_a_file(self) -> List[int]:
         return self.deleted_lines
@@ -22,7 +25,39 @@ class Deletions:
         return self.deleted_lines_content
 
     def get_deleted_lines_in_a_block(self):
-        return filter_values_between_start_end(self.deleted_lines, self.start, self.end)
+        return filter_sorted_values_between_start_end(self.deleted_lines, self.start, self.end)
+
+    def get_deleted_lines_content_in_a_block(self):
+        # (line, content) pairs strictly inside the block, a slice of the sorted file diff
+        lines = self.deleted_lines
+        return self.deleted_lines_content[bisect_right(lines, self.start):bisect_left(lines, self.end)]
 
     def count_deleted_lines_in_a_block(self):
-        return len(self.get_deleted_lines_in_a_block())
+        return count_sorted_values_between_start_end(self.deleted_lines, self.start, self.end)
+
+    """
+        Token Features (statistics of the removed lines inside the block)
+    """
+    def _token_summary(self):
+        return self.parsed_diff.deleted_stats.summary(self.start, self.end)
+
+    def sum_removed_line_token(self):
+        return self._token_summary()["sum_token"]
+
+    def avg_removed_line_token(self):
+        return self._token_summary()["avg_token"]
+
+    def max_removed_line_token(self):
+        return self._token_summary()["max_token"]
+
+    def sum_removed_line_length(self):
+        return self._token_summary()["sum_length"]
+
+    def avg_removed_line_length(self):
+        return self._token_summary()["avg_length"]
+
+    def max_removed_line_length(self):
+        return self._token_summary()["max_length"]
+
+    def text_entropy_for_removed_lines(self):
+        return self._token_summary()["entropy"]
@@ -0,0 +1,85 @@
+import shlex
+from bisect import bisect_left, bisect_right
+from typing import List, Tuple
+
+import numpy as np
+
+
+def tokenize_line(content: str) -> List[str]:
+    """
+    Splits a changed line into shell-like tokens (quoted strings stay one token).
+    Lines with an unbalanced quote, e.g. the first line of a multi-line string,
+    fall back to a plain whitespace split.
+    """
+    try:
+        return shlex.split(content)
+    except ValueError:
+        return content.split()
+
+
+class LineTokenStats:
+    """
+    Token counts, lengths and token ids of the added (or deleted) lines of a file.
+
+    Each line is tokenized once, when the statistics are built; the statistics of a
+    block are then NumPy reductions over the range of its lines.
+    """
+
+    def __init__(self, lines_content: List[Tuple[int, str]]):
+        self.lines = [line for line, _ in lines_content]
+        vocabulary = {}
+        token_ids = []
+        token_counts = []
+        for _, content in lines_content:
+            tokens = tokenize_line(content)
+            token_counts.append(len(tokens))
+            token_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+        self.token_counts = np.array(token_counts, dtype=np.int64)
+        self.lengths = np.array([len(content) for _, content in lines_content], dtype=np.int64)
+        self.token_ids = np.array(token_ids, dtype=np.int64)
+        # Tokens of line i are token_ids[token_offsets[i]:token_offsets[i + 1]]
+        self.token_offsets = np.concatenate(([0], np.cumsum(self.token_counts)))
+        self._summaries = {}
+
+    def line_range(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Index range of the lines strictly between `start` and `end`.
+        """
+        return bisect_right(self.lines, start), bisect_left(self.lines, end)
+
+    def summary(self, start: int, end: int) -> dict:
+        """
+        Token and length statistics of the lines strictly inside a block.
+
+        Returns:
+            dict: sum_token, avg_token, max_token, sum_length, avg_length, max_length
+            and entropy (Shannon entropy, in bits, of the tokens of the block's lines).
+        """
+        key = (start, end)
+        if key not in self._summaries:
+            self._summaries[key] = self._compute_summary(*self.line_range(start, end))
+        return self._summaries[key]
+
+    def _compute_summary(self, first: int, last: int) -> dict:
+        if last <= first:
+            return {"sum_token": 0, "avg_token": 0, "max_token": 0, "sum_length": 0, "avg_length": 0,
+                    "max_length": 0, "entropy": 0}
+        token_counts = self.token_counts[first:last]
+        lengths = self.lengths[first:last]
+        return {
+            "sum_token": int(token_counts.sum()),
+            "avg_token": float(token_counts.mean()),
+            "max_token": int(token_counts.max()),
+            "sum_length": int(lengths.sum()),
+            "avg_length": float(lengths.mean()),
+            "max_length": int(lengths.max()),
+            "entropy": self._entropy(self.token_ids[self.token_offsets[first]:self.token_offsets[last]])
+        }
+
+    @staticmethod
+    def _entropy(token_ids: np.ndarray) -> float:
+        if token_ids.size == 0:
+            return 0
+        _, counts = np.unique(token_ids, return_counts=True)
+        probabilities = counts / token_ids.size
+        return float((probabilities * np.log2(1 / probabilities)).sum())
@@ -0,0 +1,51 @@
+from pydriller import ModifiedFile
+from scripts.process.lines_change.line_tokens import LineTokenStats
+from scripts.utility.utiliy import UtilityChange
+
+
+class ParsedDiff:
+    """
+    Filtered diff of a ModifiedFile, computed once and shared by the feature
+    extractors of all its impacted blocks (ImpactedBlocks, ImpactedLines,
+    CodeChurn, Additions, Deletions). Line numbers are in ascending order, as in
+    the diff, so the per-block lookups can bisect them.
+    """
+
+    def __init__(self, mod: ModifiedFile):
+        utility = UtilityChange()
+        diff_parsed = mod.diff_parsed
+        # Exclude @@ empty-lines, @@ comments
+        self.added_lines_content = utility.exclude_special_lines(diff_parsed['added'])
+        self.added_lines = [added[0] for added in self.added_lines_content]
+        self.deleted_lines_content = utility.exclude_special_lines(diff_parsed['deleted'])
+        self.deleted_lines = [deleted[0] for deleted in self.deleted_lines_content]
+        self._added_stats = None
+        self._deleted_stats = None
+
+    @classmethod
+    def combine(cls, added_from: "ParsedDiff", deleted_from: "ParsedDiff") -> "ParsedDiff":
+        """
+        Diff whose added lines come from one file and deleted lines from another, for a
+        block moved between files (its before version is in the other file).
+        """
+        combined = cls.__new__(cls)
+        combined.added_lines_content = added_from.added_lines_content
+        combined.added_lines = added_from.added_lines
+        combined._added_stats = added_from._added_stats
+        combined.deleted_lines_content = deleted_from.deleted_lines_content
+        combined.deleted_lines = deleted_from.deleted_lines
+        combined._deleted_stats = deleted_from._deleted_stats
+        return combined
+
+    @property
+    def added_stats(self) -> LineTokenStats:
+        # Built on first use: only the tokens feature family needs it
+        if self._added_stats is None:
+            self._added_stats = LineTokenStats(self.added_lines_content)
+        return self._added_stats
+
+    @property
+    def deleted_stats(self) -> LineTokenStats:
+        if self._deleted_stats is None:
+            self._deleted_stats = LineTokenStats(self.deleted_lines_content)
+        return self._deleted_stats
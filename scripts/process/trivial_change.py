@@ -0,0 +1,138 @@
+import re
+from bisect import bisect_left, bisect_right
+from typing import Iterator, List, Tuple
+
+from pydriller import ModifiedFile
+
+from scripts.codes.hcl_tokenizer import multiline_token_lines, tokenize
+
+# What process_commit does with trivial changes: compute them as usual, drop them,
+# or emit a short row flagged with trivial_change = 1
+TRIVIAL_MODES = ["keep", "skip", "flag"]
+
+_HUNK_HEADER = re.compile(r"@@ -(\d+)(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+
+def token_fingerprint(text: str) -> Tuple[str, ...]:
+    """
+    HCL tokens of a text without whitespace, comments and description values, so
+    formatting-only, comment-only and description-only edits leave it unchanged.
+    """
+    tokens = [token for token in tokenize(text or "") if token.kind != "COMMENT"]
+    fingerprint = []
+    i = 0
+    n = len(tokens)
+    while i < n:
+        token = tokens[i]
+        # description = "..." / <<EOT ... EOT, like UtilityChange.exclude_special_lines
+        if (token.kind == "IDENT" and token.value == "description" and i + 2 < n and tokens[i + 1].value == "="
+                and tokens[i + 2].kind in ("STRING", "HEREDOC")
+                and (i + 3 == n or tokens[i + 3].kind == "NEWLINE" or tokens[i + 3].value == "}")):
+            i += 3
+            continue
+        if token.kind != "NEWLINE":
+            fingerprint.append(token.value)
+        i += 1
+    return tuple(fingerprint)
+
+
+def has_open_comment(text: str) -> bool:
+    """
+    Whether a text leaves a `/*` comment open (its fingerprint would then hide the code after it).
+    """
+    return "/*" in (text or "") and any(
+        token.kind == "COMMENT" and token.value.startswith("/*") and not token.value.endswith("*/")
+        for token in tokenize(text, keep_comments=True))
+
+
+def iter_hunk_lines(diff: str) -> Iterator[Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]]:
+    """
+    Yields the before and after (line number, content) pairs of each hunk of a unified diff:
+    its context lines with its deleted lines, and its context lines with its added lines.
+    """
+    before: List[Tuple[int, str]] = []
+    after: List[Tuple[int, str]] = []
+    started = False
+    old_line = new_line = 0
+    for line in (diff or "").split("\n"):
+        if line.startswith("@@"):
+            if started:
+                yield before, after
+            before, after = [], []
+            started = True
+            header = _HUNK_HEADER.match(line)
+            old_line, new_line = (int(header.group(1)), int(header.group(2))) if header else (0, 0)
+        elif not started or line.startswith("\\"):
+            continue
+        elif line.startswith("-"):
+            before.append((old_line, line[1:]))
+            old_line += 1
+        elif line.startswith("+"):
+            after.append((new_line, line[1:]))
+            new_line += 1
+        else:
+            before.append((old_line, line[1:]))
+            after.append((new_line, line[1:]))
+            old_line += 1
+            new_line += 1
+    if started:
+        yield before, after
+
+
+def _cuts_multiline_token(ranges: List[Tuple[int, int]], source: str) -> bool:
+    """
+    Whether a heredoc or a /* comment of a text is partly in one of the (first line, last line)
+    ranges: tokenized alone, the range would then read part of it as code.
+    """
+    # The hunk ranges are disjoint and in order
+    firsts = [first for first, _ in ranges]
+    lasts = [last for _, last in ranges]
+    for first, last in multiline_token_lines(source):
+        for range_first, range_last in ranges[bisect_left(lasts, first):bisect_right(firsts, last)]:
+            if not range_first <= first <= last <= range_last:
+                return True
+    return False
+
+
+class TrivialChange:
+    """
+    Detects formatting-only, comment-only and description-only changes from token
+    fingerprints, before the file goes through block parsing and the feature extractors.
+    """
+
+    def __init__(self, mod: ModifiedFile):
+        self.mod = mod
+
+    def is_trivial_file(self) -> bool:
+        # Each side of a hunk is a contiguous region of its file version and the regions between
+        # hunks are the same in both, so equal hunk fingerprints mean equal file fingerprints
+        before_ranges, after_ranges = [], []
+        for before, after in iter_hunk_lines(self.mod.diff):
+            before_text = "\n".join(content for _, content in before)
+            after_text = "\n".join(content for _, content in after)
+            if has_open_comment(before_text) or has_open_comment(after_text):
+                return False
+            if token_fingerprint(before_text) != token_fingerprint(after_text):
+                return False
+            if before:
+                before_ranges.append((before[0][0], before[-1][0]))
+            if after:
+                after_ranges.append((after[0][0], after[-1][0]))
+        # ... unless a hunk cuts a heredoc or a /* comment: only the whole versions then tell
+        if (_cuts_multiline_token(before_ranges, self.mod.source_code_before)
+                or _cuts_multiline_token(after_ranges, self.mod.source_code)):
+            return token_fingerprint(self.mod.source_code_before) == token_fingerprint(self.mod.source_code)
+        return True
+
+    @staticmethod
+    def is_trivial_block(text_before: str, text_after: str) -> bool:
+        if not text_before or not text_after:
+            return False
+        return token_fingerprint(text_before) == token_fingerprint(text_after)
+
+
+def is_trivial_row(contribution: dict) -> bool:
+    """
+    Whether a CSV row is a short trivial-change row (flag mode), to keep it out of the history.
+    """
+    return str(contribution.get("trivial_change")) == "1"
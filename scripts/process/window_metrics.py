@@ -0,0 +1,170 @@
+import re
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scripts.process.defect_neighbors import is_defective
+
+DEFAULT_WINDOWS = ["30d", "90d"]
+WINDOW_PATTERN = re.compile(r"^(\d+)([dc])$")
+
+
+def block_key(row: dict) -> Tuple:
+    return row.get("file"), row.get("block_identifiers")
+
+
+def parse_windows(windows: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Normalizes window sizes: "<N>d" for the last N days, "<K>c" for the last K commits.
+
+    Args:
+        windows: Window sizes (or a comma-separated string); None for DEFAULT_WINDOWS.
+    """
+    if windows is None:
+        return list(DEFAULT_WINDOWS)
+    if isinstance(windows, str):
+        windows = [window.strip() for window in windows.split(",") if window.strip()]
+    windows = list(dict.fromkeys(windows))
+    invalid = [window for window in windows if not WINDOW_PATTERN.match(window) or not int(window[:-1])]
+    if invalid:
+        raise ValueError(f"Invalid windows: {', '.join(invalid)} (expected e.g. 90d for days, 50c for commits)")
+    return windows
+
+
+class _Window:
+    """
+    Per-block counts of the changes inside one window, updated as changes enter and expire.
+    """
+
+    def __init__(self):
+        # (date, commit, block, author, defective) in traversal order
+        self.changes = deque()
+        self.authors: Dict[Tuple, Counter] = {}
+        self.commits: Dict[Tuple, Counter] = {}
+        self.defects = Counter()
+
+    def add(self, change):
+        _, commit, block, author, defective = change
+        self.changes.append(change)
+        self.authors.setdefault(block, Counter())[author] += 1
+        self.commits.setdefault(block, Counter())[commit] += 1
+        self.defects[block] += defective
+
+    def evict(self):
+        _, commit, block, author, defective = self.changes.popleft()
+        for counts, key in ((self.authors, author), (self.commits, commit)):
+            counts[block][key] -= 1
+            if not counts[block][key]:
+                del counts[block][key]
+                if not counts[block]:
+                    del counts[block]
+        self.defects[block] -= defective
+        if not self.defects[block]:
+            del self.defects[block]
+
+
+class ProcessWindows:
+    """
+    Process metrics of a block over the recent history only: the changes of the last N days
+    or of the last K commits before the current one, in traversal order.
+
+    Each window keeps its changes in a deque and per-block counters; changes enter once their
+    commit is done and leave when they fall out of the window, so each change costs O(1) per
+    window over the whole run instead of a scan of the history per block. Day windows are
+    measured from the date of the current commit in either direction (full runs traverse the
+    history newest first), assuming commit dates follow the traversal order.
+    """
+
+    def __init__(self, windows: Optional[Iterable[str]] = None):
+        self.windows = parse_windows(windows)
+        self._windows = {window: _Window() for window in self.windows}
+        # Distinct commits added, oldest first, for the commit windows
+        self._commits = deque()
+        self._staged = []
+
+    def _expire_days(self, date):
+        if not isinstance(date, datetime):
+            return
+        for window, state in self._windows.items():
+            if window.endswith("d"):
+                limit = timedelta(days=int(window[:-1]))
+                while state.changes and abs(date - state.changes[0][0]) > limit:
+                    state.evict()
+
+    def _expire_commits(self):
+        for window, state in self._windows.items():
+            size = int(window[:-1])
+            if window.endswith("c") and len(self._commits) > size:
+                # Changes of the commit that just left the K most recent ones
+                expired = self._commits[-size - 1]
+                while state.changes and state.changes[0][1] == expired:
+                    state.evict()
+
+    def add_commit(self, rows: Iterable[dict]):
+        """
+        Adds the block rows of one commit.
+        """
+        rows = list(rows)
+        if not rows:
+            return
+        commit = rows[0].get("commit")
+        if not self._commits or self._commits[-1] != commit:
+            self._commits.append(commit)
+        for row in rows:
+            change = (row.get("date"), commit, block_key(row), row.get("author"),
+                      int(is_defective(row)))
+            for window, state in self._windows.items():
+                # Undated changes cannot be placed in a day window
+                if window.endswith("c") or isinstance(change[0], datetime):
+                    state.add(change)
+        self._expire_commits()
+        # Commit windows only need the commits they can still contain
+        largest = max((int(window[:-1]) for window in self.windows if window.endswith("c")), default=0)
+        while len(self._commits) > largest + 1:
+            self._commits.popleft()
+
+    def stage(self, row: dict):
+        """
+        Keeps a row of the current commit, to be added by `commit`.
+        """
+        self._staged.append(row)
+
+    def commit(self):
+        """
+        Adds the rows staged since the last call as one commit.
+        """
+        self.add_commit(self._staged)
+        self._staged = []
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[dict], windows: Optional[Iterable[str]] = None) -> "ProcessWindows":
+        """
+        Windows after the contribution rows of a history (e.g. the history CSV), replayed
+        oldest commit first.
+        """
+        process_windows = cls(windows)
+        commits = {}
+        for row in rows:
+            commits.setdefault(row.get("commit"), []).append(row)
+        dated = [commit_rows for commit_rows in commits.values() if isinstance(commit_rows[0].get("date"), datetime)]
+        for commit_rows in sorted(dated, key=lambda commit_rows: commit_rows[0]["date"]):
+            process_windows.add_commit(commit_rows)
+        return process_windows
+
+    def resume_process_windows(self, contribution: dict) -> dict:
+        self._expire_days(contribution.get("date"))
+        block = block_key(contribution)
+        values = {}
+        for window, state in self._windows.items():
+            # Number of developers that changed the block in the window
+            values[f"ndevs_{window}"] = len(state.authors.get(block, ()))
+            # Number of commits that changed the block in the window
+            values[f"ncommits_{window}"] = len(state.commits.get(block, ()))
+            # Number of defective changes of the block in the window
+            values[f"num_defects_before_{window}"] = state.defects.get(block, 0)
+        return values
+
+    @staticmethod
+    def get_headers(windows: Optional[Iterable[str]] = None) -> List[str]:
+        return [f"{name}_{window}" for window in parse_windows(windows)
+                for name in ("ndevs", "ncommits", "num_defects_before")]
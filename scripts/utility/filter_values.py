@@ -1,3 +1,4 @@
+from bisect import bisect_left, bisect_right
 from typing import List
 
 
@@ -5,6 +6,15 @@ def filter_values_between_start_end(values: List[int], start: int, end: int):
     return [value for value in values if start < value < end]
 
 
+def filter_sorted_values_between_start_end(sorted_values: List[int], start: int, end: int):
+    # Same result as filter_values_between_start_end for an ascending list, located by bisection
+    return sorted_values[bisect_right(sorted_values, start):bisect_left(sorted_values, end)]
+
+
+def count_sorted_values_between_start_end(sorted_values: List[int], start: int, end: int) -> int:
+    return max(0, bisect_left(sorted_values, end) - bisect_right(sorted_values, start))
+
+
 def clean_similar_blocks_in_commit(impacted_blocks, attributes, target_label):
     # Create a set to track unique first three attributes
     unique_attributes = set()
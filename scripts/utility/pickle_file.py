@@ -0,0 +1,23 @@
+import os
+import pickle
+import tempfile
+
+
+def save_pickle(state, path: str):
+    """
+    Pickles `state` to `path` atomically (a crash never leaves a truncated file).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_pickle(path: str):
+    with open(path, "rb") as f:
+        return pickle.load(f)
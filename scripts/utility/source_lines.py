@@ -0,0 +1,43 @@
+class SourceLines:
+    """
+    Line-offset index over the in-memory content of a file version, to slice the
+    text of blocks by line range without going through the filesystem.
+
+    Line endings are normalized like a text-mode `readlines()` (universal newlines),
+    so the slices are the block texts SimilarityChange used to read back from disk.
+    """
+
+    def __init__(self, source_code):
+        self.text = (source_code or "").replace("\r\n", "\n").replace("\r", "\n")
+        self._offsets = None
+
+    @property
+    def offsets(self):
+        # Start offset of each line, plus the end of the text; built on the first slice
+        if self._offsets is None:
+            offsets = [0]
+            find = self.text.find
+            position = find("\n")
+            while position != -1:
+                offsets.append(position + 1)
+                position = find("\n", position + 1)
+            if offsets[-1] != len(self.text):
+                offsets.append(len(self.text))
+            self._offsets = offsets
+        return self._offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def slice(self, start_line, end_line):
+        """
+        Text of the lines start_line..end_line (1-based, inclusive), clamped to the file.
+        """
+        if start_line is None or end_line is None:
+            return ""
+        offsets = self.offsets
+        start_idx = max(0, start_line - 1)
+        end_idx = min(len(offsets) - 1, end_line)
+        if start_idx >= end_idx:
+            return ""
+        return self.text[offsets[start_idx]:offsets[end_idx]]
@@ -1,5 +1,8 @@
 import re
 
+HEREDOC_DESCRIPTION_PATTERN = re.compile(r'description\s*=\s*<<-?\s*([A-Z_]+)')
+DESCRIPTION_PATTERN = re.compile(r'\s*description\s*=\s*"([^"]*)"|\s*description\s*=\s*""')
+
 
 class UtilityChange:
 
@@ -19,7 +22,7 @@ class UtilityChange:
             stripped_line = line[1].strip()
 
             # Detect start of heredoc for description
-            heredoc_start_match = re.match(r'description\s*=\s*<<-?\s*([A-Z_]+)', stripped_line)
+            heredoc_start_match = HEREDOC_DESCRIPTION_PATTERN.match(stripped_line)
             if heredoc_start_match:
                 inside_heredoc = True
                 heredoc_end_token = heredoc_start_match.group(1)
@@ -73,8 +76,7 @@ class UtilityChange:
         return result
 
     def check_description(self, contentLine):
-        description_pattern = r'\s*description\s*=\s*"([^"]*)"|\s*description\s*=\s*""'
-        if re.search(description_pattern, contentLine):
+        if DESCRIPTION_PATTERN.search(contentLine):
             return 1
 
     def identify_inducing_lines(self, tuple_to_search):
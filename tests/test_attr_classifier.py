@@ -0,0 +1,80 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.attr_terraform_change.attr_change import AttrChange
+from scripts.process.attr_terraform_change.attr_classifier import ATTR_CHANGE_KINDS, classify_changed_lines
+from scripts.process.lines_change.additions import Additions
+from scripts.process.lines_change.deletions import Deletions
+
+# Kinds of attribute change found in each fragment of a changed line
+FRAGMENTS = {
+    'default = 1': {"default"},
+    'type = string': {"type"},
+    'value = aws_instance.web.id': {"value_output"},
+    'version = "~> 3.2"': {"versioning"},
+    'description = "x"': {"description"},
+    'description = ""': {"description"},
+    'count = 2': {"meta_args"},
+    # Meta-arguments are found anywhere in a line, names included
+    'accounts = []': {"meta_args"},
+    'providers = {}': {"meta_args"},
+    'ami = "ami-1"': set(),
+    'tags = { Name = "a" }': set(),
+    'required_version = ">= 1.0, < 2.0.1"': {"versioning"},
+    'default_tags {': set(),
+    'valuetype= "1.2"': {"type", "versioning"},
+    '"2.3"': set(),
+}
+
+
+def reference_flags(lines, kept_lines, start, end):
+    # Kinds of the fragments of the block's lines, among those the diff filter keeps
+    found = set()
+    for line, fragments in lines:
+        if start < line < end and line in kept_lines:
+            for fragment in fragments:
+                found |= FRAGMENTS[fragment]
+    return found
+
+
+class TestAttrClassifier(unittest.TestCase):
+    def test_kinds_of_each_line(self):
+        for fragment, kinds in FRAGMENTS.items():
+            self.assertEqual(classify_changed_lines([(1, "  " + fragment)]), kinds, fragment)
+
+    def test_kinds_of_all_lines(self):
+        lines = [(line, "  " + fragment) for line, fragment in enumerate(FRAGMENTS, 1)]
+        self.assertEqual(classify_changed_lines(lines), set(ATTR_CHANGE_KINDS))
+        self.assertEqual(classify_changed_lines([]), set())
+
+    def test_flags_of_block_lines(self):
+        rng = random.Random(9)
+        for _ in range(300):
+            lines = {
+                kind: [(line, rng.sample(list(FRAGMENTS), rng.randint(1, 2)))
+                       for line in sorted(rng.sample(range(1, 30), rng.randint(0, 8)))]
+                for kind in ("added", "deleted")
+            }
+            mod = MagicMock()
+            mod.diff_parsed = {kind: [(line, "  " + " ".join(fragments)) for line, fragments in kind_lines]
+                               for kind, kind_lines in lines.items()}
+            start, end = rng.randint(0, 15), rng.randint(10, 30)
+            additions, deletions = Additions(mod, start, end), Deletions(mod, start, end)
+            added = reference_flags(lines["added"], additions.added_lines, start, end)
+            deleted = reference_flags(lines["deleted"], deletions.deleted_lines, start, end)
+            for deletions_or_none, deleted in ((deletions, deleted), (None, set())):
+                expected = {}
+                for kind in ATTR_CHANGE_KINDS:
+                    expected[f"additions_contains_{kind}_change"] = int(kind in added)
+                    expected[f"deletions_contains_{kind}_change"] = int(kind in deleted)
+                self.assertEqual(AttrChange({}, additions, deletions_or_none).resume_changed_attr(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.code_metrics_measures import CodeMetricsExtractor
+
+
+class FakeTerraMetrics(CodeMetricsExtractor):
+    """
+    Emulates TerraMetrics: one block per non-empty input, named after the file content.
+    """
+
+    def __init__(self, jar_path, directory_output="list"):
+        super().__init__(jar_path=jar_path)
+        self.directory_output = directory_output
+        self.invocations = []
+
+    def _invoke_terrametrics(self, args):
+        self.invocations.append(args[0])
+        target = args[args.index("--target") + 1]
+        if args[0] == "--file":
+            with open(args[1], encoding="utf-8") as f:
+                output = {"head": {}, "data": [{"block_identifiers": f.read()}]}
+        else:
+            files = sorted(os.listdir(args[1]))
+            contents = {}
+            for name in files:
+                with open(os.path.join(args[1], name), encoding="utf-8") as f:
+                    contents[name] = f.read()
+            if self.directory_output == "list":
+                output = [{"file": os.path.join(args[1], name), "head": {}, "data": [{"block_identifiers": text}]}
+                          for name, text in contents.items()]
+            else:
+                # Unknown layout: nothing can be matched back to the inputs
+                output = {"summary": len(files)}
+        with open(target, "w") as f:
+            json.dump(output, f)
+
+
+class TestBatchParsing(unittest.TestCase):
+    def setUp(self):
+        self.jar = tempfile.NamedTemporaryFile(suffix=".jar", delete=False)
+        self.jar.close()
+
+    def tearDown(self):
+        os.remove(self.jar.name)
+
+    def test_parse_sources_single_invocation(self):
+        extractor = FakeTerraMetrics(self.jar.name)
+        results = extractor.parse_sources({"a": "block_a", "b": "block_b", "c": "block_c"})
+
+        self.assertEqual(extractor.invocations, ["--directory"])
+        self.assertEqual(results["a"]["data"][0]["block_identifiers"], "block_a")
+        self.assertEqual(results["c"]["data"][0]["block_identifiers"], "block_c")
+
+    def test_unmatched_output_falls_back_to_per_file(self):
+        extractor = FakeTerraMetrics(self.jar.name, directory_output="unknown")
+        results = extractor.parse_sources({"a": "block_a", "b": "block_b"})
+
+        self.assertEqual(extractor.invocations, ["--directory", "--file", "--file"])
+        self.assertEqual(results["b"]["data"][0]["block_identifiers"], "block_b")
+
+        # Batching is turned off once the output could not be matched
+        extractor.parse_sources({"c": "block_c", "d": "block_d"})
+        self.assertEqual(extractor.invocations[3:], ["--file", "--file"])
+
+    def test_output_layout_read_from_first_batch(self):
+        extractor = FakeTerraMetrics(self.jar.name)
+        extractor.parse_sources({"a": "block_a", "b": "block_b"})
+        self.assertEqual(extractor._batch_layout, "list")
+        results = extractor.parse_sources({"c": "block_c", "d": "block_d"})
+        self.assertEqual(extractor.invocations, ["--directory", "--directory"])
+        self.assertEqual(results["d"]["data"][0]["block_identifiers"], "block_d")
+
+    def test_prefetch_serves_parse_source(self):
+        extractor = FakeTerraMetrics(self.jar.name)
+        extractor.prefetch(["block_a", "block_b", "block_a", None])
+        self.assertEqual(extractor.invocations, ["--directory"])
+
+        data = extractor.parse_source("block_b")
+        self.assertEqual(data["data"][0]["block_identifiers"], "block_b")
+        self.assertEqual(extractor.invocations, ["--directory"], "Prefetched sources should not be parsed again")
+
+        extractor.parse_source("block_c")
+        self.assertEqual(extractor.invocations[-1], "--file")
+
+
+if __name__ == '__main__':
+    unittest.main()
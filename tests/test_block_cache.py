@@ -0,0 +1,68 @@
+import unittest
+import sys
+import os
+import time
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.block_cache import BlockCache
+from scripts.codes.code_metrics_measures import source_digest
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_source_digest_matches_git_blob_sha(self):
+        # `printf 'hello\n' | git hash-object --stdin`
+        self.assertEqual(source_digest("hello\n"), "ce013625030ba8dba906f756967f9e9ca394464a")
+
+    def test_hit_and_miss(self):
+        cache = BlockCache(self.tmp_dir.name)
+        digest = source_digest('resource "a" "b" {}')
+        self.assertIsNone(cache.get("jar-1", digest))
+
+        cache.put("jar-1", digest, {"data": [{"block_identifiers": "resource a b"}]})
+        self.assertEqual(cache.get("jar-1", digest)["data"][0]["block_identifiers"], "resource a b")
+        self.assertIsNone(cache.get("jar-2", digest), "Another parser version must not reuse the entry")
+
+        # Persisted on disk for the next run
+        self.assertIsNotNone(BlockCache(self.tmp_dir.name).get("jar-1", digest))
+
+    def test_least_recently_used_entries_are_evicted(self):
+        payload = {"data": [{"text": "x" * 1000}]}
+        cache = BlockCache(self.tmp_dir.name, max_size_mb=2500 / (1024 * 1024))
+
+        cache.put("jar", "aa01", payload)
+        cache.put("jar", "bb02", payload)
+        past = time.time() - 100
+        os.utime(cache._path("jar", "aa01"), (past, past))
+        os.utime(cache._path("jar", "bb02"), (past + 10, past + 10))
+        # Touch the oldest entry: it becomes the most recently used
+        self.assertIsNotNone(cache.get("jar", "aa01"))
+
+        cache.put("jar", "cc03", payload)
+
+        self.assertIsNotNone(cache.get("jar", "aa01"))
+        self.assertIsNone(cache.get("jar", "bb02"))
+        self.assertIsNotNone(cache.get("jar", "cc03"))
+        self.assertLessEqual(cache.size, cache.max_size)
+
+    def test_python_engine_uses_cache(self):
+        from scripts.collect_metrics import build_block_locator
+
+        source = 'resource "aws_vpc" "main" {\n  cidr_block = "10.0.0.0/16"\n}\n'
+        locator = build_block_locator(cache_dir=self.tmp_dir.name, engine="python")
+        data = locator.parse_source(source)
+        self.assertEqual(locator.cache.get(locator.parser_version, source_digest(source)), data)
+        # A later run reads the entry back instead of parsing
+        self.assertEqual(build_block_locator(cache_dir=self.tmp_dir.name, engine="python").peek(source), data)
+
+
+if __name__ == '__main__':
+    unittest.main()
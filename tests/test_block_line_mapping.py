@@ -0,0 +1,86 @@
+import random
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+from scripts.impacted_block_detection import BlockIndex, ImpactedBlocks
+from scripts.utility.filter_values import (count_sorted_values_between_start_end,
+                                           filter_sorted_values_between_start_end,
+                                           filter_values_between_start_end)
+
+BEFORE = '''resource "aws_instance" "web" {
+  ami           = "ami-1"
+  instance_type = "t2.micro"
+  monitoring    = true
+}
+
+variable "region" {
+  type    = string
+  default = "eu-west-1"
+}
+'''
+
+AFTER = '''resource "aws_instance" "web" {
+  ami           = "ami-2"
+  instance_type = "t2.micro"
+  monitoring    = true
+}
+
+variable "region" {
+  type    = string
+}
+'''
+
+
+def closest_block_linear(block, blocks):
+    closest, min_distance = None, float('inf')
+    for candidate in blocks:
+        if candidate["block_identifiers"] == block["block_identifiers"]:
+            distance = abs(block["start_block"] - candidate["start_block"])
+            if distance <= min_distance:
+                closest, min_distance = candidate, distance
+    return closest
+
+
+class TestBlockLineMapping(unittest.TestCase):
+    def test_sorted_helpers_match_linear_filter(self):
+        rng = random.Random(3)
+        for _ in range(500):
+            values = sorted(rng.sample(range(1, 60), rng.randint(0, 30)))
+            start, end = rng.randint(0, 60), rng.randint(0, 60)
+            expected = filter_values_between_start_end(values, start, end)
+            self.assertEqual(filter_sorted_values_between_start_end(values, start, end), expected)
+            self.assertEqual(count_sorted_values_between_start_end(values, start, end), len(expected))
+
+    def test_block_index_matches_linear_scan(self):
+        rng = random.Random(5)
+        for _ in range(300):
+            blocks = [{"block_identifiers": rng.choice("abc"), "start_block": rng.randint(1, 20), "id": i}
+                      for i in range(rng.randint(0, 12))]
+            index = BlockIndex(blocks)
+            for _ in range(10):
+                probe = {"block_identifiers": rng.choice("abcd"), "start_block": rng.randint(0, 22)}
+                self.assertIs(index.closest(probe), closest_block_linear(probe, blocks))
+                self.assertEqual(probe in index, closest_block_linear(probe, blocks) is not None)
+
+    def test_impacted_blocks(self):
+        mod = MagicMock()
+        mod.source_code_before = BEFORE
+        mod.source_code = AFTER
+        mod.diff_parsed = {
+            'added': [(2, '  ami           = "ami-2"')],
+            'deleted': [(2, '  ami           = "ami-1"'), (9, '  default = "eu-west-1"')],
+        }
+        impacted = ImpactedBlocks(mod, block_locator=HclMetricsExtractor())
+        blocks = impacted.identify_impacted_blocks_in_a_file("main.tf")
+        self.assertEqual([(b["block_identifiers"], b["start_block"]) for b in blocks],
+                         [("resource aws_instance web", 1), ("variable region", 7)])
+
+
+if __name__ == '__main__':
+    unittest.main()
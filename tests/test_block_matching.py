@@ -0,0 +1,88 @@
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.block_matching import MAX_MISS_RATE, BlockMatcher, block_shingles, jaccard, lsh_bands
+
+BUCKET = '''resource "aws_s3_bucket" "logs" {
+  bucket = "logs"
+  acl    = "private"
+  tags = {
+    Team = "ops"
+  }
+}'''
+INSTANCE = '''resource "aws_instance" "web" {
+  ami           = "ami-123"
+  instance_type = "t2.micro"
+  count         = 2
+}'''
+
+
+class TestBlockMatching(unittest.TestCase):
+    def test_shingles_ignore_formatting(self):
+        self.assertEqual(block_shingles(BUCKET), block_shingles(BUCKET.replace("acl    =", "# ACL\n  acl =")))
+        self.assertEqual(len(block_shingles("locals {}")), 1)
+        self.assertEqual(block_shingles(""), set())
+        self.assertEqual(jaccard(block_shingles(BUCKET), block_shingles(BUCKET)), 1.0)
+
+    def test_match_renamed_and_moved_blocks(self):
+        removed = [("bucket", "resource", BUCKET), ("instance", "resource", INSTANCE)]
+        added = [("moved", "resource", INSTANCE.replace("t2.micro", "t3.micro")),
+                 ("renamed", "resource", BUCKET.replace('"logs" {', '"app_logs" {')),
+                 ("new", "resource", 'resource "aws_vpc" "main" {\n  cidr_block = "10.0.0.0/16"\n}')]
+        matches = BlockMatcher().match(removed, added)
+        self.assertEqual({key: match[0] for key, match in matches.items()},
+                         {"moved": "instance", "renamed": "bucket"})
+        self.assertGreaterEqual(matches["renamed"][1], 0.5)
+
+    def test_kind_and_threshold(self):
+        removed = [("bucket", "resource", BUCKET)]
+        self.assertEqual(BlockMatcher().match(removed, [("data", "data", BUCKET)]), {})
+        edited = BUCKET.replace('"private"', '"public-read"')
+        self.assertIn("edited", BlockMatcher(threshold=0.5).match(removed, [("edited", "resource", edited)]))
+        self.assertEqual(BlockMatcher(threshold=0.99).match(removed, [("edited", "resource", edited)]), {})
+
+    def test_one_to_one(self):
+        # Two copies of a removed block: only the most similar one is paired with it
+        removed = [("bucket", "resource", BUCKET)]
+        copy = BUCKET.replace('"ops"', '"dev"')
+        matches = BlockMatcher().match(removed, [("copy", "resource", copy), ("same", "resource", BUCKET)])
+        self.assertEqual(list(matches), ["same"])
+
+    def test_many_blocks(self):
+        blocks = [f'resource "aws_sqs_queue" "q{i}" {{\n  name = "queue-{i}"\n  delay_seconds = {i}\n'
+                  f'  visibility_timeout_seconds = {i * 7}\n}}' for i in range(300)]
+        removed = [(i, "resource", text) for i, text in enumerate(blocks)]
+        added = [(f"moved{i}", "resource", text) for i, text in enumerate(blocks)]
+        matches = BlockMatcher().match(removed, added)
+        self.assertEqual({key: match[0] for key, match in matches.items()},
+                         {f"moved{i}": i for i in range(300)})
+
+    def test_bands_follow_threshold(self):
+        for threshold in (0.3, 0.5, 0.7, 0.9):
+            bands, rows = lsh_bands(threshold, 64)
+            self.assertLessEqual(bands * rows, 64)
+            self.assertLessEqual((1 - threshold ** rows) ** bands, MAX_MISS_RATE)
+            # S-curve midpoint below the threshold
+            self.assertLess((1 / bands) ** (1 / rows), threshold)
+        self.assertEqual((BlockMatcher(0.5).bands, BlockMatcher(0.5).rows), lsh_bands(0.5, 64))
+
+    def test_lsh_finds_pairs_near_threshold(self):
+        # Removed blocks of 20 attributes, added ones keeping 14 of them: Jaccard just above 0.5
+        blocks = [[f'  attr_{i}_{j} = "value-{i}-{j}"' for j in range(20)] for i in range(60)]
+        removed = [(i, "resource", "locals {\n" + "\n".join(lines) + "\n}") for i, lines in enumerate(blocks)]
+        added = [(f"moved{i}", "resource", "locals {\n" + "\n".join(lines[:14] + [f"  x_{i}_{j} = {j}" for j in range(6)])
+                  + "\n}") for i, lines in enumerate(blocks)]
+        matcher = BlockMatcher(threshold=0.5)
+        similarities = [jaccard(block_shingles(r[2]), block_shingles(a[2])) for r, a in zip(removed, added)]
+        expected = {a[0]: r[0] for r, a, similarity in zip(removed, added, similarities) if similarity >= 0.5}
+        self.assertGreater(len(expected), 30)
+        matches = matcher.match(removed, added)
+        self.assertEqual({key: match[0] for key, match in matches.items()}, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.edits.block_similarity import BlockSimilarity, normalize_block
+from scripts.edits.distance import Distance
+from scripts.feature_families import CommitFeatures
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.source_lines import SourceLines
+
+BEFORE = 'resource "aws_s3_bucket" "logs" {\n  bucket = "logs"\n  acl    = "private"\n}'
+AFTER = 'resource "aws_s3_bucket" "logs" {\n  # public now\n  bucket = "logs"\n  acl = "public-read"\n}'
+
+
+class TestBlockSimilarity(unittest.TestCase):
+    def test_normalize_block(self):
+        self.assertEqual(normalize_block('a   = 1 # note\n\n  b = "x"\n'), 'a = 1 b = "x"')
+        self.assertEqual(normalize_block(BEFORE), normalize_block(BEFORE.replace("acl    =", "acl =")))
+
+    def test_batched_cosine_matches_pairwise(self):
+        similarity = BlockSimilarity()
+        pairs = [(BEFORE, AFTER), ("", AFTER), ('locals {\n  a = 1\n}', 'locals {\n  a = 1 # one\n}')]
+        rows = [{} for _ in pairs]
+        for row, (before, after) in zip(rows, pairs):
+            row.update(similarity.add(row, before, after))
+        self.assertIsNone(rows[0]["cosine_code_change_similarity"])
+        similarity.finish()
+
+        for row in rows:
+            self.assertEqual(list(row), BlockSimilarity.get_headers())
+            self.assertGreaterEqual(row["cosine_code_change_similarity"], 0.0)
+        self.assertAlmostEqual(rows[2]["cosine_code_change_similarity"], 1.0)
+        self.assertEqual(rows[1]["cosine_code_change_similarity"], 0.0)
+        self.assertEqual(rows[2]["jaro_code_change_similarity"], 1.0)
+        normalized = normalize_block(BEFORE), normalize_block(AFTER)
+        self.assertAlmostEqual(rows[0]["jaro_winkler_code_change_similarity"],
+                               Distance(*normalized).measure_jaro_winkler_similarity())
+        self.assertAlmostEqual(rows[0]["ratcliff_obershelp_code_change_similarity"],
+                               Distance(*normalized).ratcliff_obershelp_similarity())
+
+    def test_single_pair_cosine(self):
+        # A single pair gives the same cosine as the per-pair vectorizer of Distance
+        similarity = BlockSimilarity(["cosine"])
+        normalized = normalize_block(BEFORE), normalize_block(AFTER)
+        row = {}
+        similarity.add(row, BEFORE, AFTER)
+        similarity.finish()
+        self.assertAlmostEqual(row["cosine_code_change_similarity"], Distance(*normalized).measure_cosine_similarity())
+
+    def test_unknown_measure(self):
+        with self.assertRaises(ValueError):
+            BlockSimilarity(["cosine", "soundex"])
+
+    def test_commit_features(self):
+        mod = MagicMock()
+        mod.diff_parsed = {'added': [(3, '  acl = "public-read"')], 'deleted': [(3, '  acl    = "private"')]}
+        commit_features = CommitFeatures("block_similarity", [])
+        block = {"start_block": 1, "end_block": 5}
+        block_before = {"start_block": 1, "end_block": 4}
+        block_features = commit_features.for_file(mod, ParsedDiff(mod), SourceLines(AFTER), SourceLines(BEFORE))
+        row = {}
+        row.update(block_features.compute(row, block, block_before))
+        commit_features.finish()
+        self.assertEqual(list(row), BlockSimilarity.get_headers())
+        self.assertGreater(row["cosine_code_change_similarity"], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.feature_families import CommitFeatures
+from scripts.process.co_change import CoChangeGraph
+
+
+def row(commit, identifiers, file="main.tf", fault_prone=0):
+    return {"commit": commit, "file": file, "block_identifiers": identifiers, "fault_prone": fault_prone}
+
+
+HISTORY = [
+    row("c1", "bucket"), row("c1", "policy", fault_prone=1),
+    row("c2", "bucket"), row("c2", "policy"), row("c2", "role"),
+    row("c3", "role"),
+]
+
+
+class TestCoChange(unittest.TestCase):
+    def test_features(self):
+        graph = CoChangeGraph.from_rows(HISTORY)
+        self.assertEqual(graph.resume_co_change(row("c4", "bucket")), {
+            "cochange_degree": 3, "cochange_blocks": 2, "cochange_defective_coupling": 1.0})
+        role = graph.resume_co_change(row("c4", "role"))
+        self.assertEqual((role["cochange_degree"], role["cochange_blocks"]), (2, 2))
+        self.assertEqual(role["cochange_defective_coupling"], 0.5)
+        self.assertEqual(graph.resume_co_change(row("c4", "role", file="other.tf"))["cochange_blocks"], 0)
+
+    def test_incremental_matches_rebuild(self):
+        graph = CoChangeGraph()
+        for commit in ("c1", "c2", "c3"):
+            for r in HISTORY:
+                if r["commit"] == commit:
+                    graph.stage(r)
+            graph.commit()
+        rebuilt = CoChangeGraph.from_rows(HISTORY)
+        self.assertEqual(graph.adjacency, rebuilt.adjacency)
+        self.assertEqual(graph.changes, rebuilt.changes)
+        # Commits already in the graph are not counted twice
+        graph.add_rows(HISTORY)
+        self.assertEqual(graph.changes, rebuilt.changes)
+
+    def test_large_commits_add_no_edges(self):
+        graph = CoChangeGraph(max_commit_blocks=2)
+        graph.add_rows(HISTORY)
+        self.assertEqual(graph.resume_co_change(row("c4", "role"))["cochange_blocks"], 0)
+        self.assertEqual(graph.changes[graph.nodes[("main.tf", "role")]], 2)
+
+    def test_labels_and_persistence(self):
+        graph = CoChangeGraph.from_rows(HISTORY)
+        graph.update_labels([row("c1", "policy"), row("c3", "role", fault_prone="1")])
+        self.assertEqual(graph.resume_co_change(row("c4", "bucket"))["cochange_defective_coupling"], 0.5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cochange.graph")
+            graph.save(path)
+            loaded = CoChangeGraph.load(path)
+        self.assertEqual(loaded.resume_co_change(row("c4", "bucket")), graph.resume_co_change(row("c4", "bucket")))
+        self.assertEqual(loaded.commits, {"c1", "c2", "c3"})
+
+    def test_labels_kept_for_blocks_without_rows(self):
+        graph = CoChangeGraph.from_rows(HISTORY)
+        graph.update_labels([row("c3", "role", fault_prone="1")])
+        defects = list(graph.defects)
+        graph.update_labels([])
+        self.assertEqual(graph.defects, defects)
+        graph.update_labels([row("c4", "bucket", fault_prone="1")])
+        self.assertEqual(graph.defects[graph.nodes[("main.tf", "role")]], 1)
+        graph.update_labels([row("c3", "role", fault_prone="0")])
+        self.assertEqual(graph.defects[graph.nodes[("main.tf", "role")]], 0)
+
+    def test_commit_features_update_graph_after_commit(self):
+        commit_features = CommitFeatures("co_change", HISTORY)
+        block_features = commit_features.for_file(None, None, None, None)
+        features = block_features.compute(row("c4", "bucket"), {}, None)
+        self.assertEqual(features["cochange_blocks"], 2)
+        commit_features.finish()
+        self.assertIn("c4", commit_features.co_change_graph.commits)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.defect_neighbors import ChangeIndex, DefectNeighbors, change_tokens, is_defective
+
+BLOCK = {"block": "resource", "block_id": "aws_s3_bucket"}
+
+
+def tokens(*lines):
+    return change_tokens(BLOCK, [(i, line) for i, line in enumerate(lines)], [])
+
+
+class TestDefectNeighbors(unittest.TestCase):
+    def setUp(self):
+        self.index = ChangeIndex()
+        self.index.add(("c1", "a.tf", "bucket"), tokens('acl = "public-read"'), defective=True)
+        self.index.add(("c2", "a.tf", "logs"), tokens('versioning = true'))
+        self.index.add(("c3", "b.tf", "web"), change_tokens({"block": "resource", "block_id": "aws_instance"},
+                                                            [(1, 'ami = "ami-1"')], []))
+
+    def test_change_tokens(self):
+        self.assertEqual(change_tokens(BLOCK, [(2, 'acl = "x"')], [(2, 'acl = "y"')]),
+                         ["block:resource", "type:aws_s3_bucket", "+acl", "+=", "+x", "-acl", "-=", "-y"])
+
+    def test_query_ranks_similar_changes(self):
+        neighbors = self.index.query(tokens('acl = "public-read"'), k=2)
+        self.assertEqual([doc for doc, _ in neighbors], [0, 1])
+        self.assertGreater(neighbors[0][1], 0.9)
+        self.assertLess(neighbors[1][1], 0.5)
+        self.assertEqual(self.index.query(["unknown"]), [])
+        self.assertEqual([doc for doc, _ in self.index.query(tokens('acl = "public-read"'), exclude_commit="c1")],
+                         [1, 2])
+
+    def test_labels_and_persistence(self):
+        self.index.add(("c1", "a.tf", "bucket"), tokens("duplicate"))
+        self.assertEqual(len(self.index), 3)
+        self.index.update_labels([{"commit": "c2", "file": "a.tf", "block_identifiers": "logs", "fault_prone": "1"}])
+        self.assertEqual(list(self.index.labels), [1, 1, 0])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "changes.idx")
+            self.index.save(path)
+            loaded = ChangeIndex.load(path)
+        self.assertEqual(loaded.keys, self.index.keys)
+        self.assertEqual(loaded.query(tokens("versioning = true")), self.index.query(tokens("versioning = true")))
+        self.assertEqual(loaded.query(tokens("acl"), exclude_commit="c1"),
+                         self.index.query(tokens("acl"), exclude_commit="c1"))
+
+    def test_features_and_staging(self):
+        additions = MagicMock()
+        additions.get_added_lines_content_in_a_block.return_value = [(2, 'acl = "public-read"')]
+        row = {"commit": "c4", "file": "a.tf", "block_identifiers": "bucket", "fault_prone": 1}
+        features = DefectNeighbors(row, BLOCK, additions, None, self.index, k=2).resume_defect_neighbors()
+        self.assertEqual(list(features), DefectNeighbors.get_headers())
+        self.assertEqual(features["knn_defect_rate"], 0.5)
+        self.assertLess(features["knn_defective_distance"], 0.1)
+        # Staged changes are indexed when the commit is done
+        self.assertEqual(len(self.index), 3)
+        self.index.commit()
+        self.assertEqual(self.index.keys[-1], ("c4", "a.tf", "bucket"))
+        self.assertEqual(self.index.labels[-1], 1)
+
+    def test_is_defective(self):
+        self.assertTrue(is_defective({"fault_prone": "1.0"}))
+        self.assertFalse(is_defective({"fault_prone": ""}))
+        self.assertFalse(is_defective({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import random
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+import jellyfish
+
+from scripts.edits.edit_distance import damerau_levenshtein_distance, trim_common_affixes
+from scripts.edits.similarity_change import SimilarityChange
+
+
+class TestEditDistance(unittest.TestCase):
+    def test_exact_without_cap(self):
+        rng = random.Random(1)
+        for _ in range(2000):
+            a = "".join(rng.choice("abc{}\n") for _ in range(rng.randint(0, 12)))
+            b = "".join(rng.choice("abc{}\n") for _ in range(rng.randint(0, 12)))
+            self.assertEqual(damerau_levenshtein_distance(a, b), jellyfish.damerau_levenshtein_distance(a, b))
+
+    def test_cap_saturates_and_keeps_small_distances(self):
+        rng = random.Random(2)
+        for _ in range(2000):
+            a = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 15)))
+            b = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 15)))
+            exact = jellyfish.damerau_levenshtein_distance(a, b)
+            self.assertEqual(damerau_levenshtein_distance(a, b, max_distance=4), min(exact, 4))
+
+    def test_trim_common_affixes(self):
+        self.assertEqual(trim_common_affixes("resource {a}", "resource {b}"), ("a", "b"))
+        self.assertEqual(trim_common_affixes("aaa", "aa"), ("a", ""))
+
+    def test_line_and_token_units(self):
+        before = 'locals {\n  a = 1\n  b = 2\n}\n'
+        after = 'locals {\n  b = 2\n  a = 1\n  c = 3\n}\n'
+        self.assertEqual(damerau_levenshtein_distance(before, after, unit="line"), 2)
+        self.assertEqual(damerau_levenshtein_distance('a = "x"', 'a = "y"', unit="token"), 1)
+
+    def test_similarity_change_columns(self):
+        self.assertEqual(SimilarityChange.get_headers(), ["damerau_levenshtein_code_change_distance"])
+        self.assertEqual(SimilarityChange.get_headers("line"), ["damerau_levenshtein_line_change_distance"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import subprocess
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.feature_families import FEATURE_FAMILIES, BlockFeatures, parse_features
+from scripts.process.attr_terraform_change.attr_change import AttrChange
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.source_lines import SourceLines
+
+BLOCK = {"block_identifiers": "locals", "block_name": "locals", "start_block": 1, "end_block": 4,
+         "numAttrs": 2, "depthOfBlock": 1}
+BLOCK_BEFORE = dict(BLOCK, end_block=3, numAttrs=1)
+
+
+class TestFeatureFamilies(unittest.TestCase):
+    def setUp(self):
+        self.mod = MagicMock()
+        self.mod.diff_parsed = {'added': [(3, '  default = 2')], 'deleted': []}
+
+    def block_features(self, features):
+        return BlockFeatures(features, self.mod, ParsedDiff(self.mod), SourceLines("locals {\n  a = 1\n  b = 2\n}\n"),
+                             SourceLines("locals {\n  a = 1\n}\n"), [])
+
+    def test_parse_features(self):
+        self.assertEqual(parse_features(None), FEATURE_FAMILIES)
+        self.assertEqual(parse_features("all"), FEATURE_FAMILIES)
+        self.assertEqual(parse_features("delta, attr_change"), ["attr_change", "delta"])
+        with self.assertRaises(ValueError):
+            parse_features("similarity,unknown")
+
+    def test_only_enabled_columns(self):
+        features = self.block_features(["attr_change", "delta"]).compute({}, BLOCK, BLOCK_BEFORE)
+        self.assertEqual(list(features), AttrChange.get_headers() + ["numAttrs_delta", "depthOfBlock_delta"])
+        self.assertEqual(features["additions_contains_default_change"], 1)
+        self.assertEqual(features["numAttrs_delta"], 1)
+
+    def test_unknown_family_is_rejected(self):
+        block_features = self.block_features(["delta"])
+        block_features.features = ["delta", "unknown"]
+        with self.assertRaises(ValueError):
+            block_features.compute({}, BLOCK, BLOCK_BEFORE)
+
+    def test_block_moved_from_another_file(self):
+        source_mod = MagicMock()
+        source_mod.diff_parsed = {'added': [], 'deleted': [(2, '  a = 1'), (3, '  b = 2')]}
+        source = BlockFeatures(["impacted_lines"], source_mod, ParsedDiff(source_mod), SourceLines(""),
+                               SourceLines("locals {\n  a = 1\n  b = 2\n}\n"), [])
+        features = self.block_features(["impacted_lines"]).compute({}, BLOCK, BLOCK, source)
+        # Deleted lines are counted in the file the block comes from
+        self.assertEqual(features["deletions"], 2)
+        self.assertEqual(features["additions"], 1)
+
+    def test_disabled_similarity_is_not_imported(self):
+        code = ("import sys; sys.path.insert(0, '.'); import scripts.collect_metrics; "
+                "print('sklearn' in sys.modules or 'jellyfish' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=os.getcwd())
+        self.assertEqual(result.stdout.strip().splitlines()[-1], "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
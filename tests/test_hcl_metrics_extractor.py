@@ -0,0 +1,107 @@
+import unittest
+import shutil
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+from scripts.codes.engine_parity import compare_engine_outputs
+
+SAMPLE = '''
+# A comment with a { brace
+resource "aws_instance" "web" {
+  count = var.enabled ? 1 : 0
+  ami   = lookup(var.amis, "eu-west-1")
+  tags = {
+    Name = "web-${var.env}-}"
+  }
+
+  dynamic "ebs_block_device" {
+    for_each = [for d in local.disks : d if d.enabled]
+    content {
+      volume_size = ebs_block_device.value.size
+    }
+  }
+
+  user_data = <<-EOF
+    #!/bin/bash
+    echo "}"
+  EOF
+}
+
+data "aws_ami" "ubuntu" {}
+
+locals {
+  name = "/* not a comment */"
+}
+'''
+
+JAR_PATH = os.path.join(os.getcwd(), "libs", "terraform_metrics-1.0.jar")
+
+
+class TestHclMetricsExtractor(unittest.TestCase):
+    def setUp(self):
+        self.blocks = HclMetricsExtractor().parse_source(SAMPLE)["data"]
+
+    def test_block_locations(self):
+        self.assertEqual(
+            [(b["block_identifiers"], b["start_block"], b["end_block"]) for b in self.blocks],
+            [("resource aws_instance web", 3, 21), ("data aws_ami ubuntu", 23, 23), ("locals", 25, 27)]
+        )
+
+    def test_block_record_fields(self):
+        resource = self.blocks[0]
+        self.assertEqual(resource["block"], "resource")
+        self.assertEqual(resource["block_id"], "aws_instance")
+        self.assertEqual(resource["block_name"], "web")
+        self.assertEqual(resource["isResource"], 1)
+        self.assertEqual(resource["isData"], 0)
+        self.assertEqual(self.blocks[1]["isData"], 1)
+
+    def test_block_metrics(self):
+        resource = self.blocks[0]
+        # count, ami, tags, for_each, volume_size, user_data (object keys are not attributes)
+        self.assertEqual(resource["numAttrs"], 6)
+        self.assertEqual(resource["depthOfBlock"], 3)
+        self.assertEqual(resource["numNestedBlocks"], 2)
+        self.assertEqual(resource["numDynamicBlocks"], 1)
+        self.assertEqual(resource["numMetaArg"], 1)
+        self.assertEqual(resource["numFunctionCall"], 1)
+        self.assertEqual(resource["numConditions"], 1)
+        self.assertEqual(resource["numLoops"], 1)
+        self.assertEqual(resource["numHereDocs"], 1)
+        self.assertEqual(resource["numVarsRef"], 2)
+        self.assertEqual(resource["numLocalsRef"], 1)
+
+    def test_empty_source(self):
+        self.assertEqual(HclMetricsExtractor().parse_source("")["data"], [])
+
+    def test_compare_engine_outputs(self):
+        output = HclMetricsExtractor().parse_source(SAMPLE)
+        self.assertEqual(compare_engine_outputs(output, output), [])
+
+        shifted = {"data": [dict(block, end_block=block["end_block"] + 1) for block in output["data"]]}
+        self.assertEqual(len(compare_engine_outputs(output, shifted)), 3)
+
+        # Metrics emitted by one engine only (missing or renamed) are mismatches
+        renamed = {"data": [{("numAttributes" if key == "numAttrs" else key): value for key, value in block.items()}
+                            for block in output["data"]]}
+        mismatches = compare_engine_outputs(output, renamed)
+        self.assertEqual(len(mismatches), 2 * len(output["data"]))
+        self.assertTrue(any("numAttributes" in mismatch and "reference" in mismatch for mismatch in mismatches))
+
+    @unittest.skipUnless(os.path.exists(JAR_PATH) and shutil.which("java"), "TerraMetrics JAR or Java not available")
+    def test_parity_with_jar(self):
+        from scripts.codes.code_metrics_measures import CodeMetricsExtractor
+
+        with CodeMetricsExtractor(jar_path=JAR_PATH) as jar_engine:
+            for source in (SAMPLE, open(os.path.join(os.getcwd(), "main.tf"), encoding="utf-8").read()):
+                mismatches = compare_engine_outputs(jar_engine.parse_source(source),
+                                                    HclMetricsExtractor().parse_source(source))
+                self.assertEqual(mismatches, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
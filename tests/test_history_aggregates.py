@@ -0,0 +1,81 @@
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.history_aggregates import HistoryAggregates
+from scripts.process.history_store import HistoryStore
+from scripts.process.process_metrics import ProcessMetrics
+from tests.process_metrics_reference import RowProcessMetrics
+
+
+def commits(n_commits=150, seed=3):
+    generator = random.Random(seed)
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(n_commits):
+        # Dates are not monotonic, and a few commits come back (rows of a commit in two batches)
+        date += timedelta(hours=generator.randint(-30, 60), seconds=generator.randint(0, 3600))
+        commit = f"c{i - 3}" if i > 3 and generator.random() < 0.05 else f"c{i}"
+        author = generator.choice(["alice", "bob", "carol", "dave"])
+        exp = generator.randint(0, 6)
+        rows = []
+        for _ in range(generator.choice([1, 1, 2, 3, 6])):
+            kind = generator.choice(["resource", "data", "variable"])
+            rows.append({"commit": commit, "author": author, "date": date, "exp": exp,
+                         "file": generator.choice(["main.tf", "net/vpc.tf", "net/sub/a.tf"]),
+                         "block_identifiers": generator.choice(["a", "b", "c", "d"]), "block": kind,
+                         "block_id": generator.choice(["aws_vpc", "aws_s3_bucket"]),
+                         "isResource": int(kind == "resource"), "isData": int(kind == "data"),
+                         "fault_prone": generator.choice([0, 0, 1])})
+        yield rows
+
+
+def types(metrics):
+    return {header: type(value) for header, value in metrics.items()}
+
+
+class TestHistoryAggregates(unittest.TestCase):
+    def test_same_values_and_types_as_rows(self):
+        rows, aggregates = [], HistoryAggregates()
+        for commit_rows in commits():
+            for row in commit_rows:
+                expected = RowProcessMetrics(row, rows).resume_process_metrics()
+                resumed = aggregates.resume_process_metrics(row)
+                self.assertEqual(resumed, expected)
+                self.assertEqual(types(resumed), types(expected))
+            rows.extend(commit_rows)
+            aggregates.add_rows(commit_rows)
+
+    def test_commit_already_in_history(self):
+        rows = [row for commit_rows in commits(40) for row in commit_rows]
+        aggregates = HistoryAggregates()
+        aggregates.add_rows(rows)
+        # Blocks of a commit measured again (e.g. a JIT re-run) against a history holding it
+        for row in rows[-20:]:
+            self.assertEqual(aggregates.resume_process_metrics(row),
+                             RowProcessMetrics(row, rows).resume_process_metrics())
+
+    def test_save_and_load(self):
+        rows = [row for commit_rows in commits(40) for row in commit_rows]
+        aggregates = HistoryAggregates()
+        aggregates.add_rows(rows[:-5])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "history_state.pkl")
+            aggregates.save(path)
+            loaded = HistoryAggregates.load(path)
+        self.assertEqual(set(loaded.commits), set(aggregates.commits))
+        self.assertEqual(loaded.author_commits, aggregates.author_commits)
+        # A store over loaded aggregates measures blocks without the rows
+        store = HistoryStore(aggregates=loaded)
+        for row in rows[-5:]:
+            self.assertEqual(ProcessMetrics(row, store).resume_process_metrics(),
+                             RowProcessMetrics(row, rows[:-5]).resume_process_metrics())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.co_change import CoChangeGraph
+from scripts.process.history_record import HistoryInterner, HistoryRecord
+from scripts.process.history_store import HistoryStore
+from scripts.process.process_metrics import ProcessMetrics
+from scripts.process.window_metrics import ProcessWindows
+from scripts.utility.commit_filters import get_subs_dire_name
+
+
+def history():
+    rows = []
+    date = datetime(2024, 3, 1, 9, 30, tzinfo=timezone(timedelta(hours=2)))
+    for i, (author, file) in enumerate([("alice", "main.tf"), ("bob", "net/vpc.tf"), ("alice", "net/vpc.tf"),
+                                        ("carol", "main.tf"), ("bob", "main.tf")]):
+        date += timedelta(days=3, hours=5)
+        for identifiers in ("a", "b")[:1 + i % 2]:
+            rows.append({"commit": f"c{i}", "author": author, "date": date, "exp": i, "file": file,
+                         "block_identifiers": identifiers, "block": "resource", "block_id": "aws_vpc",
+                         "isResource": 1, "isData": 0, "fault_prone": i % 2, "msg": "a long commit message",
+                         "numAttrs_delta": 1})
+    return rows
+
+
+class TestHistoryRecord(unittest.TestCase):
+    def test_record_reads_like_row(self):
+        row = history()[0]
+        record = HistoryInterner().record(row)
+        for key in ("commit", "author", "date", "file", "block_identifiers", "block", "block_id", "fault_prone"):
+            self.assertEqual(record[key], row[key])
+            self.assertEqual(record.get(key), row[key])
+        self.assertEqual(record["date"].utcoffset(), row["date"].utcoffset())
+        self.assertEqual(record["subsystem"], get_subs_dire_name("main.tf")[0])
+        # Columns no history consumer reads are dropped
+        self.assertIsNone(record.get("msg"))
+        with self.assertRaises(KeyError):
+            record["numAttrs_delta"]
+
+    def test_strings_are_shared(self):
+        interner = HistoryInterner()
+        first, second = (interner.record(dict(row)) for row in history()[1:3])
+        self.assertEqual(first.author_id, second.author_id)
+        self.assertIs(first.file, second.file)
+        self.assertEqual(len(interner.values), len(set(interner.values)))
+
+    def test_compact_store_same_features(self):
+        rows = history()
+        store, compact = HistoryStore(), HistoryStore(compact=True)
+        for row in rows:
+            self.assertEqual(ProcessMetrics(row, compact).resume_process_metrics(),
+                             ProcessMetrics(row, store).resume_process_metrics())
+            store.append(row)
+            compact.append(row)
+        self.assertTrue(all(isinstance(record, HistoryRecord) for record in compact))
+        self.assertEqual([r["commit"] for r in compact], [r["commit"] for r in store])
+        self.assertEqual(CoChangeGraph.from_rows(compact).adjacency, CoChangeGraph.from_rows(store).adjacency)
+        row = dict(rows[-1], commit="new", date=rows[-1]["date"] + timedelta(days=1))
+        self.assertEqual(ProcessWindows.from_rows(compact).resume_process_windows(row),
+                         ProcessWindows.from_rows(store).resume_process_windows(row))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.history_aggregates import HistoryAggregates
+from scripts.process.history_store import HistoryStore
+from scripts.process.process_metrics import ProcessMetrics
+from tests.process_metrics_reference import RowProcessMetrics
+
+# A few rows per spill
+MEMORY_LIMIT_MB = 0.01
+
+
+def history(n_commits=120, seed=9):
+    generator = random.Random(seed)
+    rows = []
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(n_commits):
+        date += timedelta(hours=generator.randint(-30, 60), seconds=generator.randint(0, 3600))
+        # A few commits come back, after their first rows were spilled
+        commit = f"c{i - 20}" if i > 20 and generator.random() < 0.05 else f"c{i}"
+        author = generator.choice(["alice", "bob", "carol", "dave"])
+        for _ in range(generator.choice([1, 1, 2, 3, 6])):
+            kind = generator.choice(["resource", "data", "variable"])
+            rows.append({"commit": commit, "author": author, "date": date, "exp": generator.randint(0, 6),
+                         "file": generator.choice(["main.tf", "net/vpc.tf", "net/sub/a.tf"]),
+                         "block_identifiers": generator.choice(["a", "b", "c", "d"]), "block": kind,
+                         "block_id": generator.choice(["aws_vpc", "aws_s3_bucket"]),
+                         "isResource": int(kind == "resource"), "isData": int(kind == "data"),
+                         "fault_prone": generator.choice([0, 0, 1])})
+    return rows
+
+
+class TestHistorySpill(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = HistoryStore(keep_rows=False, memory_limit_mb=MEMORY_LIMIT_MB, spill_dir=self.directory.name)
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_same_process_metrics(self):
+        rows = history()
+        for i, row in enumerate(rows):
+            expected = RowProcessMetrics(row, rows[:i]).resume_process_metrics()
+            resumed = ProcessMetrics(row, self.store).resume_process_metrics()
+            self.assertEqual(resumed, expected)
+            self.assertEqual([type(value) for value in resumed.values()], [type(value) for value in expected.values()])
+            self.store.append(row)
+        self.assertIsNotNone(self.store.spill)
+        self.assertLess(len(self.store.aggregates.commits), len({row["commit"] for row in rows}))
+
+    def test_rows_counted_not_kept(self):
+        rows = history()
+        self.store.extend(rows)
+        self.assertEqual(len(self.store), len(rows))
+        self.assertEqual(self.store.rows, [])
+        with self.assertRaises(ValueError):
+            list(self.store)
+        with self.assertRaises(ValueError):
+            HistoryStore(memory_limit_mb=MEMORY_LIMIT_MB)
+
+    def test_saved_aggregates_hold_all_changes(self):
+        rows = history()
+        self.store.extend(rows)
+        aggregates = HistoryStore(rows).aggregates
+        path = os.path.join(self.directory.name, "history.state")
+        self.store.aggregates.save(path)
+        loaded = HistoryAggregates.load(path)
+        for key in HistoryAggregates.STATE:
+            self.assertEqual(getattr(loaded, key), getattr(aggregates, key), key)
+
+    def test_close_deletes_spill(self):
+        self.store.extend(history(20))
+        path = self.store.spill.path
+        self.assertTrue(os.path.exists(path))
+        self.store.close()
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.history_store import HistoryStore
+from scripts.process.process_metrics import ProcessMetrics
+from tests.process_metrics_reference import RowProcessMetrics
+
+
+def history(n_commits=80, seed=5):
+    generator = random.Random(seed)
+    rows = []
+    date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for i in range(n_commits):
+        date += timedelta(hours=generator.randint(-12, 48))
+        author = generator.choice(["alice", "bob", "carol"])
+        for _ in range(generator.choice([1, 1, 2, 3])):
+            kind = generator.choice(["resource", "data", "variable"])
+            rows.append({"commit": f"c{i}", "author": author, "date": date, "exp": generator.randint(0, 5),
+                         "file": generator.choice(["main.tf", "net/vpc.tf"]),
+                         "block_identifiers": generator.choice(["a", "b", "c"]), "block": kind,
+                         "block_id": generator.choice(["aws_vpc", "aws_s3_bucket"]),
+                         "isResource": int(kind == "resource"), "isData": int(kind == "data"),
+                         "fault_prone": generator.choice([0, 0, 1])})
+    return rows
+
+
+class TestHistoryStore(unittest.TestCase):
+    def test_rows_in_order(self):
+        rows = history()
+        store = HistoryStore(rows)
+        self.assertEqual(len(store), len(rows))
+        self.assertEqual(list(store), rows)
+        self.assertEqual(store[3], rows[3])
+
+    def test_process_metrics_same_with_list_and_store(self):
+        rows = history()
+        store = HistoryStore()
+        for i, row in enumerate(rows):
+            self.assertEqual(RowProcessMetrics(row, rows[:i]).resume_process_metrics(),
+                             ProcessMetrics(row, store).resume_process_metrics())
+            store.append(row)
+
+
+if __name__ == "__main__":
+    unittest.main()
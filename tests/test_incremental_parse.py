@@ -0,0 +1,95 @@
+import difflib
+import random
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+from scripts.codes.incremental_parse import derive_blocks, is_self_contained, map_line
+
+BLOCK_TEMPLATES = [
+    'resource "aws_instance" "web{n}" {{\n  ami = "ami-{n}"\n  tags = {{\n    Name = "web"\n  }}\n}}\n',
+    'variable "region{n}" {{\n  default = "eu-west-1"\n}}\n',
+    'locals {{\n  name{n} = "x"\n}}\n',
+    'output "ip{n}" {{ value = aws_instance.web.public_ip }}\n',
+    '# comment {n}\n',
+    '\n',
+]
+
+
+def diff_lines(before, after):
+    """Lines removed from `before` and inserted in `after` (1-based), as git would report them."""
+    removed, inserted = [], []
+    matcher = difflib.SequenceMatcher(None, before.split("\n"), after.split("\n"), autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            removed.extend(range(i1 + 1, i2 + 1))
+            inserted.extend(range(j1 + 1, j2 + 1))
+    return removed, inserted
+
+
+class TestIncrementalParse(unittest.TestCase):
+    def setUp(self):
+        self.extractor = HclMetricsExtractor()
+
+    def test_map_line(self):
+        # before: 1 2 [3 deleted] 4 5 ; after: 1 [2 inserted] 2 4 5 -> lines 1 2 3 4
+        self.assertEqual(map_line(1, [3], [2]), 1)
+        self.assertEqual(map_line(2, [3], [2]), 3)
+        self.assertEqual(map_line(4, [3], [2]), 4)
+        self.assertEqual(map_line(5, [3], [2]), 5)
+
+    def test_is_self_contained(self):
+        self.assertTrue(is_self_contained('locals {\n  a = "}"\n}\n'))
+        self.assertFalse(is_self_contained('locals {\n  a = 1\n'))
+        self.assertFalse(is_self_contained('/* open comment\nlocals {}\n'))
+        self.assertFalse(is_self_contained('x = <<EOF\nno end\n'))
+
+    def test_derived_blocks_match_full_parse(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            pieces = [rng.choice(BLOCK_TEMPLATES).format(n=i) for i in range(rng.randint(0, 12))]
+            before = "".join(pieces)
+            edited = list(pieces)
+            for _ in range(rng.randint(1, 3)):
+                action = rng.random()
+                position = rng.randint(0, len(edited))
+                if action < 0.4:
+                    edited.insert(position, rng.choice(BLOCK_TEMPLATES).format(n=100 + position))
+                elif edited and action < 0.7:
+                    del edited[min(position, len(edited) - 1)]
+                elif edited:
+                    index = min(position, len(edited) - 1)
+                    edited[index] = edited[index].replace('"x"', '"y"').replace("eu-west-1", "us-east-1")
+            after = "".join(edited)
+
+            removed, inserted = diff_lines(before, after)
+            before_blocks = self.extractor.parse_source(before)["data"]
+            after_blocks = self.extractor.parse_source(after)["data"]
+
+            self.assertEqual(derive_blocks(self.extractor, before_blocks, after, removed, inserted), after_blocks)
+            self.assertEqual(derive_blocks(self.extractor, after_blocks, before, inserted, removed), before_blocks)
+
+    def test_unbalanced_region_requests_full_parse(self):
+        before = 'locals {\n  a = 1\n}\n\nlocals {\n  b = 2\n}\n'
+        after = '/* disabled\nlocals {\n  a = 1\n}\n\nlocals {\n  b = 2\n}\n'
+        removed, inserted = diff_lines(before, after)
+        before_blocks = self.extractor.parse_source(before)["data"]
+        self.assertIsNone(derive_blocks(self.extractor, before_blocks, after, removed, inserted))
+
+    def test_derived_blocks_are_not_parser_output(self):
+        before = 'locals {\n  a = 1\n}\n'
+        after = 'locals {\n  a = 1\n}\n\nlocals {\n  b = 2\n}\n'
+        removed, inserted = diff_lines(before, after)
+        derived = derive_blocks(self.extractor, self.extractor.parse_source(before)["data"], after, removed, inserted)
+        self.extractor.remember_derived(after, derived)
+        self.assertEqual(self.extractor.peek_derived(after), derived)
+        self.assertIsNone(self.extractor.peek(after))
+        self.assertIsNone(self.extractor.peek_derived(before))
+
+
+if __name__ == '__main__':
+    unittest.main()
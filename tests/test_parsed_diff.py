@@ -0,0 +1,42 @@
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.lines_change.ImpactedLines import ImpactedLines
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+from scripts.utility.utiliy import UtilityChange
+
+
+class TestParsedDiff(unittest.TestCase):
+    def setUp(self):
+        self.mod = MagicMock()
+        self.mod.diff_parsed = {
+            'added': [(2, '  ami = "ami-2"'), (3, '  # note'), (4, ''), (6, '  count = 2')],
+            'deleted': [(2, '  ami = "ami-1"'), (5, '  description = "old"')],
+        }
+
+    def test_filters_special_lines(self):
+        parsed = ParsedDiff(self.mod)
+        self.assertEqual(parsed.added_lines, [2, 6])
+        self.assertEqual(parsed.deleted_lines, [2])
+        self.assertEqual(parsed.added_lines_content, [(2, '  ami = "ami-2"'), (6, '  count = 2')])
+
+    def test_shared_between_blocks(self):
+        block = {"start_block": 1, "end_block": 10, "depthOfBlock": 2}
+        standalone = ImpactedLines(self.mod, block, block).resume_changed_lines()
+
+        parsed = ParsedDiff(self.mod)
+        with patch.object(UtilityChange, "exclude_special_lines") as exclude:
+            shared = [ImpactedLines(self.mod, block, block, parsed).resume_changed_lines() for _ in range(3)]
+        exclude.assert_not_called()
+        self.assertEqual(shared, [standalone] * 3)
+        self.assertEqual(standalone["additions"], 2)
+        self.assertEqual(standalone["churn_size"], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
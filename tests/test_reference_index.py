@@ -0,0 +1,113 @@
+import subprocess
+import tempfile
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.hcl_metrics_measures import HclMetricsExtractor
+from scripts.codes.reference_index import ReferenceIndex, block_references
+
+MAIN = '''variable "cidr" {}
+
+resource "aws_vpc" "main" {
+  cidr_block = var.cidr
+}
+
+resource "aws_subnet" "a" {
+  vpc_id = aws_vpc.main.id
+  tags   = { Name = "${aws_vpc.main.id}-a" }
+}
+
+data "aws_ami" "ubuntu" {}
+
+module "net" {
+  source = "./net"
+  ami    = data.aws_ami.ubuntu.id
+}
+'''
+
+
+def git(repo, *args):
+    return subprocess.run(["git", "-C", repo, "-c", "user.name=t", "-c", "user.email=t@t", *args],
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit_files(repo, files, message):
+    for path, content in files.items():
+        full_path = os.path.join(repo, path)
+        if content is None:
+            os.remove(full_path)
+            continue
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "w") as f:
+            f.write(content)
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", message)
+    return git(repo, "rev-parse", "HEAD")
+
+
+class TestBlockReferences(unittest.TestCase):
+    def test_references(self):
+        blocks = HclMetricsExtractor().parse_source(MAIN)["data"]
+        references = block_references(MAIN, blocks)
+        self.assertEqual(references["variable cidr"], set())
+        self.assertEqual(references["resource aws_vpc main"], {"variable cidr"})
+        # References inside string interpolations count, the literal text does not
+        self.assertEqual(references["resource aws_subnet a"], {"resource aws_vpc main"})
+        self.assertEqual(references["module net"], {"data aws_ami ubuntu"})
+
+    def test_attribute_chains_are_not_split(self):
+        source = ('locals {\n  my_map = { key = "v" }\n}\n\n'
+                  'output "x" {\n  value = [local.my_map.key, "${local.my_map.key}", var.a.b_c.d]\n}\n')
+        blocks = HclMetricsExtractor().parse_source(source)["data"]
+        self.assertEqual(block_references(source, blocks)["output x"], {"variable a"})
+
+
+class TestReferenceIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = self.tmp.name
+        git(self.repo, "init", "-q")
+        self.first = commit_files(self.repo, {"main.tf": MAIN, "net/main.tf": 'variable "ami" {}\n'}, "first")
+        self.second = commit_files(self.repo, {
+            "subnets.tf": 'resource "aws_subnet" "b" {\n  vpc_id = aws_vpc.main.id\n}\n',
+            "net/main.tf": None}, "second")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_sync_follows_the_tree(self):
+        index = ReferenceIndex(self.repo, HclMetricsExtractor())
+        index.sync(self.first)
+        self.assertEqual(index.resume_references("main.tf", "resource aws_vpc main"),
+                         {"reference_fan_in": 1, "reference_fan_out": 1})
+        # Modules are indexed per directory
+        self.assertEqual(index.resume_references("net/main.tf", "variable ami")["reference_fan_in"], 0)
+
+        index.sync(self.second)
+        self.assertEqual(index.resume_references("main.tf", "resource aws_vpc main")["reference_fan_in"], 2)
+        self.assertNotIn("net/main.tf", index.files)
+
+        # Moving back (newest-to-oldest traversal) restores the older tree
+        index.sync(self.first)
+        self.assertEqual(index.resume_references("main.tf", "resource aws_vpc main")["reference_fan_in"], 1)
+        self.assertIn("net/main.tf", index.files)
+
+    def test_persistence(self):
+        index = ReferenceIndex(self.repo, HclMetricsExtractor())
+        index.sync(self.first)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "references.index")
+            index.save(path)
+            loaded = ReferenceIndex.load(path, self.repo, HclMetricsExtractor())
+        self.assertEqual(loaded.commit, self.first)
+        loaded.sync(self.second)
+        self.assertEqual(loaded.resume_references("subnets.tf", "resource aws_subnet b"),
+                         {"reference_fan_in": 0, "reference_fan_out": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
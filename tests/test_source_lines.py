@@ -0,0 +1,43 @@
+import random
+import tempfile
+import unittest
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.utility.source_lines import SourceLines
+
+
+def read_block_from_file(source, start_line, end_line):
+    # What SimilarityChange did before: write the version to disk and readlines() it back
+    with tempfile.NamedTemporaryFile(mode='w', suffix='.tf', delete=False, encoding='utf-8') as f:
+        f.write(source)
+        path = f.name
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        return "".join(lines[max(0, start_line - 1):min(len(lines), end_line)])
+    finally:
+        os.remove(path)
+
+
+class TestSourceLines(unittest.TestCase):
+    def test_slices_match_file_readlines(self):
+        rng = random.Random(4)
+        for _ in range(200):
+            source = "".join(rng.choice(["a", "b = 1", "\n", "\r\n", "\r", "  }"]) for _ in range(rng.randint(0, 20)))
+            lines = SourceLines(source)
+            for _ in range(5):
+                start, end = rng.randint(0, 12), rng.randint(0, 12)
+                self.assertEqual(lines.slice(start, end), read_block_from_file(source, start, end))
+
+    def test_missing_bounds_or_source(self):
+        self.assertEqual(SourceLines(None).slice(1, 3), "")
+        self.assertEqual(SourceLines("a\nb\n").slice(None, 2), "")
+        self.assertEqual(len(SourceLines("a\nb")), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
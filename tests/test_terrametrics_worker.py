@@ -0,0 +1,114 @@
+import unittest
+import subprocess
+import sys
+import os
+import tempfile
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.code_metrics_measures import CodeMetricsExtractor
+from scripts.codes.terrametrics_worker import TerraMetricsWorker, WorkerUnavailableError
+
+# Stand-in for TerraMetricsServer.java: same line protocol, no JVM needed.
+FAKE_SERVER = r'''
+import sys
+print("READY NOEXITTRAP" if "--no-exit-trap" in sys.argv else "READY", flush=True)
+for line in sys.stdin:
+    args = line.rstrip("\n").split("\t")
+    if "--crash" in args:
+        sys.exit(1)
+    if "--fail" in args:
+        print("ERR parse error", flush=True)
+        continue
+    with open(args[args.index("--target") + 1], "w") as f:
+        f.write('{"data": []}')
+    if "--no-exit-trap" in sys.argv:
+        # System.exit(0) of the entry point, not trapped
+        sys.exit(0)
+    print("OK", flush=True)
+'''
+
+
+class FallbackExtractor(CodeMetricsExtractor):
+    """
+    Extractor whose worker is the fake server; `java -jar` runs are recorded, not executed.
+    """
+
+    def __init__(self, jar_path, command):
+        super().__init__(jar_path=jar_path)
+        self._worker = TerraMetricsWorker(jar_path, max_restarts=1)
+        self._worker.command = command
+        self.jar_runs = []
+
+    def _run_jar(self, args):
+        self.jar_runs.append(args)
+
+
+class TestTerraMetricsWorker(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        server_path = os.path.join(self.tmp_dir.name, "fake_server.py")
+        with open(server_path, "w") as f:
+            f.write(FAKE_SERVER)
+        self.worker = TerraMetricsWorker("fake.jar", max_restarts=1)
+        self.worker.command = [sys.executable, server_path]
+        self.target = os.path.join(self.tmp_dir.name, "out.json")
+
+    def tearDown(self):
+        self.worker.stop()
+        self.tmp_dir.cleanup()
+
+    def test_worker_is_reused_between_requests(self):
+        self.worker.run(["--file", "a.tf", "-b", "--target", self.target])
+        pid = self.worker._process.pid
+        self.worker.run(["--file", "b.tf", "-b", "--target", self.target])
+
+        self.assertEqual(self.worker._process.pid, pid, "The same worker should serve both requests")
+        self.assertTrue(os.path.exists(self.target))
+
+    def test_worker_restarts_after_crash(self):
+        self.worker.run(["--file", "a.tf", "-b", "--target", self.target])
+        pid = self.worker._process.pid
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.worker.run(["--crash"])
+
+        # The next request transparently gets a fresh worker
+        self.worker.run(["--file", "b.tf", "-b", "--target", self.target])
+        self.assertNotEqual(self.worker._process.pid, pid)
+
+    def test_terrametrics_error_keeps_worker_alive(self):
+        self.worker.run(["--file", "a.tf", "-b", "--target", self.target])
+        pid = self.worker._process.pid
+
+        with self.assertRaises(subprocess.CalledProcessError):
+            self.worker.run(["--fail"])
+
+        self.assertTrue(self.worker.is_alive())
+        self.assertEqual(self.worker._process.pid, pid)
+
+    def test_untrapped_exit_makes_worker_unavailable(self):
+        self.worker.command.append("--no-exit-trap")
+        with self.assertRaises(WorkerUnavailableError):
+            self.worker.run(["--file", "a.tf", "-b", "--target", self.target])
+
+    def test_worker_that_cannot_start_is_unavailable(self):
+        self.worker.command = [sys.executable, "-c", "pass"]
+        with self.assertRaises(WorkerUnavailableError):
+            self.worker.run(["--file", "a.tf", "-b", "--target", self.target])
+
+    def test_extractor_falls_back_to_jar_runs(self):
+        jar_path = os.path.join(self.tmp_dir.name, "fake.jar")
+        open(jar_path, "w").close()
+        extractor = FallbackExtractor(jar_path, self.worker.command + ["--no-exit-trap"])
+        extractor._invoke_terrametrics(["--file", "a.tf", "-b", "--target", self.target])
+        extractor._invoke_terrametrics(["--file", "b.tf", "-b", "--target", self.target])
+
+        self.assertFalse(extractor.persistent)
+        self.assertIsNone(extractor._worker)
+        self.assertEqual([args[1] for args in extractor.jar_runs], ["a.tf", "b.tf"])
+
+
+if __name__ == '__main__':
+    unittest.main()
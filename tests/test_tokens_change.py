@@ -0,0 +1,60 @@
+import math
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.edits.tokens_change import TokensChange
+from scripts.feature_families import parse_features
+from scripts.process.lines_change.line_tokens import LineTokenStats, tokenize_line
+from scripts.process.lines_change.parsed_diff import ParsedDiff
+
+BLOCK = {"start_block": 1, "end_block": 6, "depthOfBlock": 1}
+BLOCK_BEFORE = {"start_block": 1, "end_block": 4, "depthOfBlock": 1}
+
+
+class TestTokensChange(unittest.TestCase):
+    def setUp(self):
+        self.mod = MagicMock()
+        self.mod.diff_parsed = {
+            'added': [(2, '  ami = "ami-1 2"'), (3, '  count = 1'), (5, '  count = 1'), (9, '  other = 1')],
+            'deleted': [(2, '  ami = "ami-0"')]
+        }
+
+    def test_tokenize_line(self):
+        self.assertEqual(tokenize_line('  ami = "ami-1 2"'), ["ami", "=", "ami-1 2"])
+        # Unbalanced quote (multi-line string): whitespace split
+        self.assertEqual(tokenize_line('  a = "x'), ["a", "=", '"x'])
+
+    def test_block_statistics(self):
+        features = TokensChange(self.mod, BLOCK, BLOCK_BEFORE, ParsedDiff(self.mod)).resume_token_change()
+        self.assertEqual(list(features), TokensChange.get_headers())
+        # Lines 2, 3 and 5 are inside the block, line 9 is not
+        self.assertEqual(features["sum_added_line_token"], 9)
+        self.assertEqual(features["avg_added_line_token"], 3.0)
+        self.assertEqual(features["max_added_line_token"], 3)
+        self.assertEqual(features["sum_added_line_length"], 17 + 11 + 11)
+        self.assertEqual(features["max_added_line_length"], 17)
+        self.assertEqual(features["sum_removed_line_token"], 3)
+        self.assertAlmostEqual(features["text_entropy_for_removed_lines"], math.log2(3))
+
+    def test_entropy(self):
+        stats = LineTokenStats([(1, "a b"), (2, "a b"), (3, "a")])
+        self.assertAlmostEqual(stats.summary(0, 3)["entropy"], 1.0)
+        self.assertEqual(stats.summary(2, 4)["entropy"], 0.0)
+
+    def test_new_block_and_empty_range(self):
+        features = TokensChange(self.mod, {"start_block": 10, "end_block": 12}, None).resume_token_change()
+        self.assertTrue(all(value == 0 for value in features.values()))
+
+    def test_optional_family(self):
+        self.assertNotIn("tokens", parse_features(None))
+        self.assertEqual(parse_features("all,tokens")[-1], "tokens")
+        self.assertEqual(parse_features("delta,tokens"), ["delta", "tokens"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.codes.hcl_tokenizer import multiline_token_lines
+from scripts.process.trivial_change import TrivialChange, is_trivial_row, iter_hunk_lines, token_fingerprint
+
+BEFORE = '''resource "aws_instance" "web" {
+  ami = "ami-1"
+  instance_type = "t2.micro"
+}
+'''
+
+FORMATTED = '''# Web server
+resource "aws_instance" "web" {
+  ami           = "ami-1" // pinned
+  instance_type = "t2.micro"
+}
+'''
+
+CHANGED = '''resource "aws_instance" "web" {
+  ami           = "ami-2"
+  instance_type = "t2.micro"
+}
+'''
+
+
+def make_mod(before, after, diff):
+    mod = MagicMock()
+    mod.source_code_before = before
+    mod.source_code = after
+    mod.diff = diff
+    return mod
+
+
+class TestTrivialChange(unittest.TestCase):
+    def test_fingerprint_ignores_layout_comments_and_descriptions(self):
+        self.assertEqual(token_fingerprint(BEFORE), token_fingerprint(FORMATTED))
+        self.assertNotEqual(token_fingerprint(BEFORE), token_fingerprint(CHANGED))
+        self.assertEqual(token_fingerprint('variable "a" {\n  description = "old"\n}'),
+                         token_fingerprint('variable "a" {\n  description = "new text"\n}'))
+
+    def test_iter_hunks(self):
+        diff = "@@ -1,2 +1,2 @@\n-a = 1\n+a  = 1\n b = 2\n@@ -9 +9 @@\n-c = 3\n+c = 4"
+        self.assertEqual(list(iter_hunk_lines(diff)), [([(1, "a = 1"), (2, "b = 2")], [(1, "a  = 1"), (2, "b = 2")]),
+                                                       ([(9, "c = 3")], [(9, "c = 4")])])
+
+    def test_multiline_token_lines(self):
+        source = ('policy = "arn:aws:s3:::bucket/*" # not a /* comment\n'
+                  'script = <<-EOT\n  echo /* hi\n  EOT\n'
+                  '/* a\n   b */ c = "/*"\n')
+        self.assertEqual(multiline_token_lines(source), [(2, 4), (5, 6)])
+        self.assertEqual(multiline_token_lines(None), [])
+
+    def test_trivial_file(self):
+        diff = ('@@ -1,3 +1,4 @@\n+# Web server\n resource "aws_instance" "web" {\n-  ami = "ami-1"\n'
+                '+  ami           = "ami-1" // pinned\n')
+        self.assertTrue(TrivialChange(make_mod(BEFORE, FORMATTED, diff)).is_trivial_file())
+
+        diff = '@@ -2 +2 @@\n-  ami = "ami-1"\n+  ami           = "ami-2"\n'
+        self.assertFalse(TrivialChange(make_mod(BEFORE, CHANGED, diff)).is_trivial_file())
+
+    def test_moving_an_attribute_between_blocks_is_not_trivial(self):
+        before = ('resource "aws_instance" "a" {\n  ami = "ami-1"\n  instance_type = "t2.micro"\n}\n'
+                  'resource "aws_instance" "b" {\n  ami = "ami-2"\n}\n')
+        after = ('resource "aws_instance" "a" {\n  ami = "ami-1"\n}\n'
+                 'resource "aws_instance" "b" {\n  ami = "ami-2"\n  instance_type = "t2.micro"\n}\n')
+        diff = ('@@ -1,7 +1,7 @@\n resource "aws_instance" "a" {\n   ami = "ami-1"\n-  instance_type = "t2.micro"\n'
+                ' }\n resource "aws_instance" "b" {\n   ami = "ami-2"\n+  instance_type = "t2.micro"\n }')
+        self.assertFalse(TrivialChange(make_mod(before, after, diff)).is_trivial_file())
+
+    def test_opening_a_comment_is_not_trivial(self):
+        after = "/*\n" + BEFORE + "*/\n"
+        diff = "@@ -1,0 +1 @@\n+/*\n@@ -5,0 +6 @@\n+*/\n"
+        self.assertFalse(TrivialChange(make_mod(BEFORE, after, diff)).is_trivial_file())
+
+    def test_changes_inside_heredocs(self):
+        before = 'resource "a" "b" {\n  user_data = <<EOT\nrun --x\nEOT\n}\n'
+        after = 'resource "a" "b" {\n  user_data = <<EOT\nrun  --x\nEOT\n}\n'
+        diff = "@@ -3 +3 @@\n-run --x\n+run  --x\n"
+        self.assertFalse(TrivialChange(make_mod(before, after, diff)).is_trivial_file())
+
+        before = 'variable "a" {\n  description = <<EOT\nOld text\nEOT\n}\n'
+        after = 'variable "a" {\n  description = <<EOT\nOld  text\nEOT\n}\n'
+        diff = "@@ -3 +3 @@\n-Old text\n+Old  text\n"
+        self.assertTrue(TrivialChange(make_mod(before, after, diff)).is_trivial_file())
+
+    def test_trivial_block_and_rows(self):
+        self.assertTrue(TrivialChange.is_trivial_block(BEFORE, FORMATTED))
+        self.assertFalse(TrivialChange.is_trivial_block("", FORMATTED))
+        self.assertTrue(is_trivial_row({"trivial_change": "1"}))
+        self.assertFalse(is_trivial_row({"trivial_change": 0}))
+        self.assertFalse(is_trivial_row({}))
+
+
+if __name__ == '__main__':
+    unittest.main()
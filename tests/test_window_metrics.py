@@ -0,0 +1,110 @@
+import random
+import unittest
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+
+# Add project root to sys.path
+sys.path.append(os.getcwd())
+
+from scripts.process.window_metrics import ProcessWindows, parse_windows
+from tests.process_metrics_reference import RowProcessMetrics
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def history(n_commits=60, seed=3):
+    generator = random.Random(seed)
+    commits = []
+    date = START
+    for i in range(n_commits):
+        date += timedelta(days=generator.randint(0, 12))
+        author = generator.choice(["alice", "bob", "carol"])
+        blocks = generator.sample(["a", "b", "c", "d"], generator.randint(1, 3))
+        commits.append([{"commit": f"c{i}", "date": date, "author": author, "file": "main.tf",
+                         "block_identifiers": block, "fault_prone": generator.choice([0, 0, 1])}
+                        for block in blocks])
+    return commits
+
+
+def expected(previous_commits, row, window):
+    size, unit = int(window[:-1]), window[-1]
+    if unit == "c":
+        previous_commits = previous_commits[-size:] if size else []
+    else:
+        previous_commits = [rows for rows in previous_commits
+                            if abs(row["date"] - rows[0]["date"]) <= timedelta(days=size)]
+    same = [r for rows in previous_commits for r in rows if r["block_identifiers"] == row["block_identifiers"]]
+    return {f"ndevs_{window}": len({r["author"] for r in same}),
+            f"ncommits_{window}": len({r["commit"] for r in same}),
+            f"num_defects_before_{window}": sum(1 for r in same if r["fault_prone"] == 1)}
+
+
+class TestProcessWindows(unittest.TestCase):
+    def check_traversal(self, commits):
+        windows = ["7d", "30d", "3c", "10c"]
+        process_windows = ProcessWindows(windows)
+        for i, rows in enumerate(commits):
+            for row in rows:
+                values = process_windows.resume_process_windows(row)
+                for window in windows:
+                    for column, value in expected(commits[:i], row, window).items():
+                        self.assertEqual(values[column], value, (i, row["block_identifiers"], column))
+                process_windows.stage(row)
+            process_windows.commit()
+
+    def test_matches_rescan_oldest_first(self):
+        self.check_traversal(history())
+
+    def test_matches_rescan_newest_first(self):
+        # Full runs traverse the history newest first
+        self.check_traversal(list(reversed(history())))
+
+    def test_unbounded_window_matches_process_metrics(self):
+        commits = history()
+        process_windows = ProcessWindows(["100000d"])
+        previous_contributions = []
+        for rows in commits:
+            for row in rows:
+                values = process_windows.resume_process_windows(row)
+                metrics = RowProcessMetrics(row, previous_contributions)
+                self.assertEqual(values["ndevs_100000d"], metrics.num_devs())
+                self.assertEqual(values["ncommits_100000d"], metrics.num_commits())
+                self.assertEqual(values["num_defects_before_100000d"], metrics.num_defects_in_block_before())
+                process_windows.stage(row)
+            process_windows.commit()
+            previous_contributions.extend(rows)
+
+    def test_from_rows_replays_oldest_first(self):
+        commits = history()
+        rows = [row for commit_rows in reversed(commits) for row in commit_rows]
+        process_windows = ProcessWindows.from_rows(rows, ["30d", "5c"])
+        row = {"commit": "new", "date": commits[-1][0]["date"] + timedelta(days=1), "author": "alice",
+               "file": "main.tf", "block_identifiers": "a"}
+        values = process_windows.resume_process_windows(row)
+        self.assertEqual(values, dict(expected(commits, row, "30d"), **expected(commits, row, "5c")))
+
+    def test_csv_labels(self):
+        # History rows read from a CSV hold their labels as strings
+        commits = history()
+        rows = [dict(row, fault_prone=str(row["fault_prone"])) for commit_rows in reversed(commits)
+                for row in commit_rows]
+        process_windows = ProcessWindows.from_rows(rows, ["100000d"])
+        row = {"commit": "new", "date": commits[-1][0]["date"] + timedelta(days=1), "author": "alice",
+               "file": "main.tf", "block_identifiers": "a"}
+        self.assertEqual(process_windows.resume_process_windows(row), expected(commits, row, "100000d"))
+        self.assertGreater(process_windows.resume_process_windows(row)["num_defects_before_100000d"], 0)
+
+    def test_parse_windows(self):
+        self.assertEqual(parse_windows(None), ["30d", "90d"])
+        self.assertEqual(parse_windows("90d, 50c,90d"), ["90d", "50c"])
+        with self.assertRaises(ValueError):
+            parse_windows("90")
+        with self.assertRaises(ValueError):
+            parse_windows("0c")
+        self.assertEqual(ProcessWindows.get_headers(["90d"]),
+                         ["ndevs_90d", "ncommits_90d", "num_defects_before_90d"])
+
+
+if __name__ == "__main__":
+    unittest.main()